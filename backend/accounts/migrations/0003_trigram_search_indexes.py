@@ -0,0 +1,42 @@
+# Generated by Django 5.2.11 on 2026-10-17 16:06
+
+from django.db import migrations
+
+# (model, field, index name): pg_trgm GIN indexes on UPPER(column), which is
+# what `icontains` filters on, so core.search does not scan these tables
+TRIGRAM_INDEXES = [
+    ("User", "name", "user_name_trgm_idx"),
+    ("User", "email", "user_email_trgm_idx"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    quote = schema_editor.quote_name
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for model_name, field_name, index_name in TRIGRAM_INDEXES:
+        model = apps.get_model("accounts", model_name)
+        column = model._meta.get_field(field_name).column
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote(index_name)} ON {quote(model._meta.db_table)} "
+            f"USING gin (UPPER({quote(column)}) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for _, _, index_name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(index_name)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_user_created_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -53,6 +53,9 @@ class User(AbstractUser):
                 condition=~models.Q(username=""),
             )
         ]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="user_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.email})"
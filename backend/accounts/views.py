@@ -2,7 +2,6 @@ import secrets
 import string
 
 from django.contrib.auth import login, logout, update_session_auth_hash
-from django.db.models import Q
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -10,7 +9,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ViewSet
 
+from core.pagination import KeysetPagination
 from core.permissions import IsAdmin
+from core.search import search_filter
 from datasets.models import Job
 
 from .models import User
@@ -97,13 +98,7 @@ class UserViewSet(ViewSet):
     permission_classes = [IsAuthenticated, IsAdmin]
 
     def list(self, request):
-        queryset = User.objects.all().order_by("-created_at")
-
-        search = request.query_params.get("search", "").strip()
-        if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) | Q(email__icontains=search)
-            )
+        queryset = User.objects.all()
 
         role = request.query_params.get("role", "").strip()
         if role:
@@ -113,20 +108,14 @@ class UserViewSet(ViewSet):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
 
-        # Pagination
-        page = int(request.query_params.get("page", 1))
-        page_size = int(request.query_params.get("page_size", 20))
-        total = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        users = queryset[start:end]
+        # After the filters, so the match limit applies to the filtered users
+        search = request.query_params.get("search", "").strip()
+        if search:
+            queryset = search_filter(queryset, search, ["name", "email"])
 
-        return Response(
-            {
-                "count": total,
-                "results": UserSerializer(users, many=True).data,
-            }
-        )
+        paginator = KeysetPagination()
+        users = paginator.paginate_queryset(queryset, request)
+        return paginator.get_paginated_response(UserSerializer(users, many=True).data)
 
     def create(self, request):
         serializer = CreateUserSerializer(data=request.data)
@@ -1,15 +1,17 @@
 from django.db import transaction
-from django.db.models import Count, Max
+from django.db.models import Max
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
-from core.eml_normalizer import normalize_eml
 from core.models import PlatformSetting
+from core.pagination import KeysetPagination
 from core.permissions import IsAnnotator
-from datasets.models import Job
+from core.search import search_filter
+from datasets.models import Job, UserStatusCount
+from datasets.raw_content import raw_content_response
+from datasets.status_counts import user_status_counts
 from .models import Annotation, AnnotationVersion, DraftAnnotation
 from .serializers import (
     JobForAnnotationSerializer,
@@ -19,17 +21,15 @@ from .serializers import (
 )
 
 
-class AnnotationJobsPagination(PageNumberPagination):
-    page_size = 20
-    page_size_query_param = "page_size"
-    max_page_size = 100
+class AnnotationJobsPagination(KeysetPagination):
+    ordering = ("-updated_at", "-id")
     status_counts = None
 
-    def get_paginated_response(self, data):
-        response = super().get_paginated_response(data)
+    def get_paginated_data(self, data):
+        payload = super().get_paginated_data(data)
         if self.status_counts is not None:
-            response.data["status_counts"] = self.status_counts
-        return response
+            payload["status_counts"] = self.status_counts
+        return payload
 
 
 class AnnotationViewSet(ViewSet):
@@ -87,18 +87,7 @@ class AnnotationViewSet(ViewSet):
         job, err = self._get_job(job_id, request.user)
         if err:
             return err
-        if not job.eml_content:
-            return Response(
-                {"detail": "Email content not available."},
-                status=status.HTTP_404_NOT_FOUND,
-            )
-        raw_content = job.eml_content
-        normalized_content, has_encoded_parts = normalize_eml(raw_content)
-        return Response({
-            "raw_content": raw_content,
-            "normalized_content": normalized_content,
-            "has_encoded_parts": has_encoded_parts,
-        })
+        return raw_content_response(request, job)
 
     def get_draft(self, request, job_id):
         job, err = self._get_job(job_id, request.user)
@@ -244,16 +233,10 @@ class AnnotationViewSet(ViewSet):
         base_queryset = (
             Job.objects.filter(assigned_annotator=request.user)
             .select_related("dataset")
-            .order_by("-updated_at")
         )
 
-        # Compute status counts from unfiltered base queryset
-        status_counts_qs = (
-            Job.objects.filter(assigned_annotator=request.user)
-            .values("status")
-            .annotate(count=Count("id"))
-        )
-        status_counts = {row["status"]: row["count"] for row in status_counts_qs}
+        # Status counts over all of the user's jobs, from the counters
+        status_counts = user_status_counts(request.user, UserStatusCount.Role.ANNOTATOR)
 
         # Filters
         queryset = base_queryset
@@ -266,7 +249,7 @@ class AnnotationViewSet(ViewSet):
                 queryset = queryset.filter(status__in=statuses)
         search = request.query_params.get("search")
         if search:
-            queryset = queryset.filter(file_name__icontains=search)
+            queryset = search_filter(queryset, search, ["file_name"])
 
         paginator = AnnotationJobsPagination()
         paginator.status_counts = status_counts
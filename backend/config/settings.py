@@ -187,6 +187,15 @@ REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "core.exception_handler.custom_exception_handler",
 }
 
+# Keyset pagination totals (core.pagination): seconds to cache a list's
+# COUNT(*) (0 = always count), and on PostgreSQL the planner row estimate above
+# which the estimate is reported instead of counting (0 = always exact)
+PAGINATION_COUNT_CACHE_SECONDS = int(os.environ.get("PAGINATION_COUNT_CACHE_SECONDS", "0"))
+PAGINATION_APPROX_COUNT_THRESHOLD = int(os.environ.get("PAGINATION_APPROX_COUNT_THRESHOLD", "0"))
+
+# List searches (core.search) keep only this many best-ranked matches (0 = all)
+SEARCH_MATCH_LIMIT = int(os.environ.get("SEARCH_MATCH_LIMIT", "1000"))
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -231,6 +240,64 @@ CSRF_TRUSTED_ORIGINS = list(
 DATA_UPLOAD_MAX_MEMORY_SIZE = 524288000  # 500MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 
+# Dataset extraction: uploads are spooled here and extracted in the background
+DATASET_UPLOAD_DIR = MEDIA_ROOT / "uploads"
+EXTRACTION_BATCH_SIZE = int(os.environ.get("EXTRACTION_BATCH_SIZE", "500"))
+# Threads used to read, hash and compress ZIP members (1 = serial)
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", "1"))
+# A dataset still EXTRACTING with no progress for this many seconds is assumed
+# to have lost its extraction process and is marked FAILED
+EXTRACTION_STALE_SECONDS = int(os.environ.get("EXTRACTION_STALE_SECONDS", "900"))
+
+# Codec for stored .eml payloads: "zlib", "zstd" or "zstd-dict" (zstd needs the
+# optional `zstandard` package, the `zstd` extra: `uv sync --extra zstd`).
+# "zstd-dict" trains a dictionary per uploaded dataset.
+EML_CODEC = os.environ.get("EML_CODEC", "zlib")
+EML_ZSTD_LEVEL = int(os.environ.get("EML_ZSTD_LEVEL", "3"))
+EML_ZSTD_DICT_SIZE = int(os.environ.get("EML_ZSTD_DICT_SIZE", "112640"))  # 110KB
+EML_ZSTD_DICT_SAMPLES = int(os.environ.get("EML_ZSTD_DICT_SAMPLES", "1000"))
+
+# Exports of up to this many jobs are streamed straight to the client instead
+# of being built into an archive under MEDIA_ROOT (0 = always build archives)
+EXPORT_STREAM_MAX_JOBS = int(os.environ.get("EXPORT_STREAM_MAX_JOBS", "1000"))
+
+# Processes that de-identify and compress jobs for ARCHIVE exports (1 = inline)
+EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", "1"))
+
+# Export archive retention: archives unused for this many days, and the least
+# recently used ones beyond the byte budget, are evicted and regenerated on
+# download (0 = no limit)
+EXPORT_RETENTION_DAYS = int(os.environ.get("EXPORT_RETENTION_DAYS", "30"))
+EXPORT_STORAGE_MAX_BYTES = int(os.environ.get("EXPORT_STORAGE_MAX_BYTES", "0"))
+
+# Hand archive downloads to the reverse proxy instead of reading them in the
+# worker: "" (serve from Django), "x-accel-redirect" (nginx) or "x-sendfile"
+# (Apache/lighttpd). For nginx, EXPORT_ACCEL_REDIRECT_PREFIX must be an
+# internal location aliased to MEDIA_ROOT/exports/.
+EXPORT_SENDFILE_MODE = os.environ.get("EXPORT_SENDFILE_MODE", "").lower()
+EXPORT_ACCEL_REDIRECT_PREFIX = os.environ.get("EXPORT_ACCEL_REDIRECT_PREFIX", "/protected-exports/")
+
+# Export previews are cached per (email content, latest annotation version,
+# normalizer version) in a per-process LRU of this many entries (0 = off) and,
+# with EXPORT_PREVIEW_CACHE_URL set (e.g. "redis://localhost:6379/1", needs the
+# optional `redis` package), in a cache shared by all workers
+EXPORT_PREVIEW_CACHE_SIZE = int(os.environ.get("EXPORT_PREVIEW_CACHE_SIZE", "128"))
+EXPORT_PREVIEW_CACHE_URL = os.environ.get("EXPORT_PREVIEW_CACHE_URL", "")
+EXPORT_PREVIEW_CACHE_ALIAS = "export_previews"
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+if EXPORT_PREVIEW_CACHE_URL:
+    CACHES[EXPORT_PREVIEW_CACHE_ALIAS] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": EXPORT_PREVIEW_CACHE_URL,
+        "TIMEOUT": int(os.environ.get("EXPORT_PREVIEW_CACHE_TIMEOUT", "86400")),
+    }
+
+# Run background management commands synchronously (tests, local debugging)
+BACKGROUND_TASKS_INLINE = os.environ.get("BACKGROUND_TASKS_INLINE", "False").lower() in ("true", "1", "yes")
+
 # Production security settings
 if not DEBUG:
     SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
@@ -0,0 +1,36 @@
+"""
+Run management commands outside the request/response cycle.
+
+Long-running work (dataset extraction, exports) is handed to a detached local
+process so gunicorn workers return immediately and are not subject to the
+worker timeout.
+"""
+
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import transaction
+
+
+def run_command_in_background(command_name: str, *args: str) -> None:
+    """
+    Launch `manage.py <command_name> <args>` once the current transaction commits.
+
+    With BACKGROUND_TASKS_INLINE enabled (tests, local debugging) the command
+    runs synchronously in the current process instead.
+    """
+
+    def _launch():
+        if settings.BACKGROUND_TASKS_INLINE:
+            call_command(command_name, *args)
+            return
+        subprocess.Popen(
+            [sys.executable, str(settings.BASE_DIR / "manage.py"), command_name, *args],
+            cwd=settings.BASE_DIR,
+            stdin=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+    transaction.on_commit(_launch)
@@ -7,9 +7,25 @@ import bisect
 import base64
 import email
 import email.message
+import email.parser
 import quopri
 import re
-from collections.abc import Callable
+from array import array
+from itertools import accumulate, repeat
+from operator import floordiv, mul
+
+# Bump whenever normalize_eml output changes so cached results are recomputed.
+NORMALIZER_VERSION = 1
+
+_HEADER_PARSER = email.parser.HeaderParser()
+_BLANK_LINE_RE = re.compile(r"\r?\n\r?\n")
+_BOUNDARY_BREAK_RE = re.compile(r"\r?\n--")
+_CTE_HEADER_RES = {
+    cte: re.compile(r"Content-Transfer-Encoding:\s*" + re.escape(cte), re.IGNORECASE)
+    for cte in ("base64", "quoted-printable")
+}
+# Headers shouldn't be more than 500 chars between the CTE header and the body
+_CTE_HEADER_WINDOW = 500
 
 
 def normalize_eml(raw_content: str) -> tuple[str, bool]:
@@ -19,18 +35,26 @@ def normalize_eml(raw_content: str) -> tuple[str, bool]:
     Operates at the string level to preserve formatting and structure.
     Returns (normalized_content, has_encoded_parts).
     """
-    msg = email.message_from_string(raw_content)
+    msg = _HEADER_PARSER.parsestr(raw_content, headersonly=True)
 
-    if not msg.is_multipart():
+    if not _is_container(msg):
         return _normalize_single_part(raw_content, msg)
 
-    return _normalize_multipart(raw_content, msg)
+    return _normalize_multipart(raw_content)
 
 
 def _get_cte(msg: email.message.Message) -> str:
     return (msg.get("Content-Transfer-Encoding") or "").strip().lower()
 
 
+def _is_container(msg: email.message.Message) -> bool:
+    """Whether the email parser would treat this entity as having sub-parts."""
+    maintype = msg.get_content_maintype()
+    if maintype == "multipart":
+        return True
+    return maintype == "message" and msg.get_content_subtype() != "delivery-status"
+
+
 def _normalize_single_part(
     raw_content: str, msg: email.message.Message
 ) -> tuple[str, bool]:
@@ -62,140 +86,309 @@ def _normalize_single_part(
     return headers + decoded_text, True
 
 
-def _normalize_multipart(
-    raw_content: str, msg: email.message.Message
-) -> tuple[str, bool]:
+def _normalize_multipart(raw_content: str) -> tuple[str, bool]:
     """Handle a multipart message by finding and decoding each text/* part."""
-    # Collect all (body_start, body_end, decoded_text, cte_header_start, cte_header_end)
-    replacements: list[dict] = []
-    _collect_part_replacements(raw_content, msg, replacements)
+    replacements = _collect_multipart_replacements(raw_content)
 
     if not replacements:
         return raw_content, False
 
-    # Apply from end to start to preserve earlier offsets
-    replacements.sort(key=lambda r: r["body_start"], reverse=True)
-    result = raw_content
+    return _apply_replacements(raw_content, replacements), True
+
+
+def _apply_replacements(raw_content: str, replacements: list[dict]) -> str:
+    """
+    Splice CTE header and body replacements into raw_content.
+
+    Replacements arrive in document order and normally do not interleave, so
+    the output is assembled with a single join. If a CTE match landed inside
+    an earlier part's body, fall back to applying them back to front, which
+    is what the splice semantics are defined by.
+    """
+    pieces = []
+    pos = 0
     for rep in replacements:
-        # Replace body
+        if rep["cte_start"] < pos:
+            return _apply_replacements_in_place(raw_content, replacements)
+        pieces.append(raw_content[pos : rep["cte_start"]])
+        pieces.append(rep["cte_replacement"])
+        pieces.append(raw_content[rep["cte_end"] : rep["body_start"]])
+        pieces.append(rep["decoded_text"])
+        pos = rep["body_end"]
+    pieces.append(raw_content[pos:])
+    return "".join(pieces)
+
+
+def _apply_replacements_in_place(raw_content: str, replacements: list[dict]) -> str:
+    result = raw_content
+    for rep in sorted(replacements, key=lambda r: r["body_start"], reverse=True):
         result = result[: rep["body_start"]] + rep["decoded_text"] + result[rep["body_end"] :]
-        # Replace CTE header (which comes before body, so offset is still valid)
-        result = (
-            result[: rep["cte_start"]]
-            + rep["cte_replacement"]
-            + result[rep["cte_end"] :]
-        )
+        result = result[: rep["cte_start"]] + rep["cte_replacement"] + result[rep["cte_end"] :]
+    return result
+
 
-    return result, True
+def _collect_multipart_replacements(raw_content: str) -> list[dict]:
+    """
+    Collect replacement info for every encoded text/* part, in document order.
 
+    Walks the MIME tree once over raw_content, tracking the offsets of each
+    entity's headers, body and boundary delimiters, so every part is located
+    in time proportional to its own size.
+    """
+    replacements: list[dict] = []
+    line_index = _LineIndex(raw_content)
+    _walk_entity(raw_content, 0, len(raw_content), 0, "text/plain", line_index, replacements)
+    return replacements
 
-def _collect_part_replacements(
+
+class _LineIndex:
+    """
+    Whole-line positions of a document, for finding multi-line text.
+
+    Text spanning at least two line breaks holds its second line as a whole
+    line, preceded by a line ending with its first. Candidates are grouped
+    by that line and sorted by the reversed line before it, so the lines
+    ending with a given head form one run found by binary search. The index
+    is built once, on the first multi-line lookup, whatever head lengths are
+    looked up afterwards.
+    """
+
+    def __init__(self, raw_content: str):
+        self.raw_content = raw_content
+        self._by_line: dict | None = None
+
+    def find(self, start: int, end: int) -> int:
+        """Offset of the first occurrence of raw_content[start:end]."""
+        raw_content = self.raw_content
+        chunk = raw_content[start:end]
+        first_break = chunk.find("\n")
+        second_break = chunk.find("\n", first_break + 1) if first_break >= 0 else -1
+        if second_break < 0:
+            return raw_content.find(chunk, 0, end)
+
+        if self._by_line is None:
+            self._build()
+        head = chunk[:first_break]
+        line = chunk[first_break + 1 : second_break]
+        rest = chunk[second_break:]
+        reversed_heads, line_starts, group_ends = self._by_line.get(line, ((), (), ()))
+        reversed_head = head[::-1]
+        limit = start + first_break
+        first = None
+        i = bisect.bisect_left(reversed_heads, reversed_head)
+        while i < len(reversed_heads) and reversed_heads[i].startswith(reversed_head):
+            # Starts after equal preceding lines ascend; the first match is the earliest
+            for j in range(i, group_ends[i]):
+                line_start = line_starts[j]
+                if line_start > limit or (first is not None and line_start >= first):
+                    break
+                if raw_content.startswith(rest, line_start + len(line)):
+                    first = line_start
+                    break
+            i = group_ends[i]
+        return start if first is None else first - len(head) - 1
+
+    def _build(self) -> None:
+        lines = self.raw_content.split("\n")
+        starts = accumulate((len(line) + 1 for line in lines[:-1]), initial=0)
+        next(starts)
+        grouped: dict[str, list] = {}
+        for previous, line, line_start in zip(lines, lines[1:], starts):
+            grouped.setdefault(line, []).append((previous[::-1], line_start))
+        self._by_line = {}
+        for line, candidates in grouped.items():
+            candidates.sort()
+            reversed_heads = [key for key, _ in candidates]
+            # group_ends[i]: index past the last candidate with the same preceding line
+            group_ends = [0] * len(candidates)
+            end = len(candidates)
+            for i in range(len(candidates) - 1, -1, -1):
+                if i + 1 < len(candidates) and reversed_heads[i] != reversed_heads[i + 1]:
+                    end = i + 1
+                group_ends[i] = end
+            self._by_line[line] = (reversed_heads, [line_start for _, line_start in candidates], group_ends)
+
+
+def _walk_entity(
     raw_content: str,
-    msg: email.message.Message,
+    start: int,
+    end: int,
+    scan_from: int,
+    default_type: str,
+    line_index: _LineIndex,
     replacements: list[dict],
 ) -> None:
-    """Recursively collect replacement info for encoded text/* parts."""
-    if msg.is_multipart():
-        for part in msg.get_payload():
-            _collect_part_replacements(raw_content, part, replacements)
-        return
+    """
+    Visit the MIME entity occupying raw_content[start:end].
 
-    content_type = msg.get_content_type() or ""
-    if not content_type.startswith("text/"):
-        return
+    scan_from is where blank-line scanning for this entity may begin: the
+    delimiter line that opened it (or the start of the document).
+    """
+    msg, body_begin = _parse_entity_headers(raw_content, start, end)
+    msg.set_default_type(default_type)
 
-    cte = _get_cte(msg)
-    if cte not in ("base64", "quoted-printable"):
+    if msg.get_content_maintype() == "multipart":
+        boundary = msg.get_boundary()
+        if not boundary:
+            return
+        child_type = (
+            "message/rfc822" if msg.get_content_subtype() == "digest" else "text/plain"
+        )
+        for delimiter, part_start, part_end in _iter_multipart_parts(
+            raw_content, body_begin, end, boundary
+        ):
+            _walk_entity(
+                raw_content, part_start, part_end, delimiter, child_type, line_index, replacements
+            )
         return
 
-    charset = msg.get_content_charset() or "utf-8"
+    if _is_container(msg):
+        # message/rfc822 and friends: the body is itself a complete message
+        _walk_entity(raw_content, body_begin, end, scan_from, "text/plain", line_index, replacements)
+        return
 
-    # Find this part in the raw content using its encoded payload as anchor
-    payload = msg.get_payload(decode=False)
-    if not payload or not isinstance(payload, str):
+    rep = _build_part_replacement(raw_content, msg, body_begin, end, scan_from, line_index)
+    if rep is None:
         return
 
-    # The encoded payload (as stored by the email parser) should appear in raw_content.
-    # Trim to get a reliable search substring.
-    payload_stripped = payload.strip()
-    if not payload_stripped:
+    if rep.pop("relocated"):
+        # Resolved to earlier content: check it against every replacement
+        # and keep the list sorted by position
+        if any(
+            rep["body_start"] < other["body_end"] and rep["body_end"] > other["body_start"]
+            for other in replacements
+        ):
+            return
+        index = bisect.bisect([other["body_start"] for other in replacements], rep["body_start"])
+        replacements.insert(index, rep)
         return
 
-    # Use first and last lines of payload to create a unique search pattern
-    payload_lines = payload_stripped.split("\n")
-    # Use a chunk from the start for matching (first few lines should be unique enough)
-    search_chunk = "\n".join(payload_lines[:3]).strip()
-    if not search_chunk:
+    # Parts are visited in document order, so only the previous one can overlap
+    if replacements and rep["body_start"] < replacements[-1]["body_end"]:
         return
+    replacements.append(rep)
+
+
+def _parse_entity_headers(
+    raw_content: str, start: int, end: int
+) -> tuple[email.message.Message, int]:
+    """Parse an entity's header block; return (headers, offset of the body)."""
+    if raw_content.startswith("\r\n", start, end):
+        return _HEADER_PARSER.parsestr(""), start + 2
+    if raw_content.startswith("\n", start, end):
+        return _HEADER_PARSER.parsestr(""), start + 1
 
-    # Find where this encoded content starts in raw_content
-    chunk_pos = raw_content.find(search_chunk)
-    if chunk_pos == -1:
-        # Try with \r\n line endings
-        search_chunk_crlf = "\r\n".join(payload_lines[:3]).strip()
-        chunk_pos = raw_content.find(search_chunk_crlf)
-        if chunk_pos == -1:
+    sep_match = _BLANK_LINE_RE.search(raw_content, start, end)
+    header_end = sep_match.start() if sep_match else end
+    body_begin = sep_match.end() if sep_match else end
+    return _HEADER_PARSER.parsestr(raw_content[start:header_end]), body_begin
+
+
+def _iter_multipart_parts(raw_content: str, body_begin: int, end: int, boundary: str):
+    """
+    Yield (delimiter_offset, part_start, part_end) for each body part.
+
+    part_end excludes the line break that belongs to the following delimiter.
+    The preamble and epilogue are skipped; a missing close delimiter lets the
+    last part run to the end of the enclosing entity.
+    """
+    delimiter_re = re.compile(
+        r"^--" + re.escape(boundary) + r"(--)?[ \t]*(?:\r\n|\r|\n|$)", re.MULTILINE
+    )
+    previous = None
+    for match in delimiter_re.finditer(raw_content, body_begin, end):
+        if previous is not None:
+            yield previous.start(), previous.end(), _strip_line_break(raw_content, match.start())
+        if match.group(1):
             return
+        previous = match
+    if previous is not None:
+        yield previous.start(), previous.end(), end
+
+
+def _strip_line_break(raw_content: str, pos: int) -> int:
+    """Offset of the line break ending just before pos (or pos if there is none)."""
+    if raw_content.startswith("\r\n", pos - 2, pos):
+        return pos - 2
+    if raw_content.startswith("\n", pos - 1, pos):
+        return pos - 1
+    return pos
+
+
+def _build_part_replacement(
+    raw_content: str,
+    msg: email.message.Message,
+    body_begin: int,
+    end: int,
+    scan_from: int,
+    line_index: _LineIndex,
+) -> dict | None:
+    """Build replacement info for one leaf part of a multipart message."""
+    content_type = msg.get_content_type() or ""
+    if not content_type.startswith("text/"):
+        return None
+
+    cte = _get_cte(msg)
+    if cte not in ("base64", "quoted-printable"):
+        return None
+
+    charset = msg.get_content_charset() or "utf-8"
+
+    payload = raw_content[body_begin:end]
+    payload_stripped = payload.lstrip()
+    if not payload_stripped.strip():
+        return None
+
+    # The encoded body is delimited by the last blank line before the payload
+    # and the first boundary-like line after its first three lines.
+    chunk_start = body_begin + len(payload) - len(payload_stripped)
+    head_lines = payload_stripped.split("\n", 3)[:3]
+    chunk_end = chunk_start + len("\n".join(head_lines).strip())
+
+    # Annotation offsets were recorded against a normalizer that located each
+    # part by the first occurrence of those lines. A part repeating earlier
+    # content (such as a duplicated text part) resolves to that occurrence,
+    # and is usually dropped as overlapping. Keep that behaviour exactly.
+    first = line_index.find(chunk_start, chunk_end)
+    relocated = first != chunk_start
+    if relocated:
+        chunk_start, chunk_end = first, first + chunk_end - chunk_start
+        scan_from = 0
 
-    # Body start is at chunk_pos (or slightly before if there's leading whitespace)
-    # Search backwards for the blank line separator
-    before_chunk = raw_content[:chunk_pos]
-    # Find the last blank line before the encoded content
     blank_match = None
-    for m in re.finditer(r"\r?\n\r?\n", before_chunk):
+    for m in _BLANK_LINE_RE.finditer(raw_content, scan_from, chunk_start):
         blank_match = m
     if not blank_match:
-        return
+        return None
 
     body_start = blank_match.end()
+    body_end_match = _BOUNDARY_BREAK_RE.search(raw_content, chunk_end)
+    body_end = body_end_match.start() if body_end_match else len(raw_content)
 
-    # Find body end: next MIME boundary or end of content
-    # Look for boundary line after body
-    boundary_pattern = re.compile(r"\r?\n--")
-    body_end_match = boundary_pattern.search(raw_content, chunk_pos + len(search_chunk))
-    if body_end_match:
-        body_end = body_end_match.start()
-    else:
-        body_end = len(raw_content)
-
-    encoded_body = raw_content[body_start:body_end]
-    decoded_text = _decode_payload(encoded_body, cte, charset)
+    decoded_text = _decode_payload(raw_content[body_start:body_end], cte, charset)
     if decoded_text is None:
-        return
+        return None
 
-    # Find the CTE header line in the part headers (between boundary and blank line)
-    header_section = raw_content[before_chunk.rfind("\n--") : body_start] if "\n--" in before_chunk else before_chunk
-    # More precisely: headers are between the last boundary before body_start and body_start
-    cte_pattern = re.compile(
-        r"Content-Transfer-Encoding:\s*" + re.escape(cte.strip()),
-        re.IGNORECASE,
-    )
-    # Search in the region before body_start — take the LAST match
-    # (closest to the body) to avoid hitting a parent multipart container's CTE.
-    header_region_start = max(0, body_start - 500)  # headers shouldn't be more than 500 chars
-    header_region = raw_content[header_region_start:body_start]
+    # Take the CTE header closest to the body to avoid hitting a parent
+    # container's CTE.
     cte_match = None
-    for m in cte_pattern.finditer(header_region):
+    for m in _CTE_HEADER_RES[cte].finditer(
+        raw_content, max(0, body_start - _CTE_HEADER_WINDOW), body_start
+    ):
         cte_match = m
     if not cte_match:
-        return
-
-    cte_abs_start = header_region_start + cte_match.start()
-    cte_abs_end = header_region_start + cte_match.end()
-
-    # Check this replacement doesn't overlap with existing ones
-    for existing in replacements:
-        if (body_start < existing["body_end"] and body_end > existing["body_start"]):
-            return  # overlapping, skip
+        return None
 
-    replacements.append({
+    return {
         "body_start": body_start,
         "body_end": body_end,
         "decoded_text": decoded_text,
-        "cte_start": cte_abs_start,
-        "cte_end": cte_abs_end,
-        "cte_replacement": f"Content-Transfer-Encoding: 8bit",
-    })
+        "cte_start": cte_match.start(),
+        "cte_end": cte_match.end(),
+        "cte_replacement": "Content-Transfer-Encoding: 8bit",
+        "charset": charset,
+        "relocated": relocated,
+    }
 
 
 def _decode_payload(encoded_text: str, cte: str, charset: str) -> str | None:
@@ -232,15 +425,14 @@ def _replace_cte_header(header_text: str, old_cte: str) -> str:
 # Raw → normalized offset mapping
 # ---------------------------------------------------------------------------
 
-
-def _is_hex_char(c: str) -> bool:
-    """Check if a character is a valid hexadecimal digit."""
-    return c in "0123456789ABCDEFabcdef"
+_QP_ESCAPE_RE = re.compile(r"=(?:\n|[0-9A-Fa-f]{2})")
+_BASE64_SKIPPED_RE = re.compile(r"[^A-Za-z0-9+/]+")
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
 
 
 def _build_qp_offset_table(
     raw_stripped_body: str, charset: str = "utf-8"
-) -> list[int]:
+) -> array:
     """
     Build a character-level offset table for QP-encoded body text.
 
@@ -250,76 +442,128 @@ def _build_qp_offset_table(
     Accounts for multi-byte charsets (e.g. UTF-8) where multiple QP hex pairs
     (like =E2=80=A2) decode to a single Unicode character.
 
-    Returns a list of length len(raw_stripped_body) + 1 where
-    table[i] = decoded character position for raw position i.
+    Returns an array of length len(raw_stripped_body) + 1 where
+    table[i] = decoded character position for raw position i. Tables are
+    assembled run by run (literal text, escapes, multi-byte characters)
+    instead of character by character.
     """
     body = raw_stripped_body
-    body_len = len(body)
 
-    # Pass 1: build byte-level table (raw position → decoded byte position)
-    byte_table = [0] * (body_len + 1)
-    i = 0
+    # Pass 1: raw position → decoded byte position. Literal characters decode
+    # to one byte, =XX to one byte and a soft line break to none; positions
+    # inside an escape map to the escape's byte.
+    byte_table = array("q")
+    pos = 0
     byte_pos = 0
-
-    while i < body_len:
-        byte_table[i] = byte_pos
-
-        if body[i] == "=":
-            if i + 1 < body_len and body[i + 1] == "\n":
-                # Soft line break → 0 decoded bytes
-                byte_table[i + 1] = byte_pos
-                i += 2
-            elif (
-                i + 2 < body_len
-                and _is_hex_char(body[i + 1])
-                and _is_hex_char(body[i + 2])
-            ):
-                # Hex pair =XX → 1 decoded byte
-                byte_table[i + 1] = byte_pos
-                byte_table[i + 2] = byte_pos
-                i += 3
-                byte_pos += 1
-            else:
-                # Malformed or trailing =, treat as literal byte
-                i += 1
-                byte_pos += 1
-        else:
-            # Regular ASCII character → 1 decoded byte
-            i += 1
+    for m in _QP_ESCAPE_RE.finditer(body):
+        start, end = m.span()
+        byte_table.extend(range(byte_pos, byte_pos + start - pos))
+        byte_pos += start - pos
+        byte_table.extend([byte_pos] * (end - start))
+        if end - start == 3:
             byte_pos += 1
+        pos = end
+    byte_table.extend(range(byte_pos, byte_pos + len(body) - pos + 1))
 
-    byte_table[body_len] = byte_pos
-
-    # Pass 2: decode bytes and build byte→char mapping
+    # Pass 2: decoded byte position → character position
     decoded_bytes = quopri.decodestring(body.encode("ascii", errors="replace"))
     decoded_str = decoded_bytes.decode(charset, errors="replace")
+    byte_to_char = _byte_to_char_table(decoded_str, charset, len(decoded_bytes))
+
+    # Pass 3: compose
+    return _compose_offset_tables(byte_table, byte_to_char, len(decoded_bytes))
+
+
+def _build_base64_offset_table(
+    raw_stripped_body: str, charset: str = "utf-8"
+) -> array:
+    """
+    Build a character-level offset table for base64-encoded body text.
+
+    Maps each position in the raw (base64, \\r-stripped) body to the
+    corresponding position in the decoded body string with \\r removed.
+    Line breaks and other non-alphabet characters carry no data; every four
+    alphabet characters decode to three bytes, and multi-byte characters are
+    resolved the same way as for QP.
+
+    Returns an array of length len(raw_stripped_body) + 1.
+    """
+    body = raw_stripped_body
+
+    # Pass 1: raw position → number of alphabet characters before it
+    sextets = array("q")
+    pos = 0
+    count = 0
+    for m in _BASE64_SKIPPED_RE.finditer(body):
+        start, end = m.span()
+        sextets.extend(range(count, count + start - pos))
+        count += start - pos
+        sextets.extend([count] * (end - start))
+        pos = end
+    sextets.extend(range(count, count + len(body) - pos + 1))
+
+    # ... → decoded byte position: the byte the character's bits start in
+    byte_table = array("q", map(floordiv, map(mul, sextets, repeat(3)), repeat(4)))
+
+    # Pass 2: decoded byte position → character position
+    decoded_bytes = base64.b64decode(body.strip())
+    decoded_str = decoded_bytes.decode(charset, errors="replace")
+    byte_to_char = _byte_to_char_table(decoded_str, charset, len(decoded_bytes))
+
+    # Pass 3: compose, then drop the \r characters the normalized text omits
+    table = _compose_offset_tables(byte_table, byte_to_char, len(decoded_bytes))
+    if "\r" in decoded_str:
+        char_to_stripped = array("q")
+        prev = 0
+        for removed, m in enumerate(re.finditer("\r", decoded_str)):
+            idx = m.start()
+            char_to_stripped.extend(range(prev - removed, idx - removed + 1))
+            prev = idx + 1
+        removed = decoded_str.count("\r")
+        char_to_stripped.extend(range(prev - removed, len(decoded_str) - removed + 1))
+        table = array("q", map(char_to_stripped.__getitem__, table))
+    return table
 
-    byte_to_char = [0] * (len(decoded_bytes) + 1)
-    char_idx = 0
-    bp = 0
-    for ch in decoded_str:
-        ch_byte_len = len(ch.encode(charset, errors="replace"))
-        for _ in range(ch_byte_len):
-            if bp < len(byte_to_char):
-                byte_to_char[bp] = char_idx
-            bp += 1
-        char_idx += 1
-    # Fill end sentinel
-    while bp <= len(decoded_bytes):
-        if bp < len(byte_to_char):
-            byte_to_char[bp] = char_idx
-        bp += 1
-
-    # Pass 3: compose byte_table with byte_to_char
-    table = [0] * (body_len + 1)
-    for i in range(body_len + 1):
-        b = min(byte_table[i], len(decoded_bytes))
-        table[i] = byte_to_char[b] if b < len(byte_to_char) else char_idx
 
+def _compose_offset_tables(byte_table: array, byte_to_char: array, byte_len: int) -> array:
+    """
+    byte_to_char[min(b, byte_len)] for every b in byte_table. byte_table is
+    non-decreasing, so entries past byte_len form a suffix mapping to the end.
+    """
+    cut = bisect.bisect_right(byte_table, byte_len)
+    table = array("q", map(byte_to_char.__getitem__, byte_table[:cut]))
+    table.extend([byte_to_char[byte_len]] * (len(byte_table) - cut))
     return table
 
 
-def _to_stripped_offset(pos: int, cr_positions: list[int]) -> int:
+def _byte_to_char_table(decoded_str: str, charset: str, byte_len: int) -> array:
+    """
+    Map each byte offset in [0, byte_len] to the index of the character that
+    covers it, measuring characters by their encoded length in charset.
+    Offsets past the encoded text map to len(decoded_str).
+    """
+    table = array("q")
+    if "a".encode(charset, errors="replace") == b"a":
+        # ASCII runs are one byte per character; only measure the rest
+        prev = 0
+        for m in _NON_ASCII_RE.finditer(decoded_str):
+            idx = m.start()
+            table.extend(range(prev, idx))
+            table.extend([idx] * len(m.group().encode(charset, errors="replace")))
+            prev = idx + 1
+        table.extend(range(prev, len(decoded_str)))
+    else:
+        for idx, ch in enumerate(decoded_str):
+            table.extend([idx] * len(ch.encode(charset, errors="replace")))
+
+    if len(table) > byte_len + 1:
+        del table[byte_len + 1 :]
+    else:
+        table.extend([len(decoded_str)] * (byte_len + 1 - len(table)))
+    return table
+
+
+def _to_stripped_offset(pos: int, cr_positions: array) -> int:
     """Convert a position in the original string to the \\r-stripped position."""
     count = bisect.bisect_left(cr_positions, pos)
     return pos - count
@@ -368,163 +612,228 @@ def _build_single_part_replacement(
         "cte_start": cte_match.start(),
         "cte_end": cte_match.end(),
         "cte_replacement": "Content-Transfer-Encoding: 8bit",
+        "charset": charset,
     }
 
 
+class OffsetMap:
+    """
+    Compiled raw-stripped → normalized-stripped offset mapping.
+
+    The raw offset space is split into segments held in sorted arrays, so a
+    lookup is one binary search:
+
+    - SHIFT: text outside replacements, moved by the size change so far
+    - SNAP: a rewritten CTE header; every offset maps to its start
+    - TABLE: a decoded body, looked up in that body's offset table
+
+    Instances are callable on a single offset; `map_many` maps a whole
+    sequence of offsets in one merged pass over the segments.
+    """
+
+    SHIFT, SNAP, TABLE = 0, 1, 2
+
+    def __init__(self):
+        self._starts = array("q", [0])
+        self._kinds = array("b", [self.SHIFT])
+        self._values = array("q", [0])
+        self._table_offsets = array("q", [0])
+        self._tables = array("q")
+
+    def _add(self, start: int, kind: int, value: int, table_offset: int = 0) -> None:
+        if start == self._starts[-1]:
+            # An empty preceding segment: take over its slot
+            self._kinds[-1] = kind
+            self._values[-1] = value
+            self._table_offsets[-1] = table_offset
+            return
+        self._starts.append(start)
+        self._kinds.append(kind)
+        self._values.append(value)
+        self._table_offsets.append(table_offset)
+
+    def add_shift(self, start: int, delta: int) -> None:
+        """From start on, offset x maps to x - delta."""
+        self._add(start, self.SHIFT, delta)
+
+    def add_snap(self, start: int, target: int) -> None:
+        """From start on, every offset maps to target."""
+        self._add(start, self.SNAP, target)
+
+    def add_table(self, start: int, origin: int, base: int, table) -> None:
+        """From start on, offset x maps to base + table[x - origin]."""
+        self._add(start, self.TABLE, base, len(self._tables) - origin)
+        self._tables.extend(table)
+
+    def __call__(self, offset: int) -> int:
+        return self._map_in(bisect.bisect_right(self._starts, offset) - 1, offset)
+
+    def map_many(self, offsets) -> list[int]:
+        """
+        Map a sequence of raw-stripped offsets, preserving order.
+
+        The offsets are visited in sorted order and the segments walked once
+        alongside them, instead of a binary search per offset.
+        """
+        offsets = list(offsets)
+        result = [0] * len(offsets)
+        starts = self._starts
+        last = len(starts) - 1
+        i = -1
+        for index in sorted(range(len(offsets)), key=offsets.__getitem__):
+            offset = offsets[index]
+            while i < last and starts[i + 1] <= offset:
+                i += 1
+            result[index] = self._map_in(i, offset)
+        return result
+
+    def _map_in(self, i: int, offset: int) -> int:
+        """Map offset through segment i (-1: before the first segment)."""
+        if i < 0:
+            return offset
+        kind = self._kinds[i]
+        if kind == self.SHIFT:
+            return offset - self._values[i]
+        if kind == self.SNAP:
+            return self._values[i]
+        return self._values[i] + self._tables[self._table_offsets[i] + offset]
+
+
 def build_raw_to_normalized_offset_map(
     raw_content: str,
-) -> tuple[str, Callable[[int], int]]:
+) -> tuple[str, OffsetMap]:
     """
-    Build a mapping function from raw-stripped offsets to normalized-stripped offsets.
+    Build a mapping from raw-stripped offsets to normalized-stripped offsets.
 
-    Returns (norm_stripped, map_fn) where:
+    Returns (norm_stripped, offset_map) where:
     - norm_stripped is normalize_eml(raw_content)[0] with \\r removed
-    - map_fn(raw_stripped_offset) -> norm_stripped_offset
+    - offset_map(raw_stripped_offset) -> norm_stripped_offset, and
+      offset_map.map_many(offsets) maps many offsets in one call
     """
     normalized, has_encoded = normalize_eml(raw_content)
     norm_stripped = normalized.replace("\r", "")
+    offset_map = OffsetMap()
 
     if not has_encoded:
-        return norm_stripped, lambda offset: offset
+        return norm_stripped, offset_map
 
     # Collect replacement segments
-    msg = email.message_from_string(raw_content)
+    msg = _HEADER_PARSER.parsestr(raw_content, headersonly=True)
     replacements: list[dict] = []
 
-    if msg.is_multipart():
-        _collect_part_replacements(raw_content, msg, replacements)
+    if _is_container(msg):
+        replacements = _collect_multipart_replacements(raw_content)
     else:
         # Handle single-part messages directly (like _normalize_single_part)
-        # _collect_part_replacements uses a 500-char header search window that
-        # can be too small for emails with many headers.
+        # because the multipart lookup uses a 500-char header search window
+        # that can be too small for emails with many headers.
         rep = _build_single_part_replacement(raw_content, msg)
         if rep is not None:
             replacements.append(rep)
 
-    if not replacements:
-        return norm_stripped, lambda offset: offset
+    if replacements:
+        _compile_offset_map(offset_map, raw_content, replacements)
+    return norm_stripped, offset_map
 
+
+def _compile_offset_map(
+    offset_map: OffsetMap, raw_content: str, replacements: list[dict]
+) -> None:
+    """
+    Lay out SHIFT/SNAP/TABLE segments for the replacements.
+
+    Events (CTE header rewrites and body decodes) are visited in raw order.
+    An offset belongs to the first event that claims it, so each event only
+    covers offsets not already claimed by an earlier one; `covered` tracks
+    that frontier and `delta` the accumulated size change.
+    """
     raw_stripped = raw_content.replace("\r", "")
 
     # Precompute \r positions for coordinate conversion
-    cr_positions = [i for i, c in enumerate(raw_content) if c == "\r"]
+    cr_positions = array("q", (m.start() for m in re.finditer("\r", raw_content)))
 
-    # Sort by body_start ascending
-    replacements.sort(key=lambda r: r["body_start"])
+    def stripped(pos):
+        return _to_stripped_offset(pos, cr_positions)
 
-    # Build event list (CTE header change, body change) sorted by position
     events = []
     for rep in replacements:
-        rs_cte_start = _to_stripped_offset(rep["cte_start"], cr_positions)
-        rs_cte_end = _to_stripped_offset(rep["cte_end"], cr_positions)
-        rs_body_start = _to_stripped_offset(rep["body_start"], cr_positions)
-        rs_body_end = _to_stripped_offset(rep["body_end"], cr_positions)
-
-        decoded_stripped = rep["decoded_text"].replace("\r", "")
-
-        # Detect CTE type from raw content
-        cte_text = raw_content[rep["cte_start"] : rep["cte_end"]].lower()
-        is_qp = "quoted-printable" in cte_text
-
-        # Build QP offset table for QP parts.
-        # _decode_payload strips leading/trailing whitespace before decoding,
-        # so the QP table must be built on the stripped content only.
-        qp_map = None
-        content_start_in_body = 0
-        content_end_in_body = rs_body_end - rs_body_start
-        if is_qp:
-            raw_body = raw_stripped[rs_body_start:rs_body_end]
-            content_start_in_body = len(raw_body) - len(raw_body.lstrip())
-            raw_body_content = raw_body.strip()
-            content_end_in_body = content_start_in_body + len(raw_body_content)
-            # Detect charset from Content-Type header near CTE header
-            ct_region = raw_content[
-                max(0, rep["cte_start"] - 300) : rep["cte_start"] + 300
-            ]
-            ct_match = re.search(
-                r"charset=[\"']?([^\"';\s]+)", ct_region, re.IGNORECASE
-            )
-            charset = ct_match.group(1) if ct_match else "utf-8"
-            qp_map = _build_qp_offset_table(raw_body_content, charset)
-
-        events.append(
-            {
-                "type": "cte",
-                "start": rs_cte_start,
-                "end": rs_cte_end,
-                "replacement_len": len(rep["cte_replacement"]),
-            }
-        )
-        events.append(
-            {
-                "type": "body",
-                "start": rs_body_start,
-                "end": rs_body_end,
-                "decoded_stripped_len": len(decoded_stripped),
-                "qp_map": qp_map,
-                "content_start": content_start_in_body,
-                "content_end": content_end_in_body,
-            }
+        events.append(("cte", stripped(rep["cte_start"]), stripped(rep["cte_end"]), rep))
+        events.append(("body", stripped(rep["body_start"]), stripped(rep["body_end"]), rep))
+    events.sort(key=lambda e: e[1])
+
+    covered = 0
+    delta = 0
+    for kind, start, end, rep in events:
+        if start > covered:
+            offset_map.add_shift(covered, delta)
+            covered = start
+
+        if kind == "cte":
+            if end > covered:
+                # Inside CTE header — snap to start in normalized
+                offset_map.add_snap(covered, start - delta)
+                covered = end
+            delta += (end - start) - len(rep["cte_replacement"])
+            continue
+
+        decoded_len = len(rep["decoded_text"].replace("\r", ""))
+        if end + 1 > covered:
+            table = _body_offset_table(raw_content, raw_stripped, rep, start, end, decoded_len)
+            offset_map.add_table(covered, start, start - delta, table)
+            covered = end + 1
+        delta += (end - start) - decoded_len
+
+    offset_map.add_shift(covered, delta)
+
+
+def _body_offset_table(
+    raw_content: str,
+    raw_stripped: str,
+    rep: dict,
+    start: int,
+    end: int,
+    decoded_len: int,
+) -> array:
+    """
+    Offsets within a decoded body for each raw-stripped body offset in
+    [start, end], clamped to decoded_len.
+    """
+    body_len = end - start
+    raw_body = raw_stripped[start:end]
+
+    # Detect CTE type from raw content
+    cte_text = raw_content[rep["cte_start"] : rep["cte_end"]].lower()
+    if "quoted-printable" not in cte_text:
+        return _clamp_offset_table(
+            _build_base64_offset_table(raw_body, rep["charset"]), decoded_len
         )
 
-    events.sort(key=lambda e: e["start"])
-
-    def map_fn(raw_offset: int) -> int:
-        cumulative_delta = 0
-        for event in events:
-            if raw_offset < event["start"]:
-                return raw_offset - cumulative_delta
-
-            if event["type"] == "cte":
-                if raw_offset < event["end"]:
-                    # Inside CTE header — snap to start in normalized
-                    return event["start"] - cumulative_delta
-                cte_delta = (
-                    (event["end"] - event["start"]) - event["replacement_len"]
-                )
-                cumulative_delta += cte_delta
-
-            elif event["type"] == "body":
-                if raw_offset <= event["end"]:
-                    ns_body_start = event["start"] - cumulative_delta
-                    local_offset = raw_offset - event["start"]
-
-                    if event["qp_map"] is not None:
-                        cs = event["content_start"]
-                        ce = event["content_end"]
-                        if local_offset < cs:
-                            decoded_local = 0
-                        elif local_offset >= ce:
-                            decoded_local = event["decoded_stripped_len"]
-                        else:
-                            qp_local = min(
-                                local_offset - cs,
-                                len(event["qp_map"]) - 1,
-                            )
-                            decoded_local = min(
-                                event["qp_map"][qp_local],
-                                event["decoded_stripped_len"],
-                            )
-                    else:
-                        # Base64: proportional mapping
-                        body_len = event["end"] - event["start"]
-                        ratio = local_offset / max(1, body_len)
-                        decoded_local = min(
-                            int(ratio * event["decoded_stripped_len"]),
-                            event["decoded_stripped_len"],
-                        )
-
-                    return ns_body_start + decoded_local
-
-                body_delta = (
-                    (event["end"] - event["start"])
-                    - event["decoded_stripped_len"]
-                )
-                cumulative_delta += body_delta
-
-        return raw_offset - cumulative_delta
-
-    return norm_stripped, map_fn
+    # _decode_payload strips leading/trailing whitespace before decoding,
+    # so the QP table must be built on the stripped content only.
+    content_start = len(raw_body) - len(raw_body.lstrip())
+    raw_body_content = raw_body.strip()
+    content_end = content_start + len(raw_body_content)
+
+    # Detect charset from Content-Type header near CTE header
+    ct_region = raw_content[max(0, rep["cte_start"] - 300) : rep["cte_start"] + 300]
+    ct_match = re.search(r"charset=[\"']?([^\"';\s]+)", ct_region, re.IGNORECASE)
+    charset = ct_match.group(1) if ct_match else "utf-8"
+    qp_map = _build_qp_offset_table(raw_body_content, charset)
+
+    table = array("q", bytes(8 * content_start))
+    table.extend(qp_map[: content_end - content_start])
+    table.extend([decoded_len] * (body_len + 1 - len(table)))
+    return _clamp_offset_table(table, decoded_len)
+
+
+def _clamp_offset_table(table: array, limit: int) -> array:
+    """Clamp a non-decreasing offset table to limit."""
+    cut = bisect.bisect_right(table, limit)
+    size = len(table)
+    if cut < size:
+        del table[cut:]
+        table.extend([limit] * (size - cut))
+    return table
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,105 @@
+"""
+HTTP helpers for immutable representations: validators, 304 handling and
+negotiated response compression (gzip, or brotli when the optional `brotli`
+package is installed).
+"""
+
+import gzip
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+
+def negotiate_encoding(request) -> str | None:
+    """Pick the best supported content-coding from Accept-Encoding, or None."""
+    accepted = {}
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+
+    def acceptable(coding):
+        return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and acceptable("br"):
+        return "br"
+    if acceptable("gzip"):
+        return "gzip"
+    return None
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+class EncodedResponse(Response):
+    """
+    DRF Response whose rendered body is compressed with `encoding` (as
+    returned by negotiate_encoding), so content negotiation, renderers and
+    the exception handler work as for any other API response.
+    """
+
+    def __init__(self, data=None, encoding=None, **kwargs):
+        super().__init__(data, **kwargs)
+        self.encoding = encoding
+
+    @property
+    def rendered_content(self):
+        body = super().rendered_content
+        if self.encoding and len(body) >= MIN_COMPRESS_SIZE:
+            body = compress_body(body, self.encoding)
+            self["Content-Encoding"] = self.encoding
+        return body
+
+
+def conditional_content_response(request, etag, last_modified, get_data):
+    """
+    Serve an immutable representation with strong validators.
+
+    `etag` is a quoted strong entity tag identifying the uncompressed JSON
+    representation; the accepted renderer (when not JSON) and the negotiated
+    content-coding are appended to it so each variant has its own
+    validator. Matching If-None-Match or If-Modified-Since requests get a
+    304 without calling `get_data`, which otherwise returns the response
+    data and may raise API exceptions.
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    if renderer is not None and renderer.format != "json":
+        etag = f'{etag[:-1]}-{renderer.format}"'
+    encoding = negotiate_encoding(request)
+    if encoding:
+        etag = f'{etag[:-1]}-{encoding}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified.timestamp()),
+        # Revalidate every time: access depends on the current assignment.
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept, Accept-Encoding",
+    }
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp())
+    )
+    if not_modified is not None:
+        return Response(status=not_modified.status_code, headers=headers)
+
+    return EncodedResponse(get_data(), encoding=encoding, headers=headers)
@@ -0,0 +1,187 @@
+"""
+Keyset (cursor) pagination.
+
+OFFSET pagination reads and discards every row before the requested page,
+so deep pages get slower linearly. KeysetPagination instead orders by a
+sort key ending in a unique column (e.g. `-created_at`, `-id`) and asks for
+the rows after (or before) the boundary row of the previous page, which a
+matching composite index answers in constant time at any depth.
+
+Requests take `cursor` (an opaque token from a previous response, or
+`last` for the final page) and `page_size`. Responses carry
+`next_cursor`, `previous_cursor` and `last_cursor` (null when there is no
+such page) alongside `count` and `results`.
+
+Querysets filtered by core.search are ordered by `search_rank` first,
+best match first, then by the usual sort key.
+
+The total comes from COUNT(*), which can be cached for
+PAGINATION_COUNT_CACHE_SECONDS. On PostgreSQL, results whose planner
+estimate exceeds PAGINATION_APPROX_COUNT_THRESHOLD report that estimate
+instead, with `count_is_approximate` set.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+from .search import SEARCH_RANK
+
+LAST_PAGE = "last"
+
+_NEXT = "n"
+_PREVIOUS = "p"
+
+
+class KeysetPagination(BasePagination):
+    # Sort key; the last field must be unique
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if SEARCH_RANK in queryset.query.annotations:
+            self.ordering = (f"-{SEARCH_RANK}", *self.ordering)
+        self.page_size = self.get_page_size(request)
+        direction, boundary = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        self.count, self.count_is_approximate = self.get_count(queryset)
+
+        ordering = self.ordering
+        if direction in (_PREVIOUS, LAST_PAGE):
+            # Walk backwards from the boundary (or the end), then restore order
+            ordering = [_reverse(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if boundary is not None:
+            queryset = queryset.filter(_after(ordering, boundary))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if direction in (_PREVIOUS, LAST_PAGE):
+            rows.reverse()
+            self.has_next = direction == _PREVIOUS
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = direction == _NEXT
+
+        self.rows = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data) -> dict:
+        first, last = (self.rows[0], self.rows[-1]) if self.rows else (None, None)
+        return {
+            "count": self.count,
+            "count_is_approximate": self.count_is_approximate,
+            "next_cursor": self.encode_cursor(_NEXT, last) if self.has_next else None,
+            "previous_cursor": self.encode_cursor(_PREVIOUS, first) if self.has_previous else None,
+            "last_cursor": LAST_PAGE if self.has_next else None,
+            "results": data,
+        }
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_count(self, queryset) -> tuple[int, bool]:
+        timeout = settings.PAGINATION_COUNT_CACHE_SECONDS
+        key = None
+        if timeout:
+            sql, params = queryset.order_by().query.sql_with_params()
+            key = "keyset-count:" + hashlib.sha256(f"{sql}|{params!r}".encode()).hexdigest()
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        result = estimated_count(queryset, settings.PAGINATION_APPROX_COUNT_THRESHOLD)
+        if key is not None:
+            cache.set(key, result, timeout)
+        return result
+
+    def encode_cursor(self, direction, row) -> str:
+        values = [_field_value(row, _field_name(field)) for field in self.ordering]
+        payload = json.dumps([direction, values], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, token):
+        """Return (direction, boundary row values) for a cursor token."""
+        if not token:
+            return None, None
+        if token == LAST_PAGE:
+            return LAST_PAGE, None
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded))
+            if direction not in (_NEXT, _PREVIOUS) or len(values) != len(self.ordering):
+                raise ValueError
+        except (ValueError, TypeError, binascii.Error):
+            raise NotFound("Invalid cursor.")
+        return direction, dict(zip((_field_name(field) for field in self.ordering), values))
+
+
+def estimated_count(queryset, threshold=0) -> tuple[int, bool]:
+    """
+    Return (count, is_approximate). With a threshold on PostgreSQL, the
+    planner's row estimate is used when it exceeds the threshold; otherwise
+    the rows are counted.
+    """
+    connection = connections[queryset.db]
+    if threshold and connection.vendor == "postgresql":
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate >= threshold:
+            return estimate, True
+    return queryset.count(), False
+
+
+def _after(ordering, boundary):
+    """Rows strictly after `boundary` in `ordering`: (a, b) > (x, y) spelled out per column."""
+    condition = Q()
+    equal = Q()
+    for field in ordering:
+        name = _field_name(field)
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= equal & Q(**{f"{name}__{lookup}": boundary[name]})
+        equal &= Q(**{name: boundary[name]})
+    # Redundant, but gives the planner an index range on the leading column
+    # instead of a filter over every row before the boundary
+    first = _field_name(ordering[0])
+    lookup = "lte" if ordering[0].startswith("-") else "gte"
+    return Q(**{f"{first}__{lookup}": boundary[first]}) & condition
+
+
+def _field_name(field) -> str:
+    return field.lstrip("-")
+
+
+def _reverse(field) -> str:
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def _field_value(row, name):
+    value = getattr(row, name)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value if isinstance(value, (int, float, str)) or value is None else str(value)
@@ -0,0 +1,78 @@
+"""
+Ranked substring search for list endpoints.
+
+`search_filter(queryset, term, fields)` keeps the rows where any of `fields`
+contains `term` case-insensitively (exactly what `icontains` matches),
+annotates each with a `search_rank` between 0 and 1 and keeps only the
+SEARCH_MATCH_LIMIT best matches. KeysetPagination orders searched
+querysets by that rank first.
+
+On PostgreSQL the `icontains` filters are answered from pg_trgm GIN indexes
+on UPPER(column), the expression Django compiles `icontains` to, and the
+rank is trigram word similarity. Other databases (SQLite in tests) scan
+the table and rank by the share of the value the term covers.
+"""
+
+import operator
+from functools import reduce
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, F, FloatField, Func, Q, Value, When
+from django.db.models.functions import Greatest, Length
+
+SEARCH_RANK = "search_rank"
+
+
+class WordSimilarity(Func):
+    """pg_trgm word_similarity(term, expression); avoids importing django.contrib.postgres."""
+
+    function = "word_similarity"
+    output_field = FloatField()
+
+
+def search_filter(queryset, term, fields, limit=None):
+    """
+    Filter `queryset` to rows where any of `fields` contains `term`, ranked
+    as `search_rank`. A field may follow one foreign key ("dataset__name").
+
+    The best `limit` matches are taken from `queryset` as given, so apply
+    the view's other filters before searching.
+    """
+    limit = settings.SEARCH_MATCH_LIMIT if limit is None else limit
+    condition = reduce(operator.or_, (_condition(queryset.model, term, field) for field in fields))
+    rank = search_rank(queryset.db, term, fields)
+
+    matches = queryset.filter(condition)
+    if limit:
+        best = matches.annotate(**{SEARCH_RANK: rank}).order_by(f"-{SEARCH_RANK}", "-pk").values("pk")[:limit]
+        matches = queryset.filter(pk__in=best)
+    return matches.annotate(**{SEARCH_RANK: rank})
+
+
+def search_rank(using, term, fields):
+    """Expression ranking how well the best of `fields` matches `term`."""
+    if connections[using].vendor == "postgresql":
+        ranks = [WordSimilarity(Value(term), F(field)) for field in fields]
+    else:
+        # Fraction of the value the term covers: 1 for an exact match
+        ranks = [
+            Case(
+                When(**{f"{field}__icontains": term}, then=Value(float(len(term))) / Length(field)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+            for field in fields
+        ]
+    return ranks[0] if len(ranks) == 1 else Greatest(*ranks)
+
+
+def _condition(model, term, field):
+    relation, _, related_field = field.partition("__")
+    if not related_field:
+        return Q(**{f"{field}__icontains": term})
+    # A join inside an OR cannot use either table's index; match the related
+    # rows in a subquery so the filter becomes a lookup on the foreign key
+    related_model = model._meta.get_field(relation).related_model
+    related_ids = related_model.objects.filter(**{f"{related_field}__icontains": term}).values("pk")
+    return Q(**{f"{relation}__in": related_ids})
@@ -1,3 +1,474 @@
-from django.test import TestCase
+import base64
+import copy
+import email
+import quopri
+import random
+import re
+import time
+import zipfile
+from email.mime.message import MIMEMessage
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from core import eml_normalizer
+from core.eml_normalizer import build_raw_to_normalized_offset_map, normalize_eml
+from core.search import search_filter
+from datasets.models import Dataset, Job
+
+REPO_ROOT = Path(settings.BASE_DIR).parent
+SAMPLE_ARCHIVES = [
+    REPO_ROOT / "docs" / "emails" / "test-upload.zip",
+    REPO_ROOT / "frontend" / "e2e" / "fixtures" / "sample-emails.zip",
+    REPO_ROOT / "frontend" / "e2e" / "fixtures" / "duplicate-emails.zip",
+]
+
+
+def _reference_normalize(raw_content):
+    """
+    The original find()-anchored normalizer, kept verbatim as the golden
+    reference for the single-pass implementation.
+    """
+    msg = email.message_from_string(raw_content)
+    if not msg.is_multipart():
+        return eml_normalizer._normalize_single_part(raw_content, msg)
+
+    replacements = []
+    _reference_collect(raw_content, msg, replacements)
+    if not replacements:
+        return raw_content, False
+
+    replacements.sort(key=lambda r: r["body_start"], reverse=True)
+    result = raw_content
+    for rep in replacements:
+        result = result[: rep["body_start"]] + rep["decoded_text"] + result[rep["body_end"] :]
+        result = result[: rep["cte_start"]] + rep["cte_replacement"] + result[rep["cte_end"] :]
+    return result, True
+
+
+def _reference_collect(raw_content, msg, replacements):
+    if msg.is_multipart():
+        for part in msg.get_payload():
+            _reference_collect(raw_content, part, replacements)
+        return
+
+    if not (msg.get_content_type() or "").startswith("text/"):
+        return
+    cte = eml_normalizer._get_cte(msg)
+    if cte not in ("base64", "quoted-printable"):
+        return
+    charset = msg.get_content_charset() or "utf-8"
+
+    payload = msg.get_payload(decode=False)
+    if not payload or not isinstance(payload, str):
+        return
+    payload_stripped = payload.strip()
+    if not payload_stripped:
+        return
+    payload_lines = payload_stripped.split("\n")
+    search_chunk = "\n".join(payload_lines[:3]).strip()
+    if not search_chunk:
+        return
+    chunk_pos = raw_content.find(search_chunk)
+    if chunk_pos == -1:
+        return
+
+    blank_match = None
+    for m in re.finditer(r"\r?\n\r?\n", raw_content[:chunk_pos]):
+        blank_match = m
+    if not blank_match:
+        return
+    body_start = blank_match.end()
+
+    body_end_match = re.compile(r"\r?\n--").search(raw_content, chunk_pos + len(search_chunk))
+    body_end = body_end_match.start() if body_end_match else len(raw_content)
+
+    decoded_text = eml_normalizer._decode_payload(raw_content[body_start:body_end], cte, charset)
+    if decoded_text is None:
+        return
+
+    cte_pattern = re.compile(r"Content-Transfer-Encoding:\s*" + re.escape(cte), re.IGNORECASE)
+    header_region_start = max(0, body_start - 500)
+    cte_match = None
+    for m in cte_pattern.finditer(raw_content[header_region_start:body_start]):
+        cte_match = m
+    if not cte_match:
+        return
+
+    for existing in replacements:
+        if body_start < existing["body_end"] and body_end > existing["body_start"]:
+            return
+
+    replacements.append({
+        "body_start": body_start,
+        "body_end": body_end,
+        "decoded_text": decoded_text,
+        "cte_start": header_region_start + cte_match.start(),
+        "cte_end": header_region_start + cte_match.end(),
+        "cte_replacement": "Content-Transfer-Encoding: 8bit",
+    })
+
+
+def _interleaved(raw_content):
+    """Whether a replacement's CTE header lies inside an earlier replacement's body."""
+    reps = eml_normalizer._collect_multipart_replacements(raw_content)
+    return any(b["cte_start"] < a["body_end"] for a, b in zip(reps, reps[1:]))
+
+
+def _sample_emails():
+    for archive in SAMPLE_ARCHIVES:
+        if not archive.is_file():
+            continue
+        with zipfile.ZipFile(archive) as zf:
+            for name in zf.namelist():
+                if name.lower().endswith(".eml"):
+                    yield f"{archive.name}:{name}", zf.read(name).decode("utf-8", "replace")
+
+
+class _SyntheticCorpus:
+    """Seeded generator of nested multipart messages with encoded text parts."""
+
+    WORDS = ["hello", "Grüße", "naïve", "call", "555-0100", "-- ", "=", "résumé", "€", "\n", "--x"]
+    CHARSETS = ["utf-8", "iso-8859-1", "us-ascii"]
+    ENCODINGS = ["base64", "quoted-printable", "8bit", "7bit"]
+
+    def __init__(self, seed):
+        self.rnd = random.Random(seed)
+        self.parts = []
+
+    def text_part(self):
+        rnd = self.rnd
+        roll = rnd.random()
+        if self.parts and roll < 0.1:
+            # Forwarded and templated mail repeats whole parts
+            return copy.deepcopy(rnd.choice(self.parts))
+        charset = rnd.choice(self.CHARSETS)
+        if roll < 0.15:
+            # Short bodies whose text also occurs elsewhere in the message
+            text = rnd.choice(["hello", "call 555-0100", "Thanks!", "--x"])
+        else:
+            text = f"part {rnd.random()} " + "".join(
+                rnd.choice(self.WORDS) + rnd.choice([" ", "", "\n"])
+                for _ in range(rnd.randint(0, 150))
+            )
+        data = text.encode(charset, errors="replace")
+        part = MIMEText(data.decode(charset), rnd.choice(["plain", "html"]), charset)
+        cte = rnd.choice(self.ENCODINGS)
+        del part["Content-Transfer-Encoding"]
+        if cte == "base64":
+            part.set_payload(base64.encodebytes(data).decode("ascii"))
+        elif cte == "quoted-printable":
+            part.set_payload(quopri.encodestring(data).decode("ascii"))
+        part["Content-Transfer-Encoding"] = cte
+        self.parts.append(part)
+        return part
+
+    def multipart(self, depth=0):
+        rnd = self.rnd
+        msg = MIMEMultipart(rnd.choice(["alternative", "mixed", "related"]))
+        for _ in range(rnd.randint(1, 5)):
+            roll = rnd.random()
+            if roll < 0.15 and depth < 3:
+                msg.attach(self.multipart(depth + 1))
+            elif roll < 0.22 and depth < 3:
+                inner = self.multipart(depth + 1) if rnd.random() < 0.5 else self.text_part()
+                inner["Subject"] = "Fwd"
+                msg.attach(MIMEMessage(inner))
+            else:
+                msg.attach(self.text_part())
+        return msg
+
+    def messages(self, count):
+        for i in range(count):
+            msg = self.multipart()
+            msg["From"] = "alice@example.com"
+            msg["Subject"] = f"Message {i}"
+            raw = msg.as_string()
+            if self.rnd.random() < 0.5:
+                raw = raw.replace("\n", "\r\n")
+            yield f"synthetic-{i}", raw
+
+
+def _newsletter(part_count):
+    msg = MIMEMultipart("mixed")
+    msg["Subject"] = "Newsletter"
+    for i in range(part_count):
+        msg.attach(MIMEText(f"Section {i}: " + "lorem ipsum " * 30, "html", "utf-8"))
+    return msg.as_string()
+
+
+class NormalizeEmlGoldenTests(SimpleTestCase):
+    """normalize_eml must reproduce the reference normalizer byte for byte."""
+
+    def corpus(self):
+        yield from _sample_emails()
+        yield from _SyntheticCorpus(seed=8).messages(400)
+
+    def test_matches_reference(self):
+        for name, raw in self.corpus():
+            with self.subTest(email=name):
+                self.assertEqual(normalize_eml(raw), _reference_normalize(raw))
+
+    def test_offset_map_reaches_normalized_text(self):
+        for name, raw in self.corpus():
+            with self.subTest(email=name):
+                norm_stripped, offset_map = build_raw_to_normalized_offset_map(raw)
+                self.assertEqual(norm_stripped, _reference_normalize(raw)[0].replace("\r", ""))
+                end = offset_map(len(raw.replace("\r", "")))
+                if _interleaved(raw):
+                    # A repeated part resolved into an earlier body shares its
+                    # CTE header; the splices overlap and, as with the
+                    # original mapping, offsets past them are approximate
+                    self.assertLessEqual(end, len(norm_stripped))
+                else:
+                    self.assertEqual(end, len(norm_stripped))
+
+    def test_decodes_every_part_of_newsletter(self):
+        normalized, has_encoded = normalize_eml(_newsletter(50))
+        self.assertTrue(has_encoded)
+        self.assertEqual(normalized.count("Content-Transfer-Encoding: 8bit"), 50)
+        self.assertIn("Section 49: lorem ipsum", normalized)
+
+    def test_duplicate_parts_match_reference(self):
+        # The reference resolves a repeated part to its first occurrence and
+        # drops it as overlapping, leaving the copy encoded
+        msg = MIMEMultipart("mixed")
+        for text in ("Call Carol on 555-0199.", "Call Carol on 555-0199.", "Thanks"):
+            msg.attach(MIMEText(text, "plain", "utf-8"))
+        raw = msg.as_string()
+        normalized, has_encoded = normalize_eml(raw)
+        self.assertEqual((normalized, has_encoded), _reference_normalize(raw))
+        self.assertEqual(normalized.count("Call Carol on 555-0199."), 1)
+        self.assertEqual(normalized.count("Content-Transfer-Encoding: base64"), 1)
+
+        norm_stripped, offset_map = build_raw_to_normalized_offset_map(raw)
+        self.assertEqual(norm_stripped, normalized.replace("\r", ""))
+        self.assertEqual(offset_map(len(raw)), len(norm_stripped))
+
+    def test_line_index_finds_first_occurrence(self):
+        rnd = random.Random(3)
+        text = "".join(rnd.choice(["ab", "a", "\n", "b\n", "ab\r\nab", "abababab"]) for _ in range(600))
+        index = eml_normalizer._LineIndex(text)
+        with mock.patch.object(index, "_build", wraps=index._build) as build:
+            for _ in range(4000):
+                start = rnd.randrange(len(text))
+                end = rnd.randint(start + 1, min(len(text), start + 48))
+                self.assertEqual(index.find(start, end), text.find(text[start:end], 0, end))
+        # Built once, whatever the head lengths looked up
+        self.assertEqual(build.call_count, 1)
+
+    def test_many_parts_scale_linearly(self):
+        def elapsed(raw):
+            best = float("inf")
+            for _ in range(3):
+                start = time.perf_counter()
+                normalize_eml(raw)
+                best = min(best, time.perf_counter() - start)
+            return best
+
+        small, large = _newsletter(250), _newsletter(1000)
+        # 4x the parts: linear is ~4x, the old quadratic splice was ~16x
+        self.assertLess(elapsed(large), elapsed(small) * 9)
+
+
+QP_EMAIL = (
+    "From: alice@example.com\r\n"
+    "Content-Type: text/plain; charset=utf-8\r\n"
+    "Content-Transfer-Encoding: quoted-printable\r\n"
+    "\r\n"
+    "Caf=C3=A9 owner Ren=C3=A9e, call 555-0100 =E2=80=A2 a very long line that =\r\n"
+    "wraps here. Email ren=C3=A9e@example.com\r\n"
+)
+
+BASE64_BODY = "Dear Ren\u00e9e,\r\nplease call 555-0100 or write to ren\u00e9e@example.com.\r\n"
+BASE64_EMAIL = (
+    "From: alice@example.com\r\n"
+    "Content-Type: text/plain; charset=utf-8\r\n"
+    "Content-Transfer-Encoding: base64\r\n"
+    "\r\n"
+    + base64.encodebytes(BASE64_BODY.encode("utf-8")).decode("ascii").replace("\n", "\r\n")
+)
+
+
+class OffsetMapTests(SimpleTestCase):
+    def test_qp_table_collapses_escapes_and_soft_breaks(self):
+        table = eml_normalizer._build_qp_offset_table("a=C3=A9b=\nc", "utf-8")
+        # a | =C3=A9 -> é | b | soft break | c
+        self.assertEqual(list(table), [0, 1, 1, 1, 1, 1, 1, 2, 3, 3, 3, 4])
+
+    def test_qp_table_single_byte_charset(self):
+        table = eml_normalizer._build_qp_offset_table("=E9t=E9", "iso-8859-1")
+        self.assertEqual(list(table), [0, 0, 0, 1, 2, 2, 2, 3])
+
+    def test_base64_table_follows_quads_and_line_breaks(self):
+        # "é" is two UTF-8 bytes; "w6k=" encodes exactly those two
+        table = eml_normalizer._build_base64_offset_table("YWJj\nw6k=", "utf-8")
+        # a b c | \n | é (4 chars) | end
+        self.assertEqual(list(table), [0, 0, 1, 2, 3, 3, 3, 3, 4, 4])
+
+    def test_base64_offsets_are_exact(self):
+        raw_stripped = BASE64_EMAIL.replace("\r", "")
+        norm_stripped, offset_map = build_raw_to_normalized_offset_map(BASE64_EMAIL)
+        body_start = raw_stripped.index("\n\n") + 2
+        decoded = BASE64_BODY.encode("utf-8")
+        norm_body_start = norm_stripped.index("Dear")
+
+        # Every character starting on a 3-byte boundary begins a base64 quad
+        alphabet = [i for i in range(body_start, len(raw_stripped)) if raw_stripped[i] != "\n"]
+        byte_pos = 0
+        for char_index, ch in enumerate(BASE64_BODY):
+            if byte_pos % 3 == 0 and ch != "\r":
+                expected = norm_body_start + len(BASE64_BODY[:char_index].replace("\r", ""))
+                self.assertEqual(offset_map(alphabet[byte_pos * 4 // 3]), expected, ch)
+            byte_pos += len(ch.encode("utf-8"))
+        self.assertEqual(len(decoded), byte_pos)
+
+    def test_entities_map_onto_normalized_text(self):
+        raw_stripped = QP_EMAIL.replace("\r", "")
+        norm_stripped, offset_map = build_raw_to_normalized_offset_map(QP_EMAIL)
+        for raw_text, norm_text in [
+            ("Ren=C3=A9e", "Renée"),
+            ("555-0100", "555-0100"),
+            ("ren=C3=A9e@example.com", "renée@example.com"),
+        ]:
+            start = raw_stripped.index(raw_text)
+            end = start + len(raw_text)
+            mapped_start, mapped_end = offset_map.map_many([start, end])
+            self.assertEqual(norm_stripped[mapped_start:mapped_end], norm_text)
+
+    def test_map_many_matches_single_lookups(self):
+        raw = _newsletter(5)
+        _, offset_map = build_raw_to_normalized_offset_map(raw)
+        offsets = list(range(-1, len(raw) + 2, 7))
+        self.assertEqual(offset_map.map_many(offsets), [offset_map(o) for o in offsets])
+
+    def test_map_many_keeps_input_order(self):
+        raw = _newsletter(5)
+        _, offset_map = build_raw_to_normalized_offset_map(raw)
+        offsets = random.Random(0).choices(range(-1, len(raw) + 2), k=500)
+        self.assertEqual(offset_map.map_many(offsets), [offset_map(o) for o in offsets])
+        self.assertEqual(offset_map.map_many([]), [])
+
+    def test_unencoded_email_maps_identically(self):
+        raw = "From: a@example.com\r\n\r\nHello\r\n"
+        _, offset_map = build_raw_to_normalized_offset_map(raw)
+        self.assertEqual(offset_map.map_many([0, 5, 20]), [0, 5, 20])
+
+
+class KeysetPaginationTests(APITestCase):
+    """Walks /api/users/, which pages by (-created_at, -id)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@example.com", name="Admin", password="pw", role=User.Role.ADMIN
+        )
+        for i in range(24):
+            User.objects.create_user(email=f"user{i}@example.com", name=f"User {i}", role=User.Role.ANNOTATOR)
+        # Ties on the sort key are broken by id
+        User.objects.filter(email__startswith="user1").update(created_at=timezone.now())
+        cls.expected = [
+            str(pk) for pk in User.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        ]
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def page(self, cursor=None, **params):
+        response = self.client.get("/api/users/", {"page_size": 7, "cursor": cursor or "", **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data, [str(user["id"]) for user in response.data["results"]]
+
+    def test_walk_forward_and_back(self):
+        data, ids = self.page()
+        self.assertEqual(data["count"], len(self.expected))
+        self.assertIsNone(data["previous_cursor"])
+        pages = [ids]
+        while data["next_cursor"]:
+            data, ids = self.page(data["next_cursor"])
+            pages.append(ids)
+        self.assertEqual(sum(pages, []), self.expected)
+
+        back = []
+        while data["previous_cursor"]:
+            data, ids = self.page(data["previous_cursor"])
+            back.append(ids)
+        self.assertEqual(back, pages[-2::-1])
+
+    def test_last_page(self):
+        data, ids = self.page("last")
+        self.assertEqual(ids, self.expected[-7:])
+        self.assertIsNone(data["next_cursor"])
+        data, ids = self.page(data["previous_cursor"])
+        self.assertEqual(ids, self.expected[-14:-7])
+
+    def test_filters_apply_to_count_and_pages(self):
+        data, ids = self.page(role=User.Role.ADMIN)
+        self.assertEqual((data["count"], ids), (1, [str(self.admin.id)]))
+        self.assertIsNone(data["next_cursor"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/users/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+
+class SearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@example.com", name="Admin", password="pw", role=User.Role.ADMIN
+        )
+        for name in ("Annabel", "Ann", "Joanna", "Bob"):
+            User.objects.create_user(email=f"{name.lower()}@example.com", name=name)
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def names(self, **params):
+        names, cursor = [], ""
+        while cursor is not None:
+            response = self.client.get("/api/users/", {"search": "ann", "page_size": 1, "cursor": cursor, **params})
+            self.assertEqual(response.status_code, 200)
+            names += [user["name"] for user in response.data["results"]]
+            cursor = response.data["next_cursor"]
+        return names, response.data["count"]
+
+    def test_results_are_ranked_across_pages(self):
+        # An exact match first, then by the share of the name the term covers
+        self.assertEqual(self.names(), (["Ann", "Joanna", "Annabel"], 3))
+
+    @override_settings(SEARCH_MATCH_LIMIT=2)
+    def test_match_limit_keeps_best_matches(self):
+        self.assertEqual(self.names(), (["Ann", "Joanna"], 2))
+
+    @override_settings(SEARCH_MATCH_LIMIT=2)
+    def test_match_limit_applies_after_filters(self):
+        User.objects.filter(name="Annabel").update(role=User.Role.QA)
+        self.assertEqual(self.names(role=User.Role.QA), (["Annabel"], 1))
+
+
+class SearchFilterTests(TestCase):
+    def test_matches_through_foreign_key(self):
+        reports = Dataset.objects.create(name="Quarterly reports")
+        other = Dataset.objects.create(name="Other")
+        by_dataset = Job.objects.create(dataset=reports, file_name="a.eml")
+        by_name = Job.objects.create(dataset=other, file_name="report.eml")
+        Job.objects.create(dataset=other, file_name="b.eml")
+
+        # Datasets are matched in a subquery, not loaded up front
+        with CaptureQueriesContext(connection) as ctx:
+            jobs = search_filter(Job.objects.all(), "report", ["file_name", "dataset__name"])
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(
+            list(jobs.order_by("-search_rank")),
+            [by_name, by_dataset],
+        )
@@ -5,7 +5,8 @@ from rest_framework.viewsets import ViewSet
 
 from accounts.models import User
 from core.permissions import IsAdmin
-from datasets.models import Dataset, Job
+from datasets import status_counts
+from datasets.models import Dataset, Job, UserStatusCount
 from datasets.serializers import DatasetListSerializer
 from qa.models import QAReviewVersion
 
@@ -20,36 +21,24 @@ class DashboardViewSet(ViewSet):
             Job.Status.ASSIGNED_QA,
             Job.Status.QA_IN_PROGRESS,
         ]
+        totals = status_counts.status_totals()
         return Response(
             {
                 "total_datasets": Dataset.objects.count(),
-                "total_jobs": Job.objects.count(),
-                "pending_assignment": Job.objects.filter(
-                    status=Job.Status.UPLOADED
-                ).count(),
-                "in_progress": Job.objects.filter(
-                    status__in=in_progress_statuses
-                ).count(),
-                "delivered": Job.objects.filter(
-                    status=Job.Status.DELIVERED
-                ).count(),
-                "awaiting_qa": Job.objects.filter(
-                    status=Job.Status.SUBMITTED_FOR_QA
-                ).count(),
+                "total_jobs": sum(totals.values()),
+                "pending_assignment": totals.get(Job.Status.UPLOADED, 0),
+                "in_progress": sum(totals.get(s, 0) for s in in_progress_statuses),
+                "delivered": totals.get(Job.Status.DELIVERED, 0),
+                "awaiting_qa": totals.get(Job.Status.SUBMITTED_FOR_QA, 0),
             }
         )
 
     def job_status_counts(self, request):
         dataset_id = request.query_params.get("dataset_id")
-        qs = Job.objects.all()
-        if dataset_id:
-            qs = qs.filter(dataset_id=dataset_id)
-        counts = qs.values("status").annotate(count=Count("id")).order_by("status")
-        result = {item["status"]: item["count"] for item in counts}
-        return Response(result)
+        return Response(status_counts.status_totals(dataset_id))
 
     def recent_datasets(self, request):
-        datasets = Dataset.objects.prefetch_related("jobs").select_related(
+        datasets = Dataset.objects.prefetch_related("status_counts").select_related(
             "uploaded_by"
         ).order_by("-upload_date")[:5]
         return Response(DatasetListSerializer(datasets, many=True).data)
@@ -69,31 +58,18 @@ class DashboardViewSet(ViewSet):
 
         annotators = User.objects.filter(
             role=User.Role.ANNOTATOR, status=User.Status.ACTIVE
-        ).annotate(
-            assigned_jobs=Count("annotator_jobs"),
-            completed_jobs=Count(
-                "annotator_jobs",
-                filter=Q(annotator_jobs__status__in=completed_statuses),
-            ),
-            in_progress_jobs=Count(
-                "annotator_jobs",
-                filter=Q(annotator_jobs__status__in=in_progress_statuses),
-            ),
-            delivered_jobs=Count(
-                "annotator_jobs",
-                filter=Q(annotator_jobs__status=Job.Status.DELIVERED),
-            ),
-            rejected_jobs=Count(
-                "annotator_jobs",
-                filter=Q(annotator_jobs__status=Job.Status.QA_REJECTED),
-            ),
+        )
+        user_counts = status_counts.counts_by_user(
+            UserStatusCount.Role.ANNOTATOR, annotators
         )
 
         result = []
         for user in annotators:
-            total_decided = user.delivered_jobs + user.rejected_jobs
+            counts = user_counts.get(user.id, {})
+            delivered_jobs = counts.get(Job.Status.DELIVERED, 0)
+            total_decided = delivered_jobs + counts.get(Job.Status.QA_REJECTED, 0)
             acceptance_rate = (
-                round((user.delivered_jobs / total_decided) * 100, 1)
+                round((delivered_jobs / total_decided) * 100, 1)
                 if total_decided > 0
                 else None
             )
@@ -101,9 +77,9 @@ class DashboardViewSet(ViewSet):
                 {
                     "id": str(user.id),
                     "name": user.name,
-                    "assigned_jobs": user.assigned_jobs,
-                    "completed_jobs": user.completed_jobs,
-                    "in_progress_jobs": user.in_progress_jobs,
+                    "assigned_jobs": sum(counts.values()),
+                    "completed_jobs": sum(counts.get(s, 0) for s in completed_statuses),
+                    "in_progress_jobs": sum(counts.get(s, 0) for s in in_progress_statuses),
                     "acceptance_rate": acceptance_rate,
                     "avg_annotations_per_job": None,
                 }
@@ -123,11 +99,10 @@ class DashboardViewSet(ViewSet):
                 "qa_reviews",
                 filter=Q(qa_reviews__decision=QAReviewVersion.Decision.REJECT),
             ),
-            in_review_jobs=Count(
-                "qa_jobs",
-                filter=Q(qa_jobs__status=Job.Status.QA_IN_PROGRESS),
-            ),
         )
+        # Counted from the counters rather than a second join, which would
+        # multiply the review counts
+        user_counts = status_counts.counts_by_user(UserStatusCount.Role.QA, qa_users)
 
         result = []
         for user in qa_users:
@@ -138,7 +113,9 @@ class DashboardViewSet(ViewSet):
                     "reviewed_jobs": user.reviewed_jobs,
                     "accepted_jobs": user.accepted_jobs,
                     "rejected_jobs": user.rejected_jobs,
-                    "in_review_jobs": user.in_review_jobs,
+                    "in_review_jobs": user_counts.get(user.id, {}).get(
+                        Job.Status.QA_IN_PROGRESS, 0
+                    ),
                     "avg_review_time": None,
                 }
             )
@@ -0,0 +1,152 @@
+"""
+Compression codecs for stored .eml payloads (EmlBlob.data).
+
+Every payload written by this module starts with a one-byte codec tag:
+
+    0x01  zlib
+    0x02  zstd
+    0x03  zstd with a trained dictionary; followed by the 8-byte big-endian
+          CompressionDictionary id
+
+Payloads written before codecs existed are untagged zlib streams (first byte
+0x78) and are still decoded as zlib.
+
+zstd support requires the optional `zstandard` package (the `zstd` extra).
+"""
+
+import struct
+import threading
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+ZLIB = "zlib"
+ZSTD = "zstd"
+ZSTD_DICT = "zstd-dict"
+CODECS = (ZLIB, ZSTD, ZSTD_DICT)
+
+_TAG_ZLIB = 0x01
+_TAG_ZSTD = 0x02
+_TAG_ZSTD_DICT = 0x03
+_DICT_ID = struct.Struct(">Q")
+
+# Training needs a reasonable number of samples to produce a useful dictionary
+MIN_DICTIONARY_SAMPLES = 8
+
+_local = threading.local()
+_zstd_dicts = {}
+_zstd_dicts_lock = threading.Lock()
+
+
+def encode(data: bytes, codec: str | None = None, dictionary=None) -> bytes:
+    """
+    Compress bytes with the given codec (default: EML_CODEC setting).
+
+    `dictionary` is a CompressionDictionary instance and is only used by the
+    zstd-dict codec; without one, zstd-dict falls back to plain zstd.
+    """
+    codec = codec or settings.EML_CODEC
+    if codec == ZLIB:
+        return bytes([_TAG_ZLIB]) + zlib.compress(data)
+    if codec == ZSTD or (codec == ZSTD_DICT and dictionary is None):
+        return bytes([_TAG_ZSTD]) + _compressor(None).compress(data)
+    if codec == ZSTD_DICT:
+        header = bytes([_TAG_ZSTD_DICT]) + _DICT_ID.pack(dictionary.pk)
+        return header + _compressor(dictionary).compress(data)
+    raise ImproperlyConfigured(f"Unknown EML codec '{codec}'. Expected one of {CODECS}.")
+
+
+def decode(data: bytes) -> bytes:
+    """Decompress a payload written by `encode` (or a legacy untagged zlib stream)."""
+    data = bytes(data)
+    tag = data[0]
+    if tag == _TAG_ZLIB:
+        return zlib.decompress(data[1:])
+    if tag == _TAG_ZSTD:
+        return _decompressor(None).decompress(data[1:])
+    if tag == _TAG_ZSTD_DICT:
+        (dict_id,) = _DICT_ID.unpack_from(data, 1)
+        return _decompressor(dict_id).decompress(data[1 + _DICT_ID.size :])
+    return zlib.decompress(data)
+
+
+def codec_of(data: bytes) -> tuple[str, int | None]:
+    """Return (codec, dictionary_id) for a stored payload."""
+    tag = data[0]
+    if tag == _TAG_ZSTD:
+        return ZSTD, None
+    if tag == _TAG_ZSTD_DICT:
+        return ZSTD_DICT, _DICT_ID.unpack_from(data, 1)[0]
+    return ZLIB, None
+
+
+def create_dictionary(samples: list[bytes], dataset=None):
+    """
+    Train a zstd dictionary from sample payloads and store it.
+
+    Returns the saved CompressionDictionary, or None when there are too few
+    samples or training fails (callers then fall back to plain zstd).
+    """
+    from .models import CompressionDictionary
+
+    _require_zstandard()
+    if len(samples) < MIN_DICTIONARY_SAMPLES:
+        return None
+    try:
+        trained = zstandard.train_dictionary(settings.EML_ZSTD_DICT_SIZE, samples)
+    except zstandard.ZstdError:
+        return None
+    return CompressionDictionary.objects.create(dataset=dataset, data=trained.as_bytes())
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ImproperlyConfigured(
+            "The zstd EML codecs require the 'zstandard' package to be installed."
+        )
+
+
+def _zstd_dict(dict_id, data=None):
+    """Return the (cached) ZstdCompressionDict for a dictionary id."""
+    with _zstd_dicts_lock:
+        zdict = _zstd_dicts.get(dict_id)
+    if zdict is not None:
+        return zdict
+    if data is None:
+        from .models import CompressionDictionary
+
+        data = CompressionDictionary.objects.values_list("data", flat=True).get(pk=dict_id)
+    zdict = zstandard.ZstdCompressionDict(bytes(data))
+    with _zstd_dicts_lock:
+        _zstd_dicts.setdefault(dict_id, zdict)
+    return zdict
+
+
+def _compressor(dictionary):
+    # zstd (de)compressors are not thread-safe; keep one per thread per dictionary.
+    _require_zstandard()
+    cache = _local.__dict__.setdefault("compressors", {})
+    key = dictionary.pk if dictionary is not None else None
+    if key not in cache:
+        kwargs = {"level": settings.EML_ZSTD_LEVEL}
+        if dictionary is not None:
+            kwargs["dict_data"] = _zstd_dict(dictionary.pk, dictionary.data)
+        cache[key] = zstandard.ZstdCompressor(**kwargs)
+    return cache[key]
+
+
+def _decompressor(dict_id):
+    _require_zstandard()
+    cache = _local.__dict__.setdefault("decompressors", {})
+    if dict_id not in cache:
+        kwargs = {}
+        if dict_id is not None:
+            kwargs["dict_data"] = _zstd_dict(dict_id)
+        cache[dict_id] = zstandard.ZstdDecompressor(**kwargs)
+    return cache[dict_id]
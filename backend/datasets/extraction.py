@@ -0,0 +1,275 @@
+"""
+Out-of-request dataset extraction.
+
+Uploads are spooled to disk by the upload view; `extract_dataset` then streams
+the archive in bounded batches of members and inserts jobs batch by batch,
+updating `Dataset.file_count` after each one so status polling shows progress.
+
+With the zstd-dict codec, a compression dictionary is trained from the first
+members of the archive before extraction starts.
+
+Each new email's normalized text is added to the full-text index
+(datasets.text_index) in the same transaction as its job.
+
+The extraction process records a heartbeat with each batch. A dataset left
+EXTRACTING without one for EXTRACTION_STALE_SECONDS (the process was killed
+or never started) is marked FAILED by `fail_stale_extractions`, run
+periodically by the command of the same name; a process that finds its
+dataset failed that way stops.
+
+Per-member work (read + inflate, SHA-256, decode, normalize, compress) can run on a
+thread pool: zlib and hashlib release the GIL on large buffers. Dedup is
+always applied afterwards in archive order, so results do not depend on the
+worker count.
+"""
+
+import hashlib
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import timedelta
+from functools import partial
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.eml_normalizer import normalize_eml
+
+from . import eml_codecs, text_index
+from .models import Dataset, EmlBlob, Job, compress_eml
+
+
+class ExtractionAbandoned(Exception):
+    """The dataset stopped being EXTRACTING while this process was extracting it."""
+
+
+def get_upload_path(dataset) -> Path:
+    """Location of the spooled upload archive for a dataset."""
+    return Path(settings.DATASET_UPLOAD_DIR) / f"{dataset.id}.zip"
+
+
+def spool_upload(dataset, uploaded_file) -> Path:
+    """Write an uploaded archive to disk chunk by chunk and return its path."""
+    path = get_upload_path(dataset)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as fh:
+        for chunk in uploaded_file.chunks():
+            fh.write(chunk)
+    return path
+
+
+def extract_dataset(dataset, zip_path, batch_size=None, workers=None) -> None:
+    """
+    Extract .eml members of a spooled ZIP into Job rows.
+
+    Dedup semantics: identical content within the archive is kept once
+    (first occurrence wins), and content already present in the database is
+    skipped. Payloads go to the content-addressed EmlBlob store. On failure,
+    jobs inserted so far are removed and the dataset is marked FAILED. The
+    spooled archive is always deleted afterwards.
+    """
+    batch_size = batch_size or settings.EXTRACTION_BATCH_SIZE
+    workers = workers or settings.EXTRACTION_WORKERS
+    zip_path = Path(zip_path)
+
+    try:
+        if not zipfile.is_zipfile(zip_path):
+            dataset.status = Dataset.Status.FAILED
+            dataset.error_message = "Uploaded file is not a valid zip archive."
+            dataset.save(update_fields=["status", "error_message"])
+            return
+
+        seen_hashes_in_zip = set()
+        inserted = 0
+        _update_extracting(dataset, extraction_heartbeat_at=timezone.now())
+
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else nullcontext()
+        with zipfile.ZipFile(zip_path, "r") as zf, executor:
+            dictionary = None
+            if settings.EML_CODEC == eml_codecs.ZSTD_DICT:
+                dictionary = _train_dictionary(zf, dataset)
+                _update_extracting(dataset, extraction_heartbeat_at=timezone.now())
+
+            mapper = executor.map if workers > 1 else map
+            prepare = partial(_prepare_member, zf, dictionary=dictionary)
+            members = _iter_eml_members(zf)
+
+            while chunk := list(islice(members, batch_size)):
+                prepared = mapper(prepare, [info for info, _ in chunk])
+
+                batch = []
+                for (_, base_name), (content_hash, blob, text) in zip(chunk, prepared):
+                    # Phase 1: intra-ZIP dedup, in archive order
+                    if content_hash in seen_hashes_in_zip:
+                        continue
+                    seen_hashes_in_zip.add(content_hash)
+
+                    job = Job(
+                        dataset=dataset,
+                        file_name=base_name,
+                        blob_id=content_hash,
+                        content_hash=content_hash,
+                        status=Job.Status.UPLOADED,
+                    )
+                    batch.append((job, blob, text))
+
+                inserted += _insert_batch(batch)
+                _save_progress(dataset, inserted, len(seen_hashes_in_zip))
+
+        _update_extracting(
+            dataset,
+            status=Dataset.Status.READY,
+            file_count=inserted,
+            duplicate_count=len(seen_hashes_in_zip) - inserted,
+        )
+
+    except ExtractionAbandoned:
+        # Already marked FAILED elsewhere; only remove what this process inserted
+        dataset.jobs.all().delete()
+        dataset.refresh_from_db()
+
+    except Exception as e:
+        dataset.jobs.all().delete()
+        dataset.status = Dataset.Status.FAILED
+        dataset.file_count = 0
+        dataset.duplicate_count = 0
+        dataset.error_message = str(e)
+        dataset.save(
+            update_fields=["status", "file_count", "duplicate_count", "error_message"]
+        )
+
+    finally:
+        zip_path.unlink(missing_ok=True)
+
+
+def _iter_eml_members(zf):
+    """Yield (ZipInfo, file_name) for each .eml member, de-duplicating file names."""
+    seen_names = {}
+    for info in zf.infolist():
+        entry = info.filename
+        # Skip directories and non-.eml files
+        if entry.endswith("/") or not entry.lower().endswith(".eml"):
+            continue
+
+        # Use just the filename, not the full path
+        base_name = os.path.basename(entry)
+        if not base_name:
+            continue
+
+        # Handle duplicate filenames
+        if base_name in seen_names:
+            seen_names[base_name] += 1
+            name_part, ext = os.path.splitext(base_name)
+            base_name = f"{name_part}_{seen_names[base_name]}{ext}"
+        else:
+            seen_names[base_name] = 0
+
+        yield info, base_name
+
+
+def _train_dictionary(zf, dataset):
+    """Train a zstd dictionary for this dataset from its first members."""
+    samples = [
+        zf.read(info)
+        for info, _ in islice(_iter_eml_members(zf), settings.EML_ZSTD_DICT_SAMPLES)
+    ]
+    return eml_codecs.create_dictionary(samples, dataset=dataset)
+
+
+def _prepare_member(zf, info, dictionary=None) -> tuple[str, EmlBlob, str]:
+    """
+    Read one member and return (content_hash, unsaved EmlBlob, normalized_text).
+    The blob's normalization cache is filled, so searching and exporting
+    the job never normalizes it again. Thread-safe.
+    """
+    raw_bytes = zf.read(info)
+    content_hash = hashlib.sha256(raw_bytes).hexdigest()
+    try:
+        eml_content = raw_bytes.decode("utf-8")
+    except UnicodeDecodeError:
+        eml_content = raw_bytes.decode("latin-1")
+    normalized, has_encoded = normalize_eml(eml_content)
+    blob = EmlBlob(content_hash=content_hash, data=compress_eml(eml_content, dictionary=dictionary))
+    blob.set_normalized(normalized, has_encoded, eml_content)
+    return content_hash, blob, normalized
+
+
+def _insert_batch(batch) -> int:
+    """
+    Phase 2: global dedup against existing jobs, then insert blobs and jobs.
+
+    `batch` holds (Job, EmlBlob, normalized text) triples. Returns the number
+    of jobs inserted.
+    """
+    if not batch:
+        return 0
+    existing_hashes = set(
+        Job.objects.filter(content_hash__in=[job.content_hash for job, _, _ in batch])
+        .values_list("content_hash", flat=True)
+    )
+    new_entries = [entry for entry in batch if entry[0].content_hash not in existing_hashes]
+    with transaction.atomic():
+        EmlBlob.objects.store_many([blob for _, blob, _ in new_entries])
+        Job.objects.bulk_create([job for job, _, _ in new_entries])
+        text_index.index_documents([(blob.content_hash, text) for _, blob, text in new_entries])
+    return len(new_entries)
+
+
+def _save_progress(dataset, inserted, extracted) -> None:
+    _update_extracting(
+        dataset,
+        file_count=inserted,
+        duplicate_count=extracted - inserted,
+        extraction_heartbeat_at=timezone.now(),
+    )
+
+
+def _update_extracting(dataset, **fields) -> None:
+    """Save `fields` on a dataset that is still EXTRACTING, or raise ExtractionAbandoned."""
+    for name, value in fields.items():
+        setattr(dataset, name, value)
+    if not Dataset.objects.filter(pk=dataset.pk, status=Dataset.Status.EXTRACTING).update(**fields):
+        raise ExtractionAbandoned(f"Dataset {dataset.pk} is no longer being extracted.")
+
+
+def fail_stale_extractions() -> list:
+    """
+    Mark FAILED every EXTRACTING dataset with no heartbeat (or, before its
+    first one, no upload) within EXTRACTION_STALE_SECONDS, removing its
+    partial jobs and spooled upload. Returns the datasets failed.
+    """
+    if not settings.EXTRACTION_STALE_SECONDS:
+        return []
+    stale_after = timedelta(seconds=settings.EXTRACTION_STALE_SECONDS)
+    stale = (
+        Dataset.objects.filter(status=Dataset.Status.EXTRACTING)
+        .alias(last_seen=Coalesce("extraction_heartbeat_at", "upload_date"))
+        .filter(last_seen__lt=timezone.now() - stale_after)
+    )
+
+    failed = []
+    for dataset in stale:
+        # Only if no heartbeat arrived since it was read
+        updated = Dataset.objects.filter(
+            pk=dataset.pk,
+            status=Dataset.Status.EXTRACTING,
+            extraction_heartbeat_at=dataset.extraction_heartbeat_at,
+        ).update(
+            status=Dataset.Status.FAILED,
+            file_count=0,
+            duplicate_count=0,
+            error_message=(
+                f"Extraction stopped without finishing (no progress for "
+                f"{int(stale_after.total_seconds() // 60)} minutes). Please upload the dataset again."
+            ),
+        )
+        if updated:
+            dataset.jobs.all().delete()
+            get_upload_path(dataset).unlink(missing_ok=True)
+            failed.append(dataset)
+    return failed
@@ -0,0 +1,197 @@
+import json
+import re
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from accounts.models import User
+from annotations.views import AnnotationJobsPagination
+from core.pagination import KeysetPagination
+from datasets.models import Dataset, Job
+from qa.views import QAJobsPagination
+
+SEED_BATCH_SIZE = 5000
+
+# Seeded status mix: most jobs of a long-running deployment are delivered
+SEED_STATUSES = [Job.Status.DELIVERED] * 8 + [status for status in Job.Status if status != Job.Status.DELIVERED]
+
+ANNOTATED_STATUSES = set(Job.Status) - {Job.Status.UPLOADED}
+QA_STATUSES = {
+    Job.Status.ASSIGNED_QA,
+    Job.Status.QA_IN_PROGRESS,
+    Job.Status.QA_REJECTED,
+    Job.Status.QA_ACCEPTED,
+    Job.Status.DELIVERED,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN each job queue and job list query and fail if any of them "
+        "scans the whole job table or sorts its rows instead of reading them "
+        "in index order. Run against production-sized data (or --seed it) "
+        "before deploying index or query changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            metavar="N",
+            help="Insert N synthetic jobs first; they are rolled back afterwards (default: 0)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ("postgresql", "sqlite"):
+            raise CommandError(f"Query plans are not supported on {connection.vendor}.")
+
+        table = Job._meta.db_table
+        with transaction.atomic():
+            if options["seed"]:
+                self.seed(options["seed"])
+                self.stdout.write(f"Seeded {options['seed']} job(s).")
+            self.analyze()
+
+            flagged = []
+            for name, queryset in queue_queries():
+                plan, problems, timing = explain(queryset, table)
+                if problems:
+                    flagged.append(f"{name} ({', '.join(problems)})")
+                label = self.style.ERROR(" + ".join(problems).upper()) if problems else self.style.SUCCESS("ok")
+                self.stdout.write(f"{label:>8}  {name}{timing}")
+                if options["verbosity"] > 1:
+                    self.stdout.write(plan)
+
+            # Never keep seeded rows
+            transaction.set_rollback(True)
+
+        if flagged:
+            raise CommandError(
+                f"{len(flagged)} queue quer{'y' if len(flagged) == 1 else 'ies'} "
+                f"scan or sort the {table} table: {', '.join(flagged)}"
+            )
+        self.stdout.write(self.style.SUCCESS("All queue queries use an index."))
+
+    def seed(self, count):
+        suffix = uuid.uuid4().hex[:8]
+        annotators = [
+            User.objects.create(email=f"explain-annotator-{i}-{suffix}@example.com", name="Seed annotator")
+            for i in range(4)
+        ]
+        reviewers = [
+            User.objects.create(email=f"explain-qa-{i}-{suffix}@example.com", name="Seed QA", role=User.Role.QA)
+            for i in range(2)
+        ]
+        datasets = [
+            Dataset.objects.create(name=f"explain-queues-{i}-{suffix}", status=Dataset.Status.READY)
+            for i in range(4)
+        ]
+
+        jobs = []
+        for i in range(count):
+            status = SEED_STATUSES[i % len(SEED_STATUSES)]
+            jobs.append(
+                Job(
+                    dataset=datasets[i % len(datasets)],
+                    file_name=f"seed_{i}.eml",
+                    status=status,
+                    assigned_annotator=annotators[i % len(annotators)] if status in ANNOTATED_STATUSES else None,
+                    assigned_qa=reviewers[i % len(reviewers)] if status in QA_STATUSES else None,
+                )
+            )
+            if len(jobs) == SEED_BATCH_SIZE:
+                Job.objects.bulk_create(jobs)
+                jobs = []
+        Job.objects.bulk_create(jobs)
+
+    def analyze(self):
+        """Refresh planner statistics so the plans reflect the current data."""
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(Job._meta.db_table)}")
+            else:
+                cursor.execute("ANALYZE")
+
+
+def queue_queries():
+    """(name, queryset) for each job list query, filtered and ordered as its endpoint does."""
+    dataset_id = Job.objects.values_list("dataset_id", flat=True).first()
+    annotator_id = Job.objects.exclude(assigned_annotator=None).values_list("assigned_annotator", flat=True).first()
+    qa_id = Job.objects.exclude(assigned_qa=None).values_list("assigned_qa", flat=True).first()
+
+    def page(queryset, pagination=KeysetPagination):
+        return queryset.order_by(*pagination.ordering)[: pagination.page_size + 1]
+
+    queries = []
+    for queue in Job.QUEUE_STATUSES:
+        for assign_type in ("ANNOTATION", "QA"):
+            queryset = Job.objects.queue(queue, assign_type)
+            queries.append((f"{queue} {assign_type}", page(queryset)))
+            queries.append((f"{queue} {assign_type} by dataset", page(queryset.filter(dataset_id=dataset_id))))
+
+    dataset_jobs = Job.objects.filter(dataset_id=dataset_id)
+    queries += [
+        ("dataset jobs", page(dataset_jobs)),
+        ("dataset jobs by status", page(dataset_jobs.filter(status=Job.Status.UPLOADED))),
+    ]
+
+    for label, field, pagination, status in (
+        ("annotator", "assigned_annotator", AnnotationJobsPagination, Job.Status.ASSIGNED_ANNOTATOR),
+        ("QA", "assigned_qa", QAJobsPagination, Job.Status.ASSIGNED_QA),
+    ):
+        user_id = annotator_id if field == "assigned_annotator" else qa_id
+        my_jobs = Job.objects.filter(**{field: user_id})
+        queries += [
+            (f"{label} my jobs", page(my_jobs, pagination)),
+            (f"{label} my jobs by status", page(my_jobs.filter(status=status), pagination)),
+            (
+                f"{label} workloads",
+                Job.objects.filter(status=status, **{f"{field}__isnull": False})
+                .values(field)
+                .annotate(assigned_count=Count("id"))
+                .order_by(),
+            ),
+        ]
+    return queries
+
+
+def explain(queryset, table):
+    """
+    Return (plan text, problems, timing suffix). Problems lists "seq scan"
+    if `table` is scanned sequentially and "sort" if its rows are sorted
+    rather than read in index order. On PostgreSQL the query is run with
+    EXPLAIN (ANALYZE, BUFFERS).
+    """
+    problems = []
+    if connection.vendor == "postgresql":
+        plan = json.loads(queryset.explain(format="json", analyze=True, buffers=True))[0]
+        nodes = list(_plan_nodes(plan["Plan"]))
+        if any(node["Node Type"] == "Seq Scan" and node.get("Relation Name") == table for node in nodes):
+            problems.append("seq scan")
+        if any(
+            node["Node Type"] in ("Sort", "Incremental Sort")
+            and any(child.get("Relation Name") == table for child in _plan_nodes(node))
+            for node in nodes
+        ):
+            problems.append("sort")
+        return json.dumps(plan, indent=2), problems, f" ({plan['Execution Time']:.2f} ms)"
+
+    plan = queryset.explain()
+    details = [line.split(" ", 3)[-1].strip() for line in plan.splitlines()]
+    # SQLite: "SCAN <table>" is a full table scan; index scans name the index
+    full_scan = re.compile(rf"SCAN (TABLE )?{re.escape(table)}( AS \w+)?")
+    if any(full_scan.fullmatch(detail) for detail in details):
+        problems.append("seq scan")
+    # Queue queries read only the job table, so an ORDER BY sort is over its rows
+    if any(re.fullmatch(r"USE TEMP B-TREE FOR (RIGHT PART OF |LAST TERM OF )?ORDER BY", d) for d in details):
+        problems.append("sort")
+    return plan, problems, ""
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from datasets.extraction import extract_dataset, get_upload_path
+from datasets.models import Dataset
+
+
+class Command(BaseCommand):
+    help = "Extract a spooled dataset upload into jobs (run in the background by the upload endpoint)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset_id", type=str, help="UUID of the dataset to extract")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Jobs inserted per batch (default: EXTRACTION_BATCH_SIZE setting)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Threads for reading/hashing/compressing members (default: EXTRACTION_WORKERS setting)",
+        )
+
+    def handle(self, *args, **options):
+        dataset_id = options["dataset_id"]
+
+        try:
+            dataset = Dataset.objects.get(pk=dataset_id)
+        except (Dataset.DoesNotExist, ValueError):
+            raise CommandError(f"Dataset with ID '{dataset_id}' not found.")
+
+        if dataset.status != Dataset.Status.EXTRACTING:
+            raise CommandError(
+                f"Dataset '{dataset.name}' is {dataset.status}, not EXTRACTING."
+            )
+
+        zip_path = get_upload_path(dataset)
+        if not zip_path.is_file():
+            dataset.status = Dataset.Status.FAILED
+            dataset.error_message = "Uploaded archive is no longer available."
+            dataset.save(update_fields=["status", "error_message"])
+            raise CommandError(f"Spooled upload not found: {zip_path}")
+
+        extract_dataset(
+            dataset,
+            zip_path,
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+        )
+
+        dataset.refresh_from_db()
+        if dataset.status == Dataset.Status.READY:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Extracted {dataset.file_count} jobs "
+                    f"({dataset.duplicate_count} duplicates skipped) into '{dataset.name}'."
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.ERROR(f"Extraction failed: {dataset.error_message}")
+            )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from datasets.extraction import fail_stale_extractions
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark FAILED every dataset whose extraction process stopped reporting progress "
+        "(no heartbeat for EXTRACTION_STALE_SECONDS) and remove its partial jobs. "
+        "Run periodically, e.g. from cron."
+    )
+
+    def handle(self, *args, **options):
+        failed = fail_stale_extractions()
+        for dataset in failed:
+            self.stdout.write(f"  {dataset.name} ({dataset.id})")
+        self.stdout.write(self.style.SUCCESS(f"Failed {len(failed)} stale extraction(s)."))
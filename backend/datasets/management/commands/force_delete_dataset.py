@@ -1,12 +1,10 @@
-import shutil
-from pathlib import Path
-
-from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
 from annotations.models import AnnotationVersion, DraftAnnotation
 from datasets.models import Dataset
+from exports import storage
 from exports.models import ExportRecord
 from qa.models import QADraftReview, QAReviewVersion
 
@@ -29,7 +27,7 @@ class Command(BaseCommand):
 
         try:
             dataset = Dataset.objects.get(pk=dataset_id)
-        except (Dataset.DoesNotExist, ValueError):
+        except (Dataset.DoesNotExist, ValidationError):
             raise CommandError(f"Dataset with ID '{dataset_id}' not found.")
 
         # Gather stats
@@ -75,18 +73,8 @@ class Command(BaseCommand):
                 self.stdout.write(f"  {model_label}: {count}")
 
         # Clean up export files from disk (after successful DB delete)
-        files_deleted = 0
-        for file_path in export_file_paths:
-            if not file_path:
-                continue
-            full_path = Path(settings.MEDIA_ROOT) / file_path
-            if full_path.is_file():
-                full_path.unlink()
-                files_deleted += 1
-                # Remove parent directory if empty
-                parent = full_path.parent
-                if parent.is_dir() and not any(parent.iterdir()):
-                    shutil.rmtree(parent)
+        # Archives shared with another dataset's export are kept
+        files_deleted = storage.delete_unreferenced_files(export_file_paths)
 
         if files_deleted:
             self.stdout.write(self.style.SUCCESS(f"Removed {files_deleted} export file(s) from disk."))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from datasets import text_index
+from datasets.models import EmlBlob, Job
+
+
+class Command(BaseCommand):
+    help = "Delete EML blobs that are no longer referenced by any job."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Blobs deleted per transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report unreferenced blobs without deleting them",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        hashes = list(EmlBlob.objects.unreferenced().values_list("content_hash", flat=True))
+        self.stdout.write(f"Found {len(hashes)} unreferenced blob(s).")
+
+        if options["dry_run"] or not hashes:
+            return
+
+        deleted = 0
+        for i in range(0, len(hashes), batch_size):
+            chunk = hashes[i : i + batch_size]
+            with transaction.atomic():
+                # Lock before re-checking the references: a job created since
+                # the scan keeps its blob, and blobs an extraction is linking
+                # (locked by EmlBlob.objects.store_many) are left for a later run.
+                unreferenced = list(
+                    EmlBlob.objects.select_for_update(skip_locked=True)
+                    .filter(~Exists(Job.objects.filter(blob_id=OuterRef("pk"))), content_hash__in=chunk)
+                    .values_list("content_hash", flat=True)
+                )
+                count, _ = EmlBlob.objects.filter(content_hash__in=unreferenced).delete()
+                text_index.remove_documents(unreferenced)
+            deleted += count
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} blob(s)."))
@@ -12,7 +12,8 @@ from accounts.models import User
 from annotations.models import Annotation, AnnotationVersion
 from core.eml_normalizer import build_raw_to_normalized_offset_map
 from core.models import AnnotationClass
-from datasets.models import Dataset, Job
+from datasets import text_index
+from datasets.models import Dataset, EmlBlob, Job
 
 COLOR_PALETTE = [
     "#E53E3E", "#DD6B20", "#D69E2E", "#38A169", "#3182CE",
@@ -238,7 +239,7 @@ class Command(BaseCommand):
             eml_text = raw_bytes.decode("latin-1")
 
         # Build offset mapping from raw-stripped to normalized-stripped coordinates
-        norm_stripped, map_fn = build_raw_to_normalized_offset_map(eml_text)
+        norm_stripped, offset_map = build_raw_to_normalized_offset_map(eml_text)
         raw_stripped = eml_text.replace("\r", "")
         file_name = f"{asset_name}.eml"
 
@@ -251,9 +252,15 @@ class Command(BaseCommand):
                 seen.add(key)
                 unique_entities.append(entity)
 
+        # Map all offsets from raw-stripped to normalized-stripped coordinates at once
+        mapped_offsets = offset_map.map_many(
+            [offset for e in unique_entities for offset in (e["BeginOffset"], e["EndOffset"])]
+        )
+        mapped_spans = zip(mapped_offsets[::2], mapped_offsets[1::2])
+
         # Parse and validate entities
         annotation_records = []
-        for entity in unique_entities:
+        for entity, (mapped_start, mapped_end) in zip(unique_entities, mapped_spans):
             start = entity["BeginOffset"]
             end = entity["EndOffset"]
             text = entity["Text"]
@@ -278,10 +285,6 @@ class Command(BaseCommand):
                     )
                 )
 
-            # Map offsets from raw-stripped to normalized-stripped coordinates
-            mapped_start = map_fn(start)
-            mapped_end = map_fn(end)
-
             # Validate mapped offsets against normalized content
             norm_text = norm_stripped[mapped_start:mapped_end]
             if norm_text != text:
@@ -327,15 +330,15 @@ class Command(BaseCommand):
 
         # Create DB records within a savepoint
         with transaction.atomic():
-            job = Job(
+            job = Job.objects.create(
                 dataset=dataset,
                 file_name=file_name,
+                blob=EmlBlob.objects.store(content_hash, eml_text),
                 content_hash=content_hash,
                 status=target_status,
                 assigned_annotator=annotator,
             )
-            job.eml_content = eml_text
-            job.save()
+            text_index.index_documents([(content_hash, norm_stripped)])
 
             existing_hashes.add(content_hash)
 
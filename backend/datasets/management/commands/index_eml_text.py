@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from datasets import text_index
+from datasets.models import EmlBlob
+
+
+class Command(BaseCommand):
+    help = (
+        "Add EML blobs missing from the full-text index, or rebuild the whole "
+        "index (e.g. after NORMALIZER_VERSION changes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Clear the index and re-index every blob",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Blobs indexed per transaction (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        if not text_index.is_supported():
+            raise CommandError("The full-text index requires PostgreSQL or SQLite.")
+        batch_size = options["batch_size"]
+
+        queryset = EmlBlob.objects.order_by("content_hash")
+        if options["rebuild"]:
+            text_index.clear()
+        else:
+            queryset = queryset.exclude(content_hash__in=text_index.indexed_hashes())
+
+        indexed = 0
+        last_hash = ""
+        while batch := list(queryset.filter(content_hash__gt=last_hash)[:batch_size]):
+            # get_normalized() also refreshes each blob's cached normalization
+            documents = [(blob.content_hash, blob.get_normalized()[0]) for blob in batch]
+            with transaction.atomic():
+                text_index.index_documents(documents)
+            indexed += len(batch)
+            last_hash = batch[-1].content_hash
+            self.stdout.write(f"Indexed {indexed} blob(s)...")
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} blob(s)."))
@@ -0,0 +1,127 @@
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from datasets import eml_codecs
+from datasets.models import Dataset, EmlBlob
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompress stored EML payloads and their cached normalizations with another codec "
+        "and report the size change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--codec",
+            choices=eml_codecs.CODECS,
+            default=None,
+            help="Target codec (default: EML_CODEC setting)",
+        )
+        parser.add_argument(
+            "--dataset-id",
+            default=None,
+            help="Only recompress blobs used by this dataset (zstd-dict trains a dictionary for it)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Blobs updated per batch (default: 500)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Compute sizes without writing anything",
+        )
+
+    def handle(self, *args, **options):
+        codec = options["codec"] or settings.EML_CODEC
+        batch_size = options["batch_size"]
+
+        dataset = None
+        queryset = EmlBlob.objects.order_by("content_hash")
+        if options["dataset_id"]:
+            try:
+                dataset = Dataset.objects.get(pk=options["dataset_id"])
+            except (Dataset.DoesNotExist, ValidationError, ValueError):
+                raise CommandError(f"Dataset not found: {options['dataset_id']}")
+            queryset = queryset.filter(jobs__dataset=dataset).distinct()
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("DRY RUN — no DB writes"))
+
+        # A dry run does all the work inside a transaction that is rolled back;
+        # a real run commits batch by batch.
+        with transaction.atomic() if options["dry_run"] else nullcontext():
+            before, after, updated, skipped = self._recompress(
+                queryset, codec, dataset, batch_size
+            )
+            if options["dry_run"]:
+                transaction.set_rollback(True)
+
+        ratio = (after / before * 100) if before else 100.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recompressed {updated} blob(s) to {codec} ({skipped} already up to date): "
+                f"{before:,} → {after:,} bytes ({ratio:.1f}%)"
+            )
+        )
+
+    def _recompress(self, queryset, codec, dataset, batch_size):
+        dictionary = None
+        if codec == eml_codecs.ZSTD_DICT:
+            samples = [
+                eml_codecs.decode(data)
+                for data in queryset.values_list("data", flat=True)[
+                    : settings.EML_ZSTD_DICT_SAMPLES
+                ]
+            ]
+            dictionary = eml_codecs.create_dictionary(samples, dataset=dataset)
+            if dictionary is None:
+                self.stdout.write(
+                    self.style.WARNING("Too few samples to train a dictionary; using plain zstd.")
+                )
+            else:
+                self.stdout.write(f"Trained dictionary {dictionary.pk} from {len(samples)} samples")
+
+        if codec == eml_codecs.ZSTD_DICT and dictionary is not None:
+            target = (eml_codecs.ZSTD_DICT, dictionary.pk)
+        elif codec == eml_codecs.ZLIB:
+            target = (eml_codecs.ZLIB, None)
+        else:
+            target = (eml_codecs.ZSTD, None)
+
+        before = after = updated = skipped = 0
+        pending = []
+        fields = ["data", "normalized_data"]
+        for blob in queryset.only("content_hash", *fields).iterator(chunk_size=batch_size):
+            # The normalization cache is stored with the same codecs as the payload
+            changed = False
+            for field in fields:
+                data = bytes(getattr(blob, field))
+                before += len(data)
+                if data and eml_codecs.codec_of(data) != target:
+                    data = eml_codecs.encode(eml_codecs.decode(data), codec, dictionary)
+                    setattr(blob, field, data)
+                    changed = True
+                after += len(data)
+            if not changed:
+                skipped += 1
+                continue
+
+            pending.append(blob)
+            if len(pending) >= batch_size:
+                EmlBlob.objects.bulk_update(pending, fields)
+                updated += len(pending)
+                pending = []
+
+        if pending:
+            EmlBlob.objects.bulk_update(pending, fields)
+            updated += len(pending)
+
+        return before, after, updated, skipped
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from datasets import status_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the materialized dataset and user job status counters with "
+        "the job table and rewrite any that have drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drift; exit with an error if any is found",
+        )
+
+    def handle(self, *args, **options):
+        differences = status_counts.drift() if options["dry_run"] else status_counts.reconcile()
+
+        for row in differences:
+            role = f" {row['role']}" if row["role"] else ""
+            self.stdout.write(
+                f"{row['counter']} {row['owner']}{role} {row['status']}: "
+                f"stored {row['stored']}, actual {row['actual']}"
+            )
+
+        if not differences:
+            self.stdout.write(self.style.SUCCESS("All status counters match the job table."))
+        elif options["dry_run"]:
+            raise CommandError(f"{len(differences)} status counter(s) have drifted.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Reconciled {len(differences)} status counter(s)."))
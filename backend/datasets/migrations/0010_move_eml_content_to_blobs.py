@@ -0,0 +1,62 @@
+"""Data migration: move inline eml_content_compressed payloads into EmlBlob rows."""
+
+import hashlib
+import zlib
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def move_to_blobs(apps, schema_editor):
+    Job = apps.get_model("datasets", "Job")
+    EmlBlob = apps.get_model("datasets", "EmlBlob")
+
+    def flush(jobs, blobs):
+        EmlBlob.objects.bulk_create(blobs, ignore_conflicts=True)
+        Job.objects.bulk_update(jobs, ["blob", "content_hash"])
+
+    jobs, blobs = [], []
+    queryset = Job.objects.exclude(eml_content_compressed=b"").only(
+        "id", "content_hash", "eml_content_compressed"
+    )
+    for job in queryset.iterator(chunk_size=BATCH_SIZE):
+        data = bytes(job.eml_content_compressed)
+        if not job.content_hash:
+            # Legacy rows predate content hashing; hash the stored text instead.
+            job.content_hash = hashlib.sha256(zlib.decompress(data)).hexdigest()
+        job.blob_id = job.content_hash
+        jobs.append(job)
+        blobs.append(EmlBlob(content_hash=job.content_hash, data=data))
+        if len(jobs) >= BATCH_SIZE:
+            flush(jobs, blobs)
+            jobs, blobs = [], []
+    if jobs:
+        flush(jobs, blobs)
+
+
+def move_to_jobs(apps, schema_editor):
+    Job = apps.get_model("datasets", "Job")
+
+    jobs = []
+    for job in Job.objects.filter(blob__isnull=False).select_related("blob").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        job.eml_content_compressed = bytes(job.blob.data)
+        jobs.append(job)
+        if len(jobs) >= BATCH_SIZE:
+            Job.objects.bulk_update(jobs, ["eml_content_compressed"])
+            jobs = []
+    if jobs:
+        Job.objects.bulk_update(jobs, ["eml_content_compressed"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datasets", "0009_emlblob_job_blob"),
+    ]
+
+    operations = [
+        migrations.RunPython(move_to_blobs, move_to_jobs),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.11 on 2026-10-17 09:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datasets", "0010_move_eml_content_to_blobs"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="job",
+            name="eml_content_compressed",
+        ),
+    ]
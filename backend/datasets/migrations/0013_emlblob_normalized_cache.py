@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-17 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datasets", "0012_compressiondictionary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="emlblob",
+            name="has_encoded_parts",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="emlblob",
+            name="normalized_data",
+            field=models.BinaryField(blank=True, default=b""),
+        ),
+        migrations.AddField(
+            model_name="emlblob",
+            name="normalizer_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.11 on 2026-10-17 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datasets", "0013_emlblob_normalized_cache"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="dataset",
+            index=models.Index(fields=["upload_date", "id"], name="dataset_upload_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["status", "created_at", "id"], name="job_status_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["dataset", "created_at", "id"], name="job_dataset_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["assigned_annotator", "updated_at", "id"],
+                name="job_annotator_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["assigned_qa", "updated_at", "id"], name="job_qa_updated_idx"),
+        ),
+    ]
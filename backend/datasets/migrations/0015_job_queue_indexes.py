@@ -0,0 +1,95 @@
+# Generated by Django 5.2.11 on 2026-10-17 15:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datasets", "0014_keyset_pagination_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["dataset", "status", "created_at", "id"],
+                name="job_dataset_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["assigned_annotator", "status", "updated_at", "id"],
+                name="job_annotator_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["assigned_qa", "status", "updated_at", "id"],
+                name="job_qa_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("status", "ASSIGNED_ANNOTATOR")),
+                fields=["assigned_annotator"],
+                name="job_annotator_workload_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("status", "ASSIGNED_QA")),
+                fields=["assigned_qa"],
+                name="job_qa_workload_idx",
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="job",
+            name="job_annotator_updated_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="job",
+            name="job_qa_updated_idx",
+        ),
+        migrations.AlterField(
+            model_name="job",
+            name="dataset",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="jobs",
+                to="datasets.dataset",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="job",
+            name="assigned_annotator",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="annotator_jobs",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="job",
+            name="assigned_qa",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="qa_jobs",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
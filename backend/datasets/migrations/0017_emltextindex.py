@@ -0,0 +1,37 @@
+# Generated by Django 5.2.11 on 2026-10-17 16:40
+
+from django.db import migrations
+
+# Full-text index over normalized email content (datasets.text_index). It has
+# no model: PostgreSQL stores a tsvector per blob, SQLite an FTS5 table.
+TABLE = "datasets_emltextindex"
+
+
+def create_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE TABLE {TABLE} ("
+            "content_hash varchar(64) PRIMARY KEY "
+            "REFERENCES datasets_emlblob (content_hash) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(f"CREATE INDEX emltextindex_document_idx ON {TABLE} USING gin (document)")
+    elif vendor == "sqlite":
+        schema_editor.execute(f"CREATE VIRTUAL TABLE {TABLE} USING fts5(content_hash UNINDEXED, body)")
+
+
+def drop_text_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ("postgresql", "sqlite"):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datasets", "0016_trigram_search_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_text_index, drop_text_index),
+    ]
@@ -0,0 +1,251 @@
+# Generated by Django 5.2.11 on 2026-10-17 17:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+STATUS_CHOICES = [
+    ("UPLOADED", "Uploaded"),
+    ("ASSIGNED_ANNOTATOR", "Assigned to Annotator"),
+    ("ANNOTATION_IN_PROGRESS", "Annotation in Progress"),
+    ("SUBMITTED_FOR_QA", "Submitted for QA"),
+    ("ASSIGNED_QA", "Assigned to QA"),
+    ("QA_IN_PROGRESS", "QA in Progress"),
+    ("QA_REJECTED", "QA Rejected"),
+    ("QA_ACCEPTED", "QA Accepted"),
+    ("DELIVERED", "Delivered"),
+]
+
+# Row triggers on datasets_job keep the counters in step with every insert,
+# delete and change of status, dataset or assignee.
+
+POSTGRESQL_FORWARDS = [
+    """
+    CREATE FUNCTION job_status_counts_add(
+        p_dataset uuid, p_annotator uuid, p_qa uuid, p_status varchar, p_delta integer
+    ) RETURNS void LANGUAGE plpgsql AS $$
+    BEGIN
+        IF p_delta > 0 THEN
+            INSERT INTO datasets_datasetstatuscount AS c (dataset_id, status, count)
+                VALUES (p_dataset, p_status, p_delta)
+                ON CONFLICT (dataset_id, status) DO UPDATE SET count = c.count + EXCLUDED.count;
+            IF p_annotator IS NOT NULL THEN
+                INSERT INTO datasets_userstatuscount AS c (user_id, role, status, count)
+                    VALUES (p_annotator, 'ANNOTATOR', p_status, p_delta)
+                    ON CONFLICT (user_id, role, status) DO UPDATE SET count = c.count + EXCLUDED.count;
+            END IF;
+            IF p_qa IS NOT NULL THEN
+                INSERT INTO datasets_userstatuscount AS c (user_id, role, status, count)
+                    VALUES (p_qa, 'QA', p_status, p_delta)
+                    ON CONFLICT (user_id, role, status) DO UPDATE SET count = c.count + EXCLUDED.count;
+            END IF;
+        ELSE
+            -- Rows of a dataset or user being deleted may already be gone
+            UPDATE datasets_datasetstatuscount SET count = count + p_delta
+                WHERE dataset_id = p_dataset AND status = p_status;
+            UPDATE datasets_userstatuscount SET count = count + p_delta
+                WHERE user_id = p_annotator AND role = 'ANNOTATOR' AND status = p_status;
+            UPDATE datasets_userstatuscount SET count = count + p_delta
+                WHERE user_id = p_qa AND role = 'QA' AND status = p_status;
+        END IF;
+    END;
+    $$
+    """,
+    """
+    CREATE FUNCTION job_status_counts() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM job_status_counts_add(NEW.dataset_id, NEW.assigned_annotator_id, NEW.assigned_qa_id, NEW.status, 1);
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM job_status_counts_add(OLD.dataset_id, OLD.assigned_annotator_id, OLD.assigned_qa_id, OLD.status, -1);
+        -- Lock the old and new counter rows in the same order whichever way a
+        -- job moves, so opposite transitions cannot deadlock
+        ELSIF ROW(OLD.status, OLD.dataset_id) <= ROW(NEW.status, NEW.dataset_id) THEN
+            PERFORM job_status_counts_add(OLD.dataset_id, OLD.assigned_annotator_id, OLD.assigned_qa_id, OLD.status, -1);
+            PERFORM job_status_counts_add(NEW.dataset_id, NEW.assigned_annotator_id, NEW.assigned_qa_id, NEW.status, 1);
+        ELSE
+            PERFORM job_status_counts_add(NEW.dataset_id, NEW.assigned_annotator_id, NEW.assigned_qa_id, NEW.status, 1);
+            PERFORM job_status_counts_add(OLD.dataset_id, OLD.assigned_annotator_id, OLD.assigned_qa_id, OLD.status, -1);
+        END IF;
+        RETURN NULL;
+    END;
+    $$
+    """,
+    """
+    CREATE TRIGGER job_status_counts_insert_delete AFTER INSERT OR DELETE ON datasets_job
+        FOR EACH ROW EXECUTE FUNCTION job_status_counts()
+    """,
+    """
+    CREATE TRIGGER job_status_counts_update
+        AFTER UPDATE OF status, dataset_id, assigned_annotator_id, assigned_qa_id ON datasets_job
+        FOR EACH ROW
+        WHEN (
+            OLD.status IS DISTINCT FROM NEW.status
+            OR OLD.dataset_id IS DISTINCT FROM NEW.dataset_id
+            OR OLD.assigned_annotator_id IS DISTINCT FROM NEW.assigned_annotator_id
+            OR OLD.assigned_qa_id IS DISTINCT FROM NEW.assigned_qa_id
+        )
+        EXECUTE FUNCTION job_status_counts()
+    """,
+]
+
+POSTGRESQL_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS job_status_counts_update ON datasets_job",
+    "DROP TRIGGER IF EXISTS job_status_counts_insert_delete ON datasets_job",
+    "DROP FUNCTION IF EXISTS job_status_counts()",
+    "DROP FUNCTION IF EXISTS job_status_counts_add(uuid, uuid, uuid, varchar, integer)",
+]
+
+SQLITE_INCREMENT = """
+    INSERT INTO datasets_datasetstatuscount (dataset_id, status, count)
+        VALUES (NEW.dataset_id, NEW.status, 1)
+        ON CONFLICT (dataset_id, status) DO UPDATE SET count = count + 1;
+    INSERT INTO datasets_userstatuscount (user_id, role, status, count)
+        SELECT NEW.assigned_annotator_id, 'ANNOTATOR', NEW.status, 1 WHERE NEW.assigned_annotator_id IS NOT NULL
+        ON CONFLICT (user_id, role, status) DO UPDATE SET count = count + 1;
+    INSERT INTO datasets_userstatuscount (user_id, role, status, count)
+        SELECT NEW.assigned_qa_id, 'QA', NEW.status, 1 WHERE NEW.assigned_qa_id IS NOT NULL
+        ON CONFLICT (user_id, role, status) DO UPDATE SET count = count + 1;
+"""
+
+SQLITE_DECREMENT = """
+    UPDATE datasets_datasetstatuscount SET count = count - 1
+        WHERE dataset_id = OLD.dataset_id AND status = OLD.status;
+    UPDATE datasets_userstatuscount SET count = count - 1
+        WHERE user_id = OLD.assigned_annotator_id AND role = 'ANNOTATOR' AND status = OLD.status;
+    UPDATE datasets_userstatuscount SET count = count - 1
+        WHERE user_id = OLD.assigned_qa_id AND role = 'QA' AND status = OLD.status;
+"""
+
+SQLITE_FORWARDS = [
+    f"CREATE TRIGGER job_status_counts_insert AFTER INSERT ON datasets_job BEGIN {SQLITE_INCREMENT} END",
+    f"CREATE TRIGGER job_status_counts_delete AFTER DELETE ON datasets_job BEGIN {SQLITE_DECREMENT} END",
+    f"""
+    CREATE TRIGGER job_status_counts_update
+        AFTER UPDATE OF status, dataset_id, assigned_annotator_id, assigned_qa_id ON datasets_job
+        WHEN OLD.status IS NOT NEW.status
+            OR OLD.dataset_id IS NOT NEW.dataset_id
+            OR OLD.assigned_annotator_id IS NOT NEW.assigned_annotator_id
+            OR OLD.assigned_qa_id IS NOT NEW.assigned_qa_id
+    BEGIN {SQLITE_DECREMENT} {SQLITE_INCREMENT} END
+    """,
+]
+
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS job_status_counts_update",
+    "DROP TRIGGER IF EXISTS job_status_counts_delete",
+    "DROP TRIGGER IF EXISTS job_status_counts_insert",
+]
+
+
+def create_triggers(apps, schema_editor):
+    statements = {"postgresql": POSTGRESQL_FORWARDS, "sqlite": SQLITE_FORWARDS}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_triggers(apps, schema_editor):
+    statements = {"postgresql": POSTGRESQL_BACKWARDS, "sqlite": SQLITE_BACKWARDS}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def populate_counts(apps, schema_editor):
+    Job = apps.get_model("datasets", "Job")
+    DatasetStatusCount = apps.get_model("datasets", "DatasetStatusCount")
+    UserStatusCount = apps.get_model("datasets", "UserStatusCount")
+
+    DatasetStatusCount.objects.bulk_create(
+        DatasetStatusCount(dataset_id=row["dataset_id"], status=row["status"], count=row["count"])
+        for row in Job.objects.values("dataset_id", "status").annotate(count=Count("id")).order_by()
+    )
+    for role, field in (("ANNOTATOR", "assigned_annotator_id"), ("QA", "assigned_qa_id")):
+        rows = Job.objects.exclude(**{field: None}).values(field, "status").annotate(count=Count("id")).order_by()
+        UserStatusCount.objects.bulk_create(
+            UserStatusCount(user_id=row[field], role=role, status=row["status"], count=row["count"]) for row in rows
+        )
+
+
+def clear_counts(apps, schema_editor):
+    apps.get_model("datasets", "DatasetStatusCount").objects.all().delete()
+    apps.get_model("datasets", "UserStatusCount").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datasets", "0017_emltextindex"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DatasetStatusCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("status", models.CharField(choices=STATUS_CHOICES, max_length=30)),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "dataset",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_counts",
+                        to="datasets.dataset",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("dataset", "status"), name="dataset_status_count_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="UserStatusCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "role",
+                    models.CharField(
+                        choices=[("ANNOTATOR", "Annotator"), ("QA", "QA")], max_length=20
+                    ),
+                ),
+                ("status", models.CharField(choices=STATUS_CHOICES, max_length=30)),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="job_status_counts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "role", "status"), name="user_status_count_unique"
+                    )
+                ],
+            },
+        ),
+        # Triggers first: the job table is locked from here to commit, so no
+        # change can slip in between the backfill and the triggers
+        migrations.RunPython(create_triggers, drop_triggers),
+        migrations.RunPython(populate_counts, clear_counts),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.11 on 2026-10-17 18:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datasets", "0018_status_counts"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["assigned_annotator", "updated_at", "id"],
+                name="job_annotator_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["assigned_qa", "updated_at", "id"], name="job_qa_updated_idx"),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.11 on 2026-10-17 18:20
+
+from django.db import migrations
+
+# SQLite only: FTS5 cannot index its content_hash column, so replacing or
+# removing an entry by hash scanned the whole index. This table maps each
+# hash to the FTS5 rowid of its entry (datasets.text_index).
+TABLE = "datasets_emltextindex"
+KEYS_TABLE = "datasets_emltextindex_keys"
+
+
+def create_keys(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f"CREATE TABLE {KEYS_TABLE} (id integer PRIMARY KEY, content_hash varchar(64) NOT NULL UNIQUE)"
+    )
+    # Keep one entry per hash and key it by that entry's rowid
+    schema_editor.execute(
+        f"DELETE FROM {TABLE} WHERE rowid NOT IN (SELECT MIN(rowid) FROM {TABLE} GROUP BY content_hash)"
+    )
+    schema_editor.execute(f"INSERT INTO {KEYS_TABLE} (id, content_hash) SELECT rowid, content_hash FROM {TABLE}")
+
+
+def drop_keys(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {KEYS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datasets", "0019_job_assignee_updated_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_keys, drop_keys),
+    ]
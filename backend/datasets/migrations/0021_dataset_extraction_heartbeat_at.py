@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datasets", "0020_emltextindex_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataset",
+            name="extraction_heartbeat_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,8 +1,12 @@
 import uuid
-import zlib
 
 from django.conf import settings
 from django.db import models
+from django.utils.functional import cached_property
+
+from core.eml_normalizer import NORMALIZER_VERSION, normalize_eml
+
+from . import eml_codecs
 
 
 class Dataset(models.Model):
@@ -22,11 +26,161 @@ class Dataset(models.Model):
     duplicate_count = models.IntegerField(default=0)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.UPLOADING)
     error_message = models.TextField(blank=True, default="")
+    # Last sign of life from the extraction process; see extraction.fail_stale_extractions
+    extraction_heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["upload_date", "id"], name="dataset_upload_date_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
 
+def compress_eml(value: str, dictionary=None) -> bytes:
+    """Compress decoded .eml text for storage in EmlBlob.data using the EML_CODEC codec."""
+    if not value:
+        return b""
+    return eml_codecs.encode(value.encode("utf-8"), dictionary=dictionary)
+
+
+def decompress_eml(data: bytes) -> str:
+    """Inverse of compress_eml."""
+    if not data:
+        return ""
+    return eml_codecs.decode(data).decode("utf-8")
+
+
+class CompressionDictionary(models.Model):
+    """Trained zstd dictionary referenced by id from zstd-dict encoded payloads."""
+
+    dataset = models.ForeignKey(
+        Dataset, on_delete=models.SET_NULL, null=True, blank=True, related_name="compression_dictionaries"
+    )
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Dictionary {self.pk}"
+
+
+class EmlBlobManager(models.Manager):
+    def store(self, content_hash, eml_content):
+        """
+        Return the blob for content_hash, creating it from eml_content if
+        needed. Call inside the transaction that saves the job linking it
+        (see `store_many`).
+        """
+        blob = self.select_for_update(no_key=True).filter(content_hash=content_hash).first()
+        if blob is None:
+            blob, _ = self.get_or_create(
+                content_hash=content_hash,
+                defaults={"data": compress_eml(eml_content)},
+            )
+        return blob
+
+    def store_many(self, blobs):
+        """
+        Insert unsaved EmlBlob instances, skipping hashes that already exist.
+
+        Existing blobs are row-locked until the caller's transaction ends, so
+        gc_eml_blobs skips them while the jobs linking them are being saved;
+        call inside that transaction. A blob deleted before the lock was
+        taken is inserted again.
+        """
+        hashes = [blob.content_hash for blob in blobs]
+        list(self.select_for_update(no_key=True).filter(content_hash__in=hashes).values_list("pk", flat=True))
+        self.bulk_create(blobs, ignore_conflicts=True)
+
+    def unreferenced(self):
+        """Blobs no Job points at any more (candidates for garbage collection)."""
+        return self.annotate(ref_count=models.Count("jobs")).filter(ref_count=0)
+
+
+class EmlBlob(models.Model):
+    """
+    Content-addressed .eml payload, shared by every Job with the same content.
+
+    Keeping payloads out of the Job table means listing and status queries
+    never read them, and identical emails are stored once across datasets.
+    Unreferenced blobs are removed by the `gc_eml_blobs` command.
+    """
+
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    # Cached normalize_eml() result; empty when it would equal the raw content
+    normalized_data = models.BinaryField(blank=True, default=b"")
+    has_encoded_parts = models.BooleanField(default=False)
+    normalizer_version = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = EmlBlobManager()
+
+    @cached_property
+    def eml_content(self):
+        return decompress_eml(self.data)
+
+    def get_normalized(self):
+        """
+        Return (normalized_content, has_encoded_parts), as normalize_eml would.
+
+        The result is computed on first access and persisted on the blob; it is
+        recomputed whenever NORMALIZER_VERSION changes.
+        """
+        if not self.normalization_is_current:
+            normalized, has_encoded = normalize_eml(self.eml_content)
+            self.cache_normalized(normalized, has_encoded)
+            return normalized, has_encoded
+
+        if not self.normalized_data:
+            return self.eml_content, self.has_encoded_parts
+        return decompress_eml(self.normalized_data), self.has_encoded_parts
+
+    @property
+    def normalization_is_current(self):
+        return self.normalizer_version == NORMALIZER_VERSION
+
+    def set_normalized(self, normalized, has_encoded, eml_content=None):
+        """Fill the normalization cache fields without saving; `eml_content` spares decompressing `data`."""
+        if eml_content is None:
+            eml_content = self.eml_content
+        self.normalized_data = compress_eml(normalized) if normalized != eml_content else b""
+        self.has_encoded_parts = has_encoded
+        self.normalizer_version = NORMALIZER_VERSION
+
+    def cache_normalized(self, normalized, has_encoded):
+        """Persist a normalize_eml() result computed elsewhere (e.g. an export worker)."""
+        self.set_normalized(normalized, has_encoded)
+        EmlBlob.objects.filter(pk=self.pk).update(
+            normalized_data=self.normalized_data,
+            has_encoded_parts=self.has_encoded_parts,
+            normalizer_version=self.normalizer_version,
+        )
+
+    def __str__(self):
+        return self.content_hash
+
+
+class JobQuerySet(models.QuerySet):
+    def with_content(self):
+        """
+        Opt in to loading the .eml payload alongside each job.
+
+        Job querysets never read EmlBlob rows unless asked; use this on paths
+        that actually need `Job.eml_content` to avoid a second query per job.
+        """
+        return self.select_related("blob")
+
+    def queue(self, name, assign_type="ANNOTATION"):
+        """
+        Jobs in an assignment queue: `name` is a key of Job.QUEUE_STATUSES
+        and `assign_type` is ANNOTATION or QA.
+        """
+        statuses = self.model.QUEUE_STATUSES[name]
+        return self.filter(status=statuses["QA" if assign_type == "QA" else "ANNOTATION"])
+
+
 class Job(models.Model):
     class Status(models.TextChoices):
         UPLOADED = "UPLOADED", "Uploaded"
@@ -39,33 +193,134 @@ class Job(models.Model):
         QA_ACCEPTED = "QA_ACCEPTED", "QA Accepted"
         DELIVERED = "DELIVERED", "Delivered"
 
+    # Status listed by each job assignment queue, per assignment type
+    QUEUE_STATUSES = {
+        "unassigned": {"ANNOTATION": Status.UPLOADED, "QA": Status.SUBMITTED_FOR_QA},
+        "assigned": {"ANNOTATION": Status.ASSIGNED_ANNOTATOR, "QA": Status.ASSIGNED_QA},
+        "in_progress": {"ANNOTATION": Status.ANNOTATION_IN_PROGRESS, "QA": Status.QA_IN_PROGRESS},
+    }
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name="jobs")
+    # The composite indexes in Meta lead with dataset and the assignees, so
+    # the foreign keys do not get single-column indexes of their own
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name="jobs", db_index=False)
     file_name = models.CharField(max_length=255)
-    eml_content_compressed = models.BinaryField(blank=True, default=b"")
+    blob = models.ForeignKey(
+        EmlBlob, on_delete=models.PROTECT, null=True, blank=True, related_name="jobs"
+    )
     content_hash = models.CharField(max_length=64, db_index=True, blank=True, default="")
     status = models.CharField(max_length=30, choices=Status.choices, default=Status.UPLOADED)
     assigned_annotator = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="annotator_jobs"
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="annotator_jobs",
+        db_index=False,
     )
     assigned_qa = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="qa_jobs"
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="qa_jobs",
+        db_index=False,
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        # One index per list query: equality filters first, then the keyset
+        # pagination sort key (core.pagination). `explain_queues` checks that
+        # each queue query is answered from these.
+        indexes = [
+            # Assignment queues and the dashboard's per-status counts
+            models.Index(fields=["status", "created_at", "id"], name="job_status_created_idx"),
+            # Assignment queues filtered by dataset, per-dataset status counts
+            models.Index(fields=["dataset", "status", "created_at", "id"], name="job_dataset_status_idx"),
+            # A dataset's job list without a status filter
+            models.Index(fields=["dataset", "created_at", "id"], name="job_dataset_created_idx"),
+            # Annotator and QA "my jobs" lists, which page by (-updated_at, -id)
+            models.Index(fields=["assigned_annotator", "updated_at", "id"], name="job_annotator_updated_idx"),
+            models.Index(fields=["assigned_qa", "updated_at", "id"], name="job_qa_updated_idx"),
+            # The same lists filtered by status
+            models.Index(
+                fields=["assigned_annotator", "status", "updated_at", "id"], name="job_annotator_status_idx"
+            ),
+            models.Index(fields=["assigned_qa", "status", "updated_at", "id"], name="job_qa_status_idx"),
+            # Workloads only count jobs waiting in an assignee's queue
+            models.Index(
+                fields=["assigned_annotator"],
+                condition=models.Q(status="ASSIGNED_ANNOTATOR"),
+                name="job_annotator_workload_idx",
+            ),
+            models.Index(
+                fields=["assigned_qa"],
+                condition=models.Q(status="ASSIGNED_QA"),
+                name="job_qa_workload_idx",
+            ),
+        ]
+
     @property
     def eml_content(self):
-        if not self.eml_content_compressed:
+        if self.blob_id is None:
             return ""
-        return zlib.decompress(self.eml_content_compressed).decode("utf-8")
+        return self.blob.eml_content
 
-    @eml_content.setter
-    def eml_content(self, value):
-        if value:
-            self.eml_content_compressed = zlib.compress(value.encode("utf-8"))
-        else:
-            self.eml_content_compressed = b""
+    def get_normalized_content(self):
+        """Return (normalized_content, has_encoded_parts) from the blob's cached normalization."""
+        if self.blob_id is None:
+            return "", False
+        return self.blob.get_normalized()
 
     def __str__(self):
         return f"{self.file_name} ({self.dataset.name})"
+
+
+class DatasetStatusCount(models.Model):
+    """
+    Number of a dataset's jobs in each status.
+
+    Maintained by triggers on the job table (migration 0018), so every write
+    path, including bulk inserts, queryset updates and deletes, keeps it
+    current in the same transaction. `reconcile_status_counts` detects and
+    repairs drift. On SQLite, a migration that rebuilds the job table drops
+    its triggers and must recreate them.
+    """
+
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name="status_counts", db_index=False)
+    status = models.CharField(max_length=30, choices=Job.Status.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["dataset", "status"], name="dataset_status_count_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.dataset_id} {self.status}: {self.count}"
+
+
+class UserStatusCount(models.Model):
+    """Number of jobs in each status assigned to a user as annotator or QA; see DatasetStatusCount."""
+
+    class Role(models.TextChoices):
+        ANNOTATOR = "ANNOTATOR", "Annotator"
+        QA = "QA", "QA"
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="job_status_counts", db_index=False
+    )
+    role = models.CharField(max_length=20, choices=Role.choices)
+    status = models.CharField(max_length=30, choices=Job.Status.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "role", "status"], name="user_status_count_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.role} {self.status}: {self.count}"
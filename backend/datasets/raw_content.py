@@ -0,0 +1,51 @@
+"""
+Raw/normalized .eml content responses for the annotation and QA workspaces.
+
+Content is immutable per content hash, so responses carry a strong ETag
+derived from the hash, the normalizer version and the requested variant,
+and repeat requests are answered with 304 Not Modified.
+"""
+
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from core.eml_normalizer import NORMALIZER_VERSION
+from core.http import conditional_content_response
+
+VARIANTS = ("both", "raw", "normalized")
+
+
+def raw_content_response(request, job):
+    """
+    Build the raw-content response for a job.
+
+    `?variant=raw|normalized` returns only that copy of the email; the
+    default returns both.
+    """
+    variant = request.query_params.get("variant", "both")
+    if variant not in VARIANTS:
+        return Response(
+            {"detail": f"variant must be one of: {', '.join(VARIANTS)}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if job.blob_id is None:
+        return Response(
+            {"detail": "Email content not available."},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    def get_data():
+        if not job.eml_content:
+            raise NotFound("Email content not available.")
+        normalized_content, has_encoded_parts = job.get_normalized_content()
+        payload = {}
+        if variant != "normalized":
+            payload["raw_content"] = job.eml_content
+        if variant != "raw":
+            payload["normalized_content"] = normalized_content
+        payload["has_encoded_parts"] = has_encoded_parts
+        return payload
+
+    etag = f'"{job.blob_id}-n{NORMALIZER_VERSION}-{variant}"'
+    return conditional_content_response(request, etag, job.created_at, get_data)
@@ -1,6 +1,6 @@
-from django.db.models import Count
 from rest_framework import serializers
 
+from . import status_counts, text_index
 from .models import Dataset, Job
 
 
@@ -29,12 +29,7 @@ class DatasetListSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_status_summary(self, obj):
-        counts = (
-            obj.jobs.values("status")
-            .annotate(count=Count("id"))
-            .order_by("status")
-        )
-        return {item["status"]: item["count"] for item in counts}
+        return status_counts.dataset_summary(obj)
 
 
 class DatasetDetailSerializer(serializers.ModelSerializer):
@@ -57,12 +52,7 @@ class DatasetDetailSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_status_summary(self, obj):
-        counts = (
-            obj.jobs.values("status")
-            .annotate(count=Count("id"))
-            .order_by("status")
-        )
-        return {item["status"]: item["count"] for item in counts}
+        return status_counts.dataset_summary(obj)
 
 
 class DatasetUploadSerializer(serializers.Serializer):
@@ -126,3 +116,41 @@ class JobDetailSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = fields
+
+
+class JobTextSearchParamsSerializer(serializers.Serializer):
+    q = serializers.CharField()
+    dataset_id = serializers.UUIDField(required=False)
+    # Comma-separated job statuses
+    status = serializers.CharField(required=False)
+    # Jobs whose latest annotation version has a span of this class
+    annotation_class = serializers.UUIDField(required=False)
+
+    def validate_status(self, value):
+        statuses = [s.strip() for s in value.split(",") if s.strip()]
+        unknown = [s for s in statuses if s not in Job.Status.values]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown status: {', '.join(unknown)}")
+        return statuses
+
+
+class JobTextSearchSerializer(serializers.ModelSerializer):
+    dataset_name = serializers.CharField(source="dataset.name", read_only=True)
+    snippets = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "dataset",
+            "dataset_name",
+            "file_name",
+            "status",
+            "created_at",
+            "snippets",
+        ]
+        read_only_fields = fields
+
+    def get_snippets(self, obj):
+        normalized, _ = obj.get_normalized_content()
+        return text_index.snippets(normalized, self.context["query"])
@@ -0,0 +1,125 @@
+"""
+Materialized job counts per dataset and status, and per assignee and status.
+
+DatasetStatusCount and UserStatusCount are kept current by row triggers on
+the job table (migration 0018), so reading a dataset's status summary or a
+user's queue counts is a primary-key lookup instead of a GROUP BY over its
+jobs. Counter rows are never deleted by the triggers; a count may be 0.
+
+`drift()` compares the counters with a fresh aggregate of the job table and
+`reconcile()` rewrites any that differ (the `reconcile_status_counts`
+command runs both).
+"""
+
+from collections import defaultdict
+
+from django.db import connections, transaction
+from django.db.models import Count, Sum
+
+from .models import DatasetStatusCount, Job, UserStatusCount
+
+ROLE_FIELDS = {
+    UserStatusCount.Role.ANNOTATOR: "assigned_annotator_id",
+    UserStatusCount.Role.QA: "assigned_qa_id",
+}
+
+
+def summary(counters) -> dict:
+    """{status: count} of (status, count) pairs, zero counts left out, ordered by status."""
+    return {status: count for status, count in sorted(counters) if count > 0}
+
+
+def dataset_summary(dataset) -> dict:
+    """A dataset's status summary; uses `status_counts` if prefetched."""
+    return summary((row.status, row.count) for row in dataset.status_counts.all())
+
+
+def status_totals(dataset_id=None) -> dict:
+    """{status: count} over all jobs, or over one dataset's jobs."""
+    queryset = DatasetStatusCount.objects.filter(count__gt=0)
+    if dataset_id:
+        queryset = queryset.filter(dataset_id=dataset_id)
+    rows = queryset.values("status").annotate(total=Sum("count")).order_by()
+    return summary((row["status"], row["total"]) for row in rows)
+
+
+def user_status_counts(user, role) -> dict:
+    """{status: count} of the jobs assigned to `user` in `role`."""
+    rows = UserStatusCount.objects.filter(user=user, role=role, count__gt=0).values_list("status", "count")
+    return summary(rows)
+
+
+def counts_by_user(role, users=None) -> dict:
+    """{user_id: {status: count}} for every user with jobs in `role`, optionally only `users`."""
+    queryset = UserStatusCount.objects.filter(role=role, count__gt=0)
+    if users is not None:
+        queryset = queryset.filter(user__in=users)
+    result = defaultdict(dict)
+    for user_id, status, count in queryset.values_list("user_id", "status", "count"):
+        result[user_id][status] = count
+    return result
+
+
+def _expected():
+    """Counter values computed from the job table, keyed as in `_stored()`."""
+    expected = {}
+    for row in Job.objects.values("dataset_id", "status").annotate(count=Count("id")).order_by():
+        expected[(DatasetStatusCount, row["dataset_id"], None, row["status"])] = row["count"]
+    for role, field in ROLE_FIELDS.items():
+        rows = Job.objects.exclude(**{field: None}).values(field, "status").annotate(count=Count("id")).order_by()
+        for row in rows:
+            expected[(UserStatusCount, row[field], role, row["status"])] = row["count"]
+    return expected
+
+
+def _stored():
+    stored = {}
+    for dataset_id, status, count in DatasetStatusCount.objects.values_list("dataset_id", "status", "count"):
+        stored[(DatasetStatusCount, dataset_id, None, status)] = count
+    for user_id, role, status, count in UserStatusCount.objects.values_list("user_id", "role", "status", "count"):
+        stored[(UserStatusCount, user_id, role, status)] = count
+    return stored
+
+
+def drift() -> list[dict]:
+    """Counters that disagree with the job table, as {counter, owner, role, status, stored, actual}."""
+    expected = _expected()
+    stored = _stored()
+    differences = []
+    for key in expected.keys() | stored.keys():
+        actual = expected.get(key, 0)
+        current = stored.get(key, 0)
+        if actual != current:
+            model, owner, role, status = key
+            differences.append(
+                {
+                    "counter": model.__name__,
+                    "owner": owner,
+                    "role": role,
+                    "status": status,
+                    "stored": current,
+                    "actual": actual,
+                    "key": key,
+                }
+            )
+    return sorted(differences, key=lambda row: (row["counter"], str(row["owner"]), row["role"] or "", row["status"]))
+
+
+@transaction.atomic
+def reconcile() -> list[dict]:
+    """Rewrite every drifted counter from the job table; returns the drift that was fixed."""
+    connection = connections[Job.objects.db]
+    if connection.vendor == "postgresql":
+        # Block job writes (not reads) so the aggregate and the fix agree
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {connection.ops.quote_name(Job._meta.db_table)} IN SHARE MODE")
+
+    differences = drift()
+    for row in differences:
+        model, owner, role, status = row["key"]
+        if model is DatasetStatusCount:
+            lookup = {"dataset_id": owner, "status": status}
+        else:
+            lookup = {"user_id": owner, "role": role, "status": status}
+        model.objects.update_or_create(defaults={"count": row["actual"]}, **lookup)
+    return differences
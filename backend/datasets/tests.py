@@ -1,3 +1,802 @@
-from django.test import TestCase
+import base64
+import gzip
+import hashlib
+import io
+import json
+import random
+import tempfile
+import threading
+import zipfile
+import zlib
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from annotations.models import Annotation, AnnotationVersion
+from core.models import AnnotationClass
+
+from . import eml_codecs, status_counts, text_index
+from . import extraction
+from .extraction import extract_dataset, fail_stale_extractions, get_upload_path
+from .management.commands.explain_queues import explain
+from .models import (
+    CompressionDictionary,
+    Dataset,
+    DatasetStatusCount,
+    EmlBlob,
+    Job,
+    UserStatusCount,
+    decompress_eml,
+)
+
+SAMPLE_EML = (
+    "From: alice@example.com\r\n"
+    "To: bob@example.com\r\n"
+    "Subject: Hello\r\n"
+    "\r\n"
+    "Hi Bob, call me at 555-0100.\r\n"
+)
+
+
+class ListingPayloadTests(APITestCase):
+    """Listing endpoints must never read .eml payloads from the blob table."""
+
+    BLOB_TABLE = EmlBlob._meta.db_table
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@example.com", name="Admin", password="pw", role=User.Role.ADMIN
+        )
+        cls.annotator = User.objects.create_user(
+            email="annotator@example.com", name="Annotator", password="pw", role=User.Role.ANNOTATOR
+        )
+        cls.qa = User.objects.create_user(
+            email="qa@example.com", name="QA", password="pw", role=User.Role.QA
+        )
+        cls.dataset = Dataset.objects.create(
+            name="listing", uploaded_by=cls.admin, status=Dataset.Status.READY
+        )
+
+        statuses = [
+            (Job.Status.UPLOADED, None, None),
+            (Job.Status.ASSIGNED_ANNOTATOR, cls.annotator, None),
+            (Job.Status.ANNOTATION_IN_PROGRESS, cls.annotator, None),
+            (Job.Status.SUBMITTED_FOR_QA, cls.annotator, None),
+            (Job.Status.ASSIGNED_QA, cls.annotator, cls.qa),
+            (Job.Status.QA_IN_PROGRESS, cls.annotator, cls.qa),
+            (Job.Status.DELIVERED, cls.annotator, cls.qa),
+        ]
+        for i, (job_status, annotator, qa) in enumerate(statuses):
+            content = SAMPLE_EML.replace("Hello", f"Hello {i}")
+            content_hash = f"{i:064d}"
+            Job.objects.create(
+                dataset=cls.dataset,
+                file_name=f"email_{i}.eml",
+                blob=EmlBlob.objects.store(content_hash, content),
+                content_hash=content_hash,
+                status=job_status,
+                assigned_annotator=annotator,
+                assigned_qa=qa,
+            )
+
+    def assert_no_payload_reads(self, user, url):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        offending = [q["sql"] for q in ctx.captured_queries if self.BLOB_TABLE in q["sql"]]
+        self.assertEqual(offending, [], f"{url} read the blob table")
+
+    def test_admin_listings(self):
+        urls = [
+            "/api/datasets/",
+            f"/api/datasets/{self.dataset.id}/jobs/",
+            f"/api/exports/datasets/{self.dataset.id}/jobs/",
+        ]
+        for queue in ("unassigned", "assigned", "in-progress"):
+            for assign_type in ("ANNOTATION", "QA"):
+                urls.append(f"/api/jobs/{queue}/?type={assign_type}")
+        for url in urls:
+            with self.subTest(url=url):
+                self.assert_no_payload_reads(self.admin, url)
+
+    def test_annotator_my_jobs(self):
+        self.assert_no_payload_reads(self.annotator, "/api/annotations/my-jobs/")
+
+    def test_qa_my_jobs(self):
+        self.assert_no_payload_reads(self.qa, "/api/qa/my-jobs/")
+
+    def test_raw_content_loads_payload_in_one_query(self):
+        job = Job.objects.get(status=Job.Status.DELIVERED)
+        self.client.force_authenticate(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"/api/jobs/{job.id}/raw-content/")
+        self.assertEqual(response.status_code, 200)
+        blob_queries = [q for q in ctx.captured_queries if self.BLOB_TABLE in q["sql"]]
+        self.assertEqual(len(blob_queries), 1)
+
+
+class RawContentResponseTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.annotator = User.objects.create_user(
+            email="annotator@example.com", name="Annotator", password="pw", role=User.Role.ANNOTATOR
+        )
+        dataset = Dataset.objects.create(name="raw", uploaded_by=cls.annotator, status=Dataset.Status.READY)
+        content = SAMPLE_EML + "Thanks again.\r\n" * 200
+        cls.job = cls.create_job(dataset, "email.eml", content)
+        cls.empty = cls.create_job(dataset, "empty.eml", "")
+
+    @classmethod
+    def create_job(cls, dataset, file_name, content):
+        content_hash = hashlib.sha256(content.encode()).hexdigest()
+        return Job.objects.create(
+            dataset=dataset,
+            file_name=file_name,
+            blob=EmlBlob.objects.store(content_hash, content),
+            content_hash=content_hash,
+            status=Job.Status.ASSIGNED_ANNOTATOR,
+            assigned_annotator=cls.annotator,
+        )
+
+    def get(self, job, **headers):
+        self.client.force_authenticate(self.annotator)
+        return self.client.get(f"/api/annotations/jobs/{job.id}/raw-content/", **headers)
+
+    def test_revalidation(self):
+        response = self.get(self.job)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["raw_content"], self.job.eml_content)
+        self.assertEqual(self.get(self.job, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_compressed_body(self):
+        response = self.get(self.job, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertTrue(response["ETag"].endswith('-gzip"'))
+        payload = json.loads(gzip.decompress(response.content))
+        self.assertEqual(payload["raw_content"], self.job.eml_content)
+
+    def test_errors_use_api_format(self):
+        response = self.get(self.empty)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"detail": "Email content not available."})
+
+        self.client.force_authenticate(self.annotator)
+        response = self.client.get(f"/api/annotations/jobs/{self.job.id}/raw-content/?variant=nope")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("detail", response.json())
+
+
+def _sample_emails(count, seed=0):
+    rnd = random.Random(seed)
+    words = ["invoice", "meeting", "Tuesday", "budget", "report", "call", "thanks", "regards", "project"]
+    return [
+        (
+            f"From: sender{i}@example.com\r\nTo: team@example.com\r\nSubject: {rnd.choice(words)} {i}\r\n"
+            "Content-Type: text/plain; charset=utf-8\r\n\r\n"
+            + " ".join(rnd.choice(words) for _ in range(rnd.randint(50, 300)))
+            + f"\r\nCall me at 555-{i:04d}.\r\n"
+        ).encode()
+        for i in range(count)
+    ]
+
+
+@skipUnless(eml_codecs.zstandard, "zstd codecs need the zstandard package")
+class EmlCodecTests(TestCase):
+    def test_round_trips(self):
+        samples = _sample_emails(60)
+        dictionary = eml_codecs.create_dictionary(samples)
+        self.assertIsNotNone(dictionary)
+        for codec, expected in [
+            (eml_codecs.ZLIB, (eml_codecs.ZLIB, None)),
+            (eml_codecs.ZSTD, (eml_codecs.ZSTD, None)),
+            (eml_codecs.ZSTD_DICT, (eml_codecs.ZSTD_DICT, dictionary.pk)),
+        ]:
+            with self.subTest(codec=codec):
+                for sample in samples[:5] + [b"", "Zo\u00eb \u2013 caf\u00e9".encode()]:
+                    encoded = eml_codecs.encode(sample, codec, dictionary)
+                    self.assertEqual(eml_codecs.codec_of(encoded), expected)
+                    self.assertEqual(eml_codecs.decode(encoded), sample)
+
+    def test_zstd_dict_without_dictionary_is_plain_zstd(self):
+        encoded = eml_codecs.encode(b"hello", eml_codecs.ZSTD_DICT)
+        self.assertEqual(eml_codecs.codec_of(encoded), (eml_codecs.ZSTD, None))
+        self.assertEqual(eml_codecs.decode(encoded), b"hello")
+
+    def test_legacy_untagged_zlib(self):
+        legacy = zlib.compress(SAMPLE_EML.encode())
+        self.assertEqual(legacy[0], 0x78)
+        self.assertEqual(eml_codecs.codec_of(legacy), (eml_codecs.ZLIB, None))
+        self.assertEqual(decompress_eml(legacy), SAMPLE_EML)
+
+    def test_too_few_samples_train_no_dictionary(self):
+        self.assertIsNone(eml_codecs.create_dictionary(_sample_emails(eml_codecs.MIN_DICTIONARY_SAMPLES - 1)))
+
+
+@skipUnless(eml_codecs.zstandard, "zstd codecs need the zstandard package")
+class RecompressEmlBlobsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_user(email="admin@example.com", name="Admin", password="pw")
+        cls.dataset = Dataset.objects.create(name="codecs", uploaded_by=admin, status=Dataset.Status.READY)
+        cls.contents = {}
+        for i, sample in enumerate(_sample_emails(40)):
+            content_hash = hashlib.sha256(sample).hexdigest()
+            # The oldest blobs predate codec tags
+            data = zlib.compress(sample) if i % 4 == 0 else eml_codecs.encode(sample, eml_codecs.ZLIB)
+            blob = EmlBlob.objects.create(content_hash=content_hash, data=data)
+            Job.objects.create(
+                dataset=cls.dataset, file_name=f"{i}.eml", blob_id=content_hash, content_hash=content_hash
+            )
+            cls.contents[content_hash] = sample.decode()
+            if i % 2:
+                # A cached normalization that differs from the payload
+                blob.normalized_data = eml_codecs.encode(sample.upper(), eml_codecs.ZLIB)
+                blob.save(update_fields=["normalized_data"])
+
+    def recompress(self, *args):
+        out = StringIO()
+        call_command("recompress_eml_blobs", *args, stdout=out)
+        return out.getvalue()
+
+    def assert_codecs(self, expected):
+        rows = EmlBlob.objects.values_list("content_hash", "data", "normalized_data")
+        for content_hash, data, normalized_data in rows:
+            self.assertEqual(eml_codecs.codec_of(bytes(data)), expected)
+            self.assertEqual(decompress_eml(data), self.contents[content_hash])
+            if normalized_data:
+                self.assertEqual(eml_codecs.codec_of(bytes(normalized_data)), expected)
+                self.assertEqual(decompress_eml(normalized_data), self.contents[content_hash].upper())
+        self.assertEqual(EmlBlob.objects.exclude(normalized_data=b"").count(), 20)
+
+    def test_dry_run_writes_nothing(self):
+        def stored():
+            rows = EmlBlob.objects.values_list("content_hash", "data", "normalized_data")
+            return {content_hash: (bytes(data), bytes(normalized)) for content_hash, data, normalized in rows}
+
+        before = stored()
+        self.assertIn("Recompressed 40 blob(s) to zstd", self.recompress("--codec", "zstd", "--dry-run"))
+        self.assertEqual(stored(), before)
+
+    def test_recompress(self):
+        self.recompress("--codec", "zstd", "--batch-size", "7")
+        self.assert_codecs((eml_codecs.ZSTD, None))
+        self.assertIn("(40 already up to date)", self.recompress("--codec", "zstd"))
+
+    @override_settings(EML_ZSTD_DICT_SAMPLES=30)
+    def test_recompress_with_dataset_dictionary(self):
+        output = self.recompress("--codec", "zstd-dict", "--dataset-id", str(self.dataset.id))
+        dictionary = CompressionDictionary.objects.get(dataset=self.dataset)
+        self.assertIn(f"Trained dictionary {dictionary.pk} from 30 samples", output)
+        self.assert_codecs((eml_codecs.ZSTD_DICT, dictionary.pk))
+
+        self.recompress("--codec", "zlib")
+        self.assert_codecs((eml_codecs.ZLIB, None))
+
+    def test_unknown_dataset(self):
+        with self.assertRaises(CommandError):
+            self.recompress("--dataset-id", "nope")
+
+
+def _zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, content in members:
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+
+class ExtractionTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@example.com", name="Admin", password="pw", role=User.Role.ADMIN
+        )
+
+    def setUp(self):
+        upload_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(upload_dir.cleanup)
+        self.enterContext(override_settings(DATASET_UPLOAD_DIR=Path(upload_dir.name)))
+
+    def members(self):
+        emails = [sample.decode() for sample in _sample_emails(12)]
+        return (
+            [(f"inbox/{i}.eml", email) for i, email in enumerate(emails)]
+            + [("copy/0.eml", emails[0]), ("0.eml", emails[1]), ("notes.txt", "not an email"), ("empty/", "")]
+        )
+
+    def extract(self, name, members, **kwargs):
+        dataset = Dataset.objects.create(name=name, uploaded_by=self.admin, status=Dataset.Status.EXTRACTING)
+        path = get_upload_path(dataset)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(_zip_bytes(members))
+        extract_dataset(dataset, path, **kwargs)
+        self.assertFalse(path.exists())
+        dataset.refresh_from_db()
+        return dataset
+
+    def test_spooled_upload(self):
+        self.client.force_authenticate(self.admin)
+        upload = SimpleUploadedFile("emails.zip", _zip_bytes(self.members()), content_type="application/zip")
+        with override_settings(BACKGROUND_TASKS_INLINE=True), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/datasets/upload/", {"name": "uploaded", "file": upload})
+        self.assertEqual(response.status_code, 201)
+
+        status_response = self.client.get(f"/api/datasets/{response.data['id']}/status/")
+        self.assertEqual(status_response.data["status"], Dataset.Status.READY)
+        self.assertEqual(status_response.data["file_count"], 12)
+        # Only duplicates of stored content are counted, not repeats within the archive
+        self.assertEqual(status_response.data["duplicate_count"], 0)
+        self.assertFalse(get_upload_path(Dataset.objects.get(pk=response.data["id"])).exists())
+
+    def test_intra_zip_and_global_dedup(self):
+        dataset = self.extract("first", self.members(), batch_size=5)
+        self.assertEqual(dataset.status, Dataset.Status.READY)
+        self.assertEqual((dataset.file_count, dataset.duplicate_count), (12, 0))
+        jobs = Job.objects.filter(dataset=dataset)
+        # First occurrence wins; repeated base names get a suffix
+        self.assertEqual(jobs.filter(file_name__in=["0.eml", "1.eml"]).count(), 2)
+        self.assertFalse(jobs.filter(file_name="0_1.eml").exists())
+        for job in jobs:
+            self.assertEqual(job.content_hash, hashlib.sha256(job.eml_content.encode()).hexdigest())
+            self.assertTrue(job.blob.normalization_is_current)
+
+        new = "From: new@example.com\r\n\r\nA new email.\r\n"
+        second = self.extract("second", self.members()[:3] + [("new.eml", new)])
+        self.assertEqual((second.file_count, second.duplicate_count), (1, 3))
+        self.assertEqual(Job.objects.get(dataset=second).eml_content, new)
+
+    def test_threaded_preparation_matches_serial(self):
+        members = self.members()
+        serial = self.extract("serial", members, batch_size=4, workers=1)
+        rows = sorted(Job.objects.filter(dataset=serial).values_list("file_name", "content_hash"))
+        Job.objects.filter(dataset=serial).delete()
+
+        threaded = self.extract("threaded", members, batch_size=4, workers=4)
+        threaded_rows = Job.objects.filter(dataset=threaded).values_list("file_name", "content_hash")
+        self.assertEqual(sorted(threaded_rows), rows)
+        self.assertEqual((threaded.file_count, threaded.duplicate_count), (12, 0))
+
+    def test_invalid_archive_fails(self):
+        dataset = Dataset.objects.create(name="bad", uploaded_by=self.admin, status=Dataset.Status.EXTRACTING)
+        path = get_upload_path(dataset)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"not a zip")
+        extract_dataset(dataset, path)
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.status, Dataset.Status.FAILED)
+        self.assertFalse(path.exists())
+
+    @override_settings(EXTRACTION_STALE_SECONDS=600)
+    def test_stale_extraction_is_failed(self):
+        now = timezone.now()
+        stale = Dataset.objects.create(
+            name="stale",
+            uploaded_by=self.admin,
+            status=Dataset.Status.EXTRACTING,
+            extraction_heartbeat_at=now - timedelta(minutes=11),
+        )
+        Job.objects.create(dataset=stale, file_name="partial.eml")
+        spooled = get_upload_path(stale)
+        spooled.parent.mkdir(parents=True, exist_ok=True)
+        spooled.write_bytes(b"zip")
+        running = Dataset.objects.create(
+            name="running",
+            uploaded_by=self.admin,
+            status=Dataset.Status.EXTRACTING,
+            extraction_heartbeat_at=now - timedelta(minutes=9),
+        )
+
+        # Polling the status does not touch the dataset
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(f"/api/datasets/{stale.id}/status/")
+        self.assertEqual(response.data["status"], Dataset.Status.EXTRACTING)
+        self.assertTrue(stale.jobs.exists())
+
+        out = StringIO()
+        call_command("fail_stale_extractions", stdout=out)
+        self.assertIn("Failed 1 stale extraction(s).", out.getvalue())
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, Dataset.Status.FAILED)
+        self.assertIn("10 minutes", stale.error_message)
+        self.assertFalse(stale.jobs.exists())
+        self.assertFalse(spooled.exists())
+        running.refresh_from_db()
+        self.assertEqual(running.status, Dataset.Status.EXTRACTING)
+        self.assertEqual(fail_stale_extractions(), [])
+
+    def test_extraction_stops_once_failed_elsewhere(self):
+        insert_batch = extraction._insert_batch
+
+        def insert_then_fail(batch):
+            inserted = insert_batch(batch)
+            Dataset.objects.filter(name="abandoned").update(status=Dataset.Status.FAILED, error_message="stale")
+            return inserted
+
+        with mock.patch.object(extraction, "_insert_batch", side_effect=insert_then_fail) as patched:
+            dataset = self.extract("abandoned", self.members(), batch_size=4)
+        self.assertEqual(patched.call_count, 1)
+        self.assertEqual((dataset.status, dataset.error_message), (Dataset.Status.FAILED, "stale"))
+        self.assertFalse(dataset.jobs.exists())
+
+
+class GcEmlBlobsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_user(email="admin@example.com", name="Admin", password="pw")
+        dataset = Dataset.objects.create(name="gc", uploaded_by=admin, status=Dataset.Status.READY)
+        cls.hashes = []
+        for i, sample in enumerate(_sample_emails(5)):
+            content_hash = hashlib.sha256(sample).hexdigest()
+            EmlBlob.objects.store(content_hash, sample.decode())
+            text_index.index_documents([(content_hash, sample.decode())])
+            if i < 2:
+                Job.objects.create(
+                    dataset=dataset, file_name=f"{i}.eml", blob_id=content_hash, content_hash=content_hash
+                )
+            cls.hashes.append(content_hash)
+
+    def gc(self, *args):
+        out = StringIO()
+        call_command("gc_eml_blobs", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run(self):
+        self.assertIn("Found 3 unreferenced blob(s).", self.gc("--dry-run"))
+        self.assertEqual(EmlBlob.objects.count(), 5)
+
+    def test_deletes_unreferenced_blobs_and_their_index_entries(self):
+        self.assertIn("Deleted 3 blob(s).", self.gc("--batch-size", "2"))
+        self.assertEqual(set(EmlBlob.objects.values_list("content_hash", flat=True)), set(self.hashes[:2]))
+        self.assertEqual(
+            set(EmlBlob.objects.filter(content_hash__in=text_index.indexed_hashes()).values_list("pk", flat=True)),
+            set(self.hashes[:2]),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {text_index.TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 2)
+        self.assertIn("Found 0 unreferenced blob(s).", self.gc())
+
+    def test_blob_linked_after_the_scan_is_kept(self):
+        linked = self.hashes[2]
+        scan = EmlBlob.objects.unreferenced
+
+        def unreferenced():
+            hashes = list(scan().values_list("content_hash", flat=True))
+            # An extraction links one of the blobs before the delete
+            Job.objects.create(
+                dataset=Dataset.objects.get(), file_name="late.eml", blob_id=linked, content_hash=linked
+            )
+            return EmlBlob.objects.filter(content_hash__in=hashes)
+
+        with mock.patch.object(EmlBlob.objects, "unreferenced", unreferenced):
+            self.assertIn("Deleted 2 blob(s).", self.gc())
+        self.assertTrue(EmlBlob.objects.filter(pk=linked).exists())
+        self.assertTrue(EmlBlob.objects.filter(pk=linked, content_hash__in=text_index.indexed_hashes()).exists())
+
+
+@skipUnless(connection.vendor == "postgresql", "Row locks need PostgreSQL")
+class GcEmlBlobsConcurrencyTests(TransactionTestCase):
+    def test_blob_being_linked_by_an_extraction_is_kept(self):
+        admin = User.objects.create_user(email="admin@example.com", name="Admin", password="pw")
+        dataset = Dataset.objects.create(name="gc", uploaded_by=admin, status=Dataset.Status.EXTRACTING)
+        linked, orphan = (EmlBlob.objects.create(content_hash=f"{i:064d}", data=b"") for i in range(2))
+        locked, collected = threading.Event(), threading.Event()
+
+        def extraction():
+            try:
+                with transaction.atomic():
+                    # Deduplicated against the existing blob, not yet linked
+                    EmlBlob.objects.store_many([EmlBlob(content_hash=linked.pk, data=b"")])
+                    locked.set()
+                    collected.wait(10)
+                    Job.objects.create(dataset=dataset, file_name="a.eml", blob=linked, content_hash=linked.pk)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=extraction)
+        thread.start()
+        self.assertTrue(locked.wait(10))
+        out = StringIO()
+        call_command("gc_eml_blobs", stdout=out)
+        collected.set()
+        thread.join()
+
+        self.assertIn("Deleted 1 blob(s).", out.getvalue())
+        self.assertEqual(list(EmlBlob.objects.values_list("pk", flat=True)), [linked.pk])
+        self.assertTrue(Job.objects.filter(blob=linked).exists())
+        self.assertFalse(EmlBlob.objects.filter(pk=orphan.pk).exists())
+
+
+class MoveEmlContentToBlobsMigrationTests(TransactionTestCase):
+    """Migration 0010 moves inline payloads into shared EmlBlob rows, and back."""
+
+    before = [("datasets", "0009_emlblob_job_blob")]
+    after = [("datasets", "0010_move_eml_content_to_blobs")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_forwards_and_backwards(self):
+        apps = self.migrate(self.before)
+        User = apps.get_model("accounts", "User")
+        Dataset = apps.get_model("datasets", "Dataset")
+        Job = apps.get_model("datasets", "Job")
+        dataset = Dataset.objects.create(name="legacy", uploaded_by=User.objects.create(email="a@example.com"))
+        first, second = (SAMPLE_EML + f"{i}\r\n" for i in range(2))
+        hashed = Job.objects.create(
+            dataset=dataset,
+            file_name="hashed.eml",
+            content_hash=hashlib.sha256(first.encode()).hexdigest(),
+            eml_content_compressed=zlib.compress(first.encode()),
+        )
+        # Rows from before content hashing, one sharing the first job's content
+        unhashed = Job.objects.create(
+            dataset=dataset, file_name="unhashed.eml", eml_content_compressed=zlib.compress(second.encode())
+        )
+        shared = Job.objects.create(
+            dataset=dataset, file_name="shared.eml", eml_content_compressed=zlib.compress(first.encode())
+        )
+        empty = Job.objects.create(dataset=dataset, file_name="empty.eml")
+
+        apps = self.migrate(self.after)
+        Job = apps.get_model("datasets", "Job")
+        EmlBlob = apps.get_model("datasets", "EmlBlob")
+        self.assertEqual(EmlBlob.objects.count(), 2)
+        for job_id, content in ((hashed.id, first), (unhashed.id, second), (shared.id, first)):
+            job = Job.objects.select_related("blob").get(id=job_id)
+            self.assertEqual(job.blob_id, hashlib.sha256(content.encode()).hexdigest())
+            self.assertEqual(job.content_hash, job.blob_id)
+            self.assertEqual(decompress_eml(job.blob.data), content)
+        self.assertIsNone(Job.objects.get(id=empty.id).blob_id)
+
+        apps = self.migrate(self.before)
+        Job = apps.get_model("datasets", "Job")
+        self.assertEqual(zlib.decompress(Job.objects.get(id=unhashed.id).eml_content_compressed), second.encode())
+        self.assertEqual(bytes(Job.objects.get(id=empty.id).eml_content_compressed), b"")
+
+
+class QueueQueryPlanTests(TestCase):
+    def test_queue_queries_use_indexes(self):
+        out = StringIO()
+        call_command("explain_queues", seed=2000, stdout=out)
+        self.assertIn("All queue queries use an index.", out.getvalue())
+        # Seeded rows are rolled back
+        self.assertFalse(Job.objects.exists())
+
+    def test_full_table_scan_is_flagged(self):
+        _, problems, _ = explain(Job.objects.filter(file_name="email.eml"), Job._meta.db_table)
+        self.assertIn("seq scan", problems)
+
+    def test_sort_is_flagged(self):
+        # Served by an index on status, but not in the requested order
+        queryset = Job.objects.filter(status=Job.Status.UPLOADED).order_by("-file_name")[:20]
+        _, problems, _ = explain(queryset, Job._meta.db_table)
+        self.assertEqual(problems, ["sort"])
+
+
+class TextSearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@example.com", name="Admin", password="pw", role=User.Role.ADMIN
+        )
+        cls.qa = User.objects.create_user(email="qa@example.com", name="QA", password="pw", role=User.Role.QA)
+        cls.dataset = Dataset.objects.create(name="search", uploaded_by=cls.admin, status=Dataset.Status.EXTRACTING)
+
+        # The phone number of the first email is only visible once its base64 part is decoded
+        encoded = base64.b64encode(b"Please call Carol on 555-0199 today.").decode()
+        emails = {
+            "encoded.eml": (
+                "From: a@example.com\r\nSubject: Call\r\nContent-Type: text/plain\r\n"
+                f"Content-Transfer-Encoding: base64\r\n\r\n{encoded}\r\n"
+            ),
+            "plain.eml": "From: b@example.com\r\nSubject: Lunch\r\n\r\nCarol, lunch at noon?\r\n",
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "upload.zip"
+            with zipfile.ZipFile(path, "w") as zf:
+                for name, content in emails.items():
+                    zf.writestr(name, content)
+            extract_dataset(cls.dataset, path)
+        cls.encoded = Job.objects.get(file_name="encoded.eml")
+        cls.plain = Job.objects.get(file_name="plain.eml")
+
+    def search(self, user=None, **params):
+        self.client.force_authenticate(user or self.admin)
+        return self.client.get("/api/jobs/search/", params)
+
+    def test_ingest_indexes_normalized_text(self):
+        response = self.search(q="555-0199")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job["id"] for job in response.data["results"]], [str(self.encoded.id)])
+        snippet = response.data["results"][0]["snippets"][0]
+        (start, end), = snippet["highlights"]
+        self.assertEqual(snippet["text"][start:end], "555-0199")
+
+    def test_ingest_caches_normalization(self):
+        for job in (self.encoded, self.plain):
+            self.assertTrue(job.blob.normalization_is_current)
+        self.assertTrue(self.encoded.blob.has_encoded_parts)
+        self.assertNotEqual(self.encoded.blob.normalized_data, b"")
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.search(q="carol").data["count"], 2)
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")])
+
+    def test_sqlite_entries_are_replaced_by_rowid(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite FTS5 index")
+        text_index.index_documents([(self.plain.content_hash, "dinner with dave")])
+        self.assertFalse(Job.objects.filter(blob_id__in=text_index.matching_hashes("lunch")).exists())
+        self.assertEqual(self.search(q="dave").data["results"][0]["file_name"], "plain.eml")
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"EXPLAIN QUERY PLAN DELETE FROM {text_index.TABLE} WHERE rowid = {text_index.ROWID_OF}",
+                [self.plain.content_hash],
+            )
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+            cursor.execute(f"SELECT COUNT(*) FROM {text_index.TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 2)
+        # INDEX 0:= is FTS5's rowid lookup; a bare scan would read every entry
+        self.assertIn("INDEX 0:=", plan)
+
+    def test_every_word_must_match(self):
+        response = self.search(q="carol")
+        self.assertEqual(response.data["count"], 2)
+        response = self.search(q="carol lunch")
+        self.assertEqual([job["file_name"] for job in response.data["results"]], ["plain.eml"])
+
+    def test_filters(self):
+        Job.objects.filter(pk=self.plain.pk).update(status=Job.Status.DELIVERED)
+        response = self.search(q="carol", status="DELIVERED,QA_ACCEPTED", dataset_id=str(self.dataset.id))
+        self.assertEqual([job["file_name"] for job in response.data["results"]], ["plain.eml"])
+
+        phone = AnnotationClass.objects.create(name="phone", display_label="Phone", color="#ff0000")
+        version = AnnotationVersion.objects.create(job=self.encoded, version_number=1, source="ANNOTATOR")
+        Annotation.objects.create(
+            annotation_version=version,
+            annotation_class=phone,
+            class_name="phone",
+            start_offset=0,
+            end_offset=8,
+            original_text="555-0199",
+        )
+        response = self.search(q="carol", annotation_class=str(phone.id))
+        self.assertEqual([job["file_name"] for job in response.data["results"]], ["encoded.eml"])
+
+    def test_qa_only_sees_own_jobs(self):
+        self.assertEqual(self.search(self.qa, q="carol").data["count"], 0)
+        Job.objects.filter(pk=self.plain.pk).update(assigned_qa=self.qa)
+        self.assertEqual(self.search(self.qa, q="carol").data["count"], 1)
+
+    def test_invalid_params(self):
+        self.assertEqual(self.search(q="").status_code, 400)
+        self.assertEqual(self.search(q="carol", status="NOPE").status_code, 400)
+        self.assertEqual(self.search(q='"" *').status_code, 200)
+
+    def test_backfill_and_gc(self):
+        text_index.clear()
+        self.assertEqual(self.search(q="carol").data["count"], 0)
+        call_command("index_eml_text", stdout=StringIO())
+        self.assertEqual(self.search(q="carol").data["count"], 2)
+
+        self.plain.delete()
+        call_command("gc_eml_blobs", stdout=StringIO())
+        self.assertFalse(Job.objects.filter(blob_id__in=text_index.matching_hashes("lunch")).exists())
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {text_index.TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 1)
+            if connection.vendor == "sqlite":
+                cursor.execute(f"SELECT COUNT(*) FROM {text_index.KEYS_TABLE}")
+                self.assertEqual(cursor.fetchone()[0], 1)
+
+
+class StatusCountTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@example.com", name="Admin", password="pw", role=User.Role.ADMIN
+        )
+        cls.annotator = User.objects.create_user(
+            email="annotator@example.com", name="Annotator", password="pw", role=User.Role.ANNOTATOR
+        )
+        cls.qa = User.objects.create_user(email="qa@example.com", name="QA", password="pw", role=User.Role.QA)
+        cls.dataset = Dataset.objects.create(name="counts", uploaded_by=cls.admin, status=Dataset.Status.READY)
+        Job.objects.bulk_create(Job(dataset=cls.dataset, file_name=f"email_{i}.eml") for i in range(4))
+
+    def assert_counts_match(self):
+        self.assertEqual(status_counts.drift(), [])
+
+    def test_counters_follow_job_writes(self):
+        self.assertEqual(status_counts.status_totals(self.dataset.id), {Job.Status.UPLOADED: 4})
+
+        Job.objects.filter(file_name__in=["email_0.eml", "email_1.eml"]).update(
+            status=Job.Status.ASSIGNED_ANNOTATOR, assigned_annotator=self.annotator
+        )
+        job = Job.objects.get(file_name="email_0.eml")
+        job.status = Job.Status.ASSIGNED_QA
+        job.assigned_qa = self.qa
+        job.save()
+        Job.objects.filter(file_name="email_3.eml").delete()
+
+        self.assertEqual(
+            status_counts.status_totals(self.dataset.id),
+            {Job.Status.ASSIGNED_ANNOTATOR: 1, Job.Status.ASSIGNED_QA: 1, Job.Status.UPLOADED: 1},
+        )
+        self.assertEqual(
+            status_counts.user_status_counts(self.annotator, UserStatusCount.Role.ANNOTATOR),
+            {Job.Status.ASSIGNED_ANNOTATOR: 1, Job.Status.ASSIGNED_QA: 1},
+        )
+        self.assertEqual(
+            status_counts.user_status_counts(self.qa, UserStatusCount.Role.QA), {Job.Status.ASSIGNED_QA: 1}
+        )
+
+        # Reassignment moves the job between users
+        other = User.objects.create_user(email="other@example.com", name="Other", password="pw")
+        Job.objects.filter(pk=job.pk).update(assigned_annotator=other)
+        self.assertEqual(
+            status_counts.user_status_counts(other, UserStatusCount.Role.ANNOTATOR), {Job.Status.ASSIGNED_QA: 1}
+        )
+        self.assert_counts_match()
+
+        self.dataset.delete()
+        self.assertFalse(DatasetStatusCount.objects.exists())
+        self.assertEqual(status_counts.user_status_counts(self.annotator, UserStatusCount.Role.ANNOTATOR), {})
+        self.assert_counts_match()
+
+    def test_reconcile_repairs_drift(self):
+        DatasetStatusCount.objects.filter(dataset=self.dataset).update(count=7)
+        UserStatusCount.objects.create(
+            user=self.qa, role=UserStatusCount.Role.QA, status=Job.Status.DELIVERED, count=2
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("reconcile_status_counts", dry_run=True, stdout=StringIO())
+        self.assertEqual(len(status_counts.drift()), 2)
+
+        out = StringIO()
+        call_command("reconcile_status_counts", stdout=out)
+        self.assertIn("Reconciled 2 status counter(s).", out.getvalue())
+        self.assert_counts_match()
+        self.assertEqual(status_counts.status_totals(self.dataset.id), {Job.Status.UPLOADED: 4})
+
+    def test_dataset_list_queries_do_not_grow(self):
+        self.client.force_authenticate(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/datasets/")
+        for i in range(3):
+            dataset = Dataset.objects.create(name=f"more-{i}", status=Dataset.Status.READY)
+            Job.objects.create(dataset=dataset, file_name="email.eml")
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            response = self.client.get("/api/datasets/")
+        summaries = {row["name"]: row["status_summary"] for row in response.data["results"]}
+        self.assertEqual(summaries["counts"], {Job.Status.UPLOADED: 4})
+        self.assertEqual(summaries["more-0"], {Job.Status.UPLOADED: 1})
+
+    def test_my_jobs_status_counts(self):
+        Job.objects.filter(file_name="email_0.eml").update(
+            status=Job.Status.ANNOTATION_IN_PROGRESS, assigned_annotator=self.annotator
+        )
+        self.client.force_authenticate(self.annotator)
+        response = self.client.get("/api/annotations/my-jobs/")
+        self.assertEqual(response.data["status_counts"], {Job.Status.ANNOTATION_IN_PROGRESS: 1})
@@ -0,0 +1,148 @@
+"""
+Full-text index over normalized email content.
+
+Each EmlBlob's normalized text (normalize_eml, so encoded parts are
+searchable as decoded text) is indexed once under its content hash, when
+jobs are ingested (`extract_dataset`, `import_prelabeled_data`). The
+`index_eml_text` command backfills blobs stored before the index existed
+and rebuilds it after NORMALIZER_VERSION changes.
+
+On PostgreSQL the index is a `tsvector` column with a GIN index; on SQLite
+(tests, local development) it is an FTS5 virtual table, with a side table
+mapping each content hash to its entry's rowid so entries are replaced and
+removed by rowid rather than by scanning the unindexed hash column. Both
+are created by the datasets migrations. Queries match emails containing every word of the
+query; a word such as `555-0100` or `bob@example.com` matches as a phrase.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+TABLE = "datasets_emltextindex"
+KEYS_TABLE = "datasets_emltextindex_keys"
+
+# SQLite: the rowid of a hash's FTS5 entry, as a scalar subquery
+ROWID_OF = f"(SELECT id FROM {KEYS_TABLE} WHERE content_hash = %s)"
+
+# 'simple' keeps names, addresses and numbers as written: no stemming or stop words
+TEXT_SEARCH_CONFIG = "simple"
+
+# tsvector values are capped at 1MB; longer emails are indexed by their start
+MAX_INDEXED_CHARS = 500_000
+
+SNIPPET_RADIUS = 60
+MAX_SNIPPETS = 3
+
+
+def is_supported(using="default") -> bool:
+    return connections[using].vendor in ("postgresql", "sqlite")
+
+
+def index_documents(documents, using="default") -> None:
+    """Index (content_hash, normalized_text) pairs, replacing existing entries."""
+    connection = connections[using]
+    rows = [(content_hash, text[:MAX_INDEXED_CHARS]) for content_hash, text in documents]
+    if not rows or not is_supported(using):
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.executemany(
+                f"INSERT INTO {TABLE} (content_hash, document) VALUES (%s, to_tsvector(%s, %s)) "
+                "ON CONFLICT (content_hash) DO UPDATE SET document = EXCLUDED.document",
+                [(content_hash, TEXT_SEARCH_CONFIG, text) for content_hash, text in rows],
+            )
+        else:
+            hashes = [(content_hash,) for content_hash, _ in rows]
+            cursor.executemany(
+                f"INSERT INTO {KEYS_TABLE} (content_hash) VALUES (%s) ON CONFLICT (content_hash) DO NOTHING",
+                hashes,
+            )
+            cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = {ROWID_OF}", hashes)
+            cursor.executemany(
+                f"INSERT INTO {TABLE} (rowid, content_hash, body) VALUES ({ROWID_OF}, %s, %s)",
+                [(content_hash, content_hash, text) for content_hash, text in rows],
+            )
+
+
+def remove_documents(content_hashes, using="default") -> None:
+    """Drop index entries (PostgreSQL also cascades from deleted blobs)."""
+    if not content_hashes or not is_supported(using):
+        return
+    connection = connections[using]
+    hashes = [(content_hash,) for content_hash in content_hashes]
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.executemany(f"DELETE FROM {TABLE} WHERE content_hash = %s", hashes)
+        else:
+            cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = {ROWID_OF}", hashes)
+            cursor.executemany(f"DELETE FROM {KEYS_TABLE} WHERE content_hash = %s", hashes)
+
+
+def clear(using="default") -> None:
+    connection = connections[using]
+    if is_supported(using):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE}")
+            if connection.vendor == "sqlite":
+                cursor.execute(f"DELETE FROM {KEYS_TABLE}")
+
+
+def indexed_hashes():
+    """SQL selecting every indexed content hash, for `__in` filters."""
+    return RawSQL(f"SELECT content_hash FROM {TABLE}", [])
+
+
+def matching_hashes(query, using="default"):
+    """SQL selecting the content hashes whose text matches `query`, for `__in` filters."""
+    words = query_words(query)
+    if connections[using].vendor == "postgresql":
+        return RawSQL(
+            f"SELECT content_hash FROM {TABLE} WHERE document @@ plainto_tsquery(%s, %s)",
+            [TEXT_SEARCH_CONFIG, " ".join(words)],
+        )
+    # FTS5: every word as a quoted phrase, which also neutralises query syntax
+    fts_query = " ".join('"{}"'.format(word.replace('"', '""')) for word in words)
+    return RawSQL(f"SELECT content_hash FROM {TABLE} WHERE {TABLE} MATCH %s", [fts_query])
+
+
+def query_words(query) -> list[str]:
+    return query.split()
+
+
+def snippets(text, query, limit=MAX_SNIPPETS) -> list[dict]:
+    """
+    Up to `limit` excerpts of `text` around matches of the query words, as
+    {"text", "highlights"} with highlights as [start, end) offsets into the
+    excerpt.
+    """
+    words = sorted(set(query_words(query)), key=len, reverse=True)
+    if not words:
+        return []
+    text = text.replace("\r", "")
+    pattern = re.compile(
+        "|".join(
+            (r"\b" if word[0].isalnum() else "") + re.escape(word) + (r"\b" if word[-1].isalnum() else "")
+            for word in words
+        ),
+        re.IGNORECASE,
+    )
+
+    windows = []  # [start, end, match spans]
+    for match in pattern.finditer(text):
+        if windows and match.start() < windows[-1][1]:
+            # Inside the previous excerpt: extend it to cover the match
+            windows[-1][1] = max(windows[-1][1], match.end())
+            windows[-1][2].append(match.span())
+            continue
+        if len(windows) == limit:
+            break
+        start = max(0, match.start() - SNIPPET_RADIUS)
+        end = min(len(text), match.end() + SNIPPET_RADIUS)
+        windows.append([start, end, [match.span()]])
+
+    return [
+        {"text": text[start:end], "highlights": [[s - start, e - start] for s, e in spans]}
+        for start, end, spans in windows
+    ]
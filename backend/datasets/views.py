@@ -1,11 +1,7 @@
-import hashlib
-import io
-import os
-import zipfile
-
 from django.db import transaction
-from django.db.models import Count, Q
+from django.db.models import Count, Exists, OuterRef, Subquery
 from django.http import HttpResponse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -13,8 +9,14 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
 from accounts.models import User
-from core.permissions import IsAdmin
-
+from annotations.models import Annotation, AnnotationVersion
+from core.background import run_command_in_background
+from core.pagination import KeysetPagination
+from core.permissions import IsAdmin, IsAdminOrQA
+from core.search import search_filter
+
+from . import text_index
+from .extraction import spool_upload
 from .models import Dataset, Job
 from .serializers import (
     DatasetDetailSerializer,
@@ -23,34 +25,30 @@ from .serializers import (
     DatasetUploadSerializer,
     JobDetailSerializer,
     JobSerializer,
+    JobTextSearchParamsSerializer,
+    JobTextSearchSerializer,
 )
 
 
+class DatasetPagination(KeysetPagination):
+    ordering = ("-upload_date", "-id")
+    # Dataset pickers load every dataset in one page
+    max_page_size = 200
+
+
 class DatasetViewSet(ViewSet):
     permission_classes = [IsAuthenticated, IsAdmin]
 
     def list(self, request):
-        queryset = Dataset.objects.select_related("uploaded_by").order_by(
-            "-upload_date"
-        )
+        queryset = Dataset.objects.select_related("uploaded_by").prefetch_related("status_counts")
 
         search = request.query_params.get("search", "").strip()
         if search:
-            queryset = queryset.filter(name__icontains=search)
-
-        page = int(request.query_params.get("page", 1))
-        page_size = int(request.query_params.get("page_size", 20))
-        total = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        datasets = queryset[start:end]
+            queryset = search_filter(queryset, search, ["name"])
 
-        return Response(
-            {
-                "count": total,
-                "results": DatasetListSerializer(datasets, many=True).data,
-            }
-        )
+        paginator = DatasetPagination()
+        datasets = paginator.paginate_queryset(queryset, request)
+        return paginator.get_paginated_response(DatasetListSerializer(datasets, many=True).data)
 
     def retrieve(self, request, pk=None):
         try:
@@ -98,108 +96,24 @@ class DatasetViewSet(ViewSet):
             name=name,
             uploaded_by=request.user,
             status=Dataset.Status.EXTRACTING,
+            extraction_heartbeat_at=timezone.now(),
         )
 
-        # Read ZIP into memory buffer
-        zip_buffer = io.BytesIO()
-        for chunk in file.chunks():
-            zip_buffer.write(chunk)
-
-        # Extract inline
-        self._extract_dataset(dataset, zip_buffer)
+        # Spool to disk and extract in a background process
+        try:
+            spool_upload(dataset, file)
+        except OSError as e:
+            dataset.status = Dataset.Status.FAILED
+            dataset.error_message = f"Could not store uploaded file: {e}"
+            dataset.save(update_fields=["status", "error_message"])
+        else:
+            run_command_in_background("extract_dataset", str(dataset.id))
 
         return Response(
             DatasetDetailSerializer(dataset).data,
             status=status.HTTP_201_CREATED,
         )
 
-    def _extract_dataset(self, dataset, zip_buffer):
-        try:
-            zip_buffer.seek(0)
-            if not zipfile.is_zipfile(zip_buffer):
-                dataset.status = Dataset.Status.FAILED
-                dataset.error_message = "Uploaded file is not a valid zip archive."
-                dataset.save(update_fields=["status", "error_message"])
-                return
-
-            zip_buffer.seek(0)
-            seen_names = {}
-            candidates = []
-            seen_hashes_in_zip = set()
-
-            with zipfile.ZipFile(zip_buffer, "r") as zf:
-                for entry in zf.namelist():
-                    # Skip directories and non-.eml files
-                    if entry.endswith("/") or not entry.lower().endswith(".eml"):
-                        continue
-
-                    # Use just the filename, not the full path
-                    base_name = os.path.basename(entry)
-                    if not base_name:
-                        continue
-
-                    # Handle duplicate filenames
-                    if base_name in seen_names:
-                        seen_names[base_name] += 1
-                        name_part, ext = os.path.splitext(base_name)
-                        base_name = f"{name_part}_{seen_names[base_name]}{ext}"
-                    else:
-                        seen_names[base_name] = 0
-
-                    # Read .eml content from ZIP and decode
-                    raw_bytes = zf.read(entry)
-                    content_hash = hashlib.sha256(raw_bytes).hexdigest()
-
-                    # Phase 1: intra-ZIP dedup
-                    if content_hash in seen_hashes_in_zip:
-                        continue
-                    seen_hashes_in_zip.add(content_hash)
-
-                    try:
-                        eml_content = raw_bytes.decode("utf-8")
-                    except UnicodeDecodeError:
-                        eml_content = raw_bytes.decode("latin-1")
-
-                    candidates.append({
-                        "file_name": base_name,
-                        "eml_content": eml_content,
-                        "content_hash": content_hash,
-                    })
-
-            # Phase 2: global dedup against existing jobs in the database
-            candidate_hashes = {c["content_hash"] for c in candidates}
-            existing_hashes = set(
-                Job.objects.filter(content_hash__in=candidate_hashes)
-                .values_list("content_hash", flat=True)
-            )
-
-            jobs = []
-            for candidate in candidates:
-                if candidate["content_hash"] in existing_hashes:
-                    continue
-                job = Job(
-                    dataset=dataset,
-                    file_name=candidate["file_name"],
-                    eml_content=candidate["eml_content"],
-                    content_hash=candidate["content_hash"],
-                    status=Job.Status.UPLOADED,
-                )
-                jobs.append(job)
-
-            total_extracted = len(seen_hashes_in_zip)
-            duplicate_count = total_extracted - len(jobs)
-
-            Job.objects.bulk_create(jobs)
-            dataset.status = Dataset.Status.READY
-            dataset.file_count = len(jobs)
-            dataset.duplicate_count = duplicate_count
-            dataset.save(update_fields=["status", "file_count", "duplicate_count"])
-
-        except Exception as e:
-            dataset.status = Dataset.Status.FAILED
-            dataset.error_message = str(e)
-            dataset.save(update_fields=["status", "error_message"])
-
     @action(detail=True, methods=["get"], url_path="status")
     def dataset_status(self, request, pk=None):
         try:
@@ -216,9 +130,7 @@ class DatasetViewSet(ViewSet):
         except Dataset.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        queryset = dataset.jobs.select_related(
-            "assigned_annotator", "assigned_qa"
-        ).order_by("-created_at")
+        queryset = dataset.jobs.select_related("assigned_annotator", "assigned_qa")
 
         status_filter = request.query_params.get("status", "").strip()
         if status_filter:
@@ -226,21 +138,11 @@ class DatasetViewSet(ViewSet):
 
         search = request.query_params.get("search", "").strip()
         if search:
-            queryset = queryset.filter(file_name__icontains=search)
+            queryset = search_filter(queryset, search, ["file_name"])
 
-        page = int(request.query_params.get("page", 1))
-        page_size = int(request.query_params.get("page_size", 20))
-        total = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        jobs_page = queryset[start:end]
-
-        return Response(
-            {
-                "count": total,
-                "results": JobSerializer(jobs_page, many=True).data,
-            }
-        )
+        paginator = KeysetPagination()
+        jobs_page = paginator.paginate_queryset(queryset, request)
+        return paginator.get_paginated_response(JobSerializer(jobs_page, many=True).data)
 
 
 class JobViewSet(ViewSet):
@@ -256,18 +158,56 @@ class JobViewSet(ViewSet):
 
         return Response(JobDetailSerializer(job).data)
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="search",
+        permission_classes=[IsAuthenticated, IsAdminOrQA],
+    )
+    def text_search(self, request):
+        """Full-text search over email content; QA reviewers only see their own jobs."""
+        params = JobTextSearchParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data["q"]
+
+        queryset = (
+            Job.objects.with_content()
+            .select_related("dataset")
+            .filter(blob_id__in=text_index.matching_hashes(query))
+        )
+        if request.user.role == User.Role.QA:
+            queryset = queryset.filter(assigned_qa=request.user)
+        if "dataset_id" in params.validated_data:
+            queryset = queryset.filter(dataset_id=params.validated_data["dataset_id"])
+        if params.validated_data.get("status"):
+            queryset = queryset.filter(status__in=params.validated_data["status"])
+        if "annotation_class" in params.validated_data:
+            latest_version = (
+                AnnotationVersion.objects.filter(job=OuterRef("pk"))
+                .order_by("-version_number")
+                .values("id")[:1]
+            )
+            queryset = queryset.annotate(latest_version_id=Subquery(latest_version)).filter(
+                Exists(
+                    Annotation.objects.filter(
+                        annotation_version_id=OuterRef("latest_version_id"),
+                        annotation_class_id=params.validated_data["annotation_class"],
+                    )
+                )
+            )
+
+        paginator = KeysetPagination()
+        jobs_page = paginator.paginate_queryset(queryset, request)
+        serializer = JobTextSearchSerializer(jobs_page, many=True, context={"query": query})
+        return paginator.get_paginated_response(serializer.data)
+
     @action(detail=False, methods=["get"])
     def unassigned(self, request):
         assign_type = request.query_params.get("type", "ANNOTATION").strip()
 
-        if assign_type == "QA":
-            queryset = Job.objects.filter(
-                status=Job.Status.SUBMITTED_FOR_QA
-            ).select_related("dataset", "assigned_annotator", "assigned_qa")
-        else:
-            queryset = Job.objects.filter(
-                status=Job.Status.UPLOADED
-            ).select_related("dataset", "assigned_annotator", "assigned_qa")
+        queryset = Job.objects.queue("unassigned", assign_type).select_related(
+            "dataset", "assigned_annotator", "assigned_qa"
+        )
 
         dataset_id = request.query_params.get("dataset_id", "").strip()
         if dataset_id:
@@ -275,39 +215,19 @@ class JobViewSet(ViewSet):
 
         search = request.query_params.get("search", "").strip()
         if search:
-            queryset = queryset.filter(
-                Q(file_name__icontains=search)
-                | Q(dataset__name__icontains=search)
-            )
+            queryset = search_filter(queryset, search, ["file_name", "dataset__name"])
 
-        queryset = queryset.order_by("-created_at")
-
-        page = int(request.query_params.get("page", 1))
-        page_size = int(request.query_params.get("page_size", 20))
-        total = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        jobs_page = queryset[start:end]
-
-        return Response(
-            {
-                "count": total,
-                "results": JobDetailSerializer(jobs_page, many=True).data,
-            }
-        )
+        paginator = KeysetPagination()
+        jobs_page = paginator.paginate_queryset(queryset, request)
+        return paginator.get_paginated_response(JobDetailSerializer(jobs_page, many=True).data)
 
     @action(detail=False, methods=["get"])
     def assigned(self, request):
         assign_type = request.query_params.get("type", "ANNOTATION").strip()
 
-        if assign_type == "QA":
-            queryset = Job.objects.filter(
-                status=Job.Status.ASSIGNED_QA
-            ).select_related("dataset", "assigned_annotator", "assigned_qa")
-        else:
-            queryset = Job.objects.filter(
-                status=Job.Status.ASSIGNED_ANNOTATOR
-            ).select_related("dataset", "assigned_annotator", "assigned_qa")
+        queryset = Job.objects.queue("assigned", assign_type).select_related(
+            "dataset", "assigned_annotator", "assigned_qa"
+        )
 
         dataset_id = request.query_params.get("dataset_id", "").strip()
         if dataset_id:
@@ -315,26 +235,11 @@ class JobViewSet(ViewSet):
 
         search = request.query_params.get("search", "").strip()
         if search:
-            queryset = queryset.filter(
-                Q(file_name__icontains=search)
-                | Q(dataset__name__icontains=search)
-            )
-
-        queryset = queryset.order_by("-created_at")
+            queryset = search_filter(queryset, search, ["file_name", "dataset__name"])
 
-        page = int(request.query_params.get("page", 1))
-        page_size = int(request.query_params.get("page_size", 20))
-        total = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        jobs_page = queryset[start:end]
-
-        return Response(
-            {
-                "count": total,
-                "results": JobDetailSerializer(jobs_page, many=True).data,
-            }
-        )
+        paginator = KeysetPagination()
+        jobs_page = paginator.paginate_queryset(queryset, request)
+        return paginator.get_paginated_response(JobDetailSerializer(jobs_page, many=True).data)
 
     @action(detail=False, methods=["get"])
     def workloads(self, request):
@@ -491,14 +396,9 @@ class JobViewSet(ViewSet):
     def in_progress(self, request):
         assign_type = request.query_params.get("type", "ANNOTATION").strip()
 
-        if assign_type == "QA":
-            queryset = Job.objects.filter(
-                status=Job.Status.QA_IN_PROGRESS
-            ).select_related("dataset", "assigned_annotator", "assigned_qa")
-        else:
-            queryset = Job.objects.filter(
-                status=Job.Status.ANNOTATION_IN_PROGRESS
-            ).select_related("dataset", "assigned_annotator", "assigned_qa")
+        queryset = Job.objects.queue("in_progress", assign_type).select_related(
+            "dataset", "assigned_annotator", "assigned_qa"
+        )
 
         dataset_id = request.query_params.get("dataset_id", "").strip()
         if dataset_id:
@@ -506,26 +406,11 @@ class JobViewSet(ViewSet):
 
         search = request.query_params.get("search", "").strip()
         if search:
-            queryset = queryset.filter(
-                Q(file_name__icontains=search)
-                | Q(dataset__name__icontains=search)
-            )
-
-        queryset = queryset.order_by("-created_at")
-
-        page = int(request.query_params.get("page", 1))
-        page_size = int(request.query_params.get("page_size", 20))
-        total = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        jobs_page = queryset[start:end]
+            queryset = search_filter(queryset, search, ["file_name", "dataset__name"])
 
-        return Response(
-            {
-                "count": total,
-                "results": JobDetailSerializer(jobs_page, many=True).data,
-            }
-        )
+        paginator = KeysetPagination()
+        jobs_page = paginator.paginate_queryset(queryset, request)
+        return paginator.get_paginated_response(JobDetailSerializer(jobs_page, many=True).data)
 
     @action(detail=False, methods=["post"])
     def reassign(self, request):
@@ -579,7 +464,7 @@ class JobViewSet(ViewSet):
     @action(detail=True, methods=["get"], url_path="raw-content")
     def raw_content(self, request, pk=None):
         try:
-            job = Job.objects.get(pk=pk)
+            job = Job.objects.with_content().get(pk=pk)
         except Job.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
         if not job.eml_content:
@@ -4,5 +4,6 @@ from .models import ExportRecord
 
 @admin.register(ExportRecord)
 class ExportRecordAdmin(admin.ModelAdmin):
-    list_display = ("dataset", "exported_by", "file_size", "exported_at")
+    list_display = ("dataset", "exported_by", "status", "file_size", "exported_at")
+    list_filter = ("status",)
     search_fields = ("dataset__name",)
@@ -0,0 +1,189 @@
+"""
+ZIP writer for entries deflated elsewhere (engine.deflate_entry).
+
+zipfile only writes data it compresses itself, so export archives are laid
+out here directly from the ZIP format (PKWARE APPNOTE 6.3): a local header
+and the deflated bytes per entry, then the central directory. CRC and sizes
+are known before an entry is written, so no data descriptors are needed and
+the target may be an unseekable stream.
+
+Zip64 fields use zipfile's thresholds: an entry gets a Zip64 extra field
+when a size or its offset exceeds ZIP64_LIMIT, and the archive gets a Zip64
+end of central directory when its entry count, directory size or directory
+offset does not fit the classic record.
+"""
+
+import struct
+import time
+
+# Same thresholds as zipfile
+ZIP64_LIMIT = (1 << 31) - 1
+ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
+
+DEFLATED = 8
+VERSION_DEFAULT = 20
+VERSION_ZIP64 = 45
+CREATE_SYSTEM_UNIX = 3
+FLAG_UTF8 = 0x800
+EXTERNAL_ATTR = 0o600 << 16
+ZIP64_EXTRA_ID = 0x0001
+
+LOCAL_HEADER = struct.Struct("<4sHHHHHLLLHH")
+CENTRAL_HEADER = struct.Struct("<4sBBHHHHHLLLHHHHHLL")
+END_RECORD = struct.Struct("<4sHHHHLLH")
+ZIP64_END_RECORD = struct.Struct("<4sQHHLLQQQQ")
+ZIP64_END_LOCATOR = struct.Struct("<4sLQL")
+
+
+class ZipWriter:
+    """
+    Write pre-deflated RenderedEntry objects to a ZIP archive.
+
+    `file` is a path or a binary file object (which is left open). Use as a
+    context manager, or call close() to write the central directory.
+    """
+
+    def __init__(self, file):
+        if isinstance(file, str | bytes) or hasattr(file, "__fspath__"):
+            self._fp = open(file, "wb")
+            self._owns_fp = True
+        else:
+            self._fp = file
+            self._owns_fp = False
+        self._offset = 0
+        self._entries = []  # (name, flags, dos_time, dos_date, crc, compress_size, file_size, offset)
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, entry) -> None:
+        """Append one entry; its data must be a raw deflate stream."""
+        if self._closed:
+            raise ValueError("Attempt to write to a closed ZipWriter")
+        name, flags = _encode_name(entry.name)
+        dos_time, dos_date = _dos_timestamp(time.localtime(time.time()))
+        compress_size = len(entry.data)
+        zip64 = max(entry.size, compress_size) > ZIP64_LIMIT
+
+        extra = b""
+        header_sizes = (compress_size, entry.size)
+        if zip64:
+            extra = struct.pack("<HHQQ", ZIP64_EXTRA_ID, 16, entry.size, compress_size)
+            header_sizes = (0xFFFFFFFF, 0xFFFFFFFF)
+        header = LOCAL_HEADER.pack(
+            b"PK\003\004",
+            VERSION_ZIP64 if zip64 else VERSION_DEFAULT,
+            flags,
+            DEFLATED,
+            dos_time,
+            dos_date,
+            entry.crc,
+            *header_sizes,
+            len(name),
+            len(extra),
+        )
+        self._entries.append((name, flags, dos_time, dos_date, entry.crc, compress_size, entry.size, self._offset))
+        self._write(header + name + extra)
+        self._write(entry.data)
+
+    def close(self) -> None:
+        """Write the central directory and end records."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            directory_offset = self._offset
+            for entry in self._entries:
+                self._write(_central_header(*entry))
+            self._write_end(directory_offset, self._offset - directory_offset)
+            self._fp.flush()
+        finally:
+            if self._owns_fp:
+                self._fp.close()
+
+    def _write_end(self, directory_offset, directory_size) -> None:
+        count = len(self._entries)
+        if count > ZIP_FILECOUNT_LIMIT or directory_offset > ZIP64_LIMIT or directory_size > ZIP64_LIMIT:
+            zip64_end_offset = self._offset
+            self._write(
+                ZIP64_END_RECORD.pack(
+                    b"PK\006\006",
+                    ZIP64_END_RECORD.size - 12,
+                    VERSION_ZIP64,
+                    VERSION_ZIP64,
+                    0,
+                    0,
+                    count,
+                    count,
+                    directory_size,
+                    directory_offset,
+                )
+            )
+            self._write(ZIP64_END_LOCATOR.pack(b"PK\006\007", 0, zip64_end_offset, 1))
+            count = min(count, 0xFFFF)
+            directory_size = min(directory_size, 0xFFFFFFFF)
+            directory_offset = min(directory_offset, 0xFFFFFFFF)
+        self._write(END_RECORD.pack(b"PK\005\006", 0, 0, count, count, directory_size, directory_offset, 0))
+
+    def _write(self, data) -> None:
+        self._fp.write(data)
+        self._offset += len(data)
+
+
+def _central_header(name, flags, dos_time, dos_date, crc, compress_size, file_size, offset) -> bytes:
+    # Zip64 extra values appear in this order, only for fields that overflow
+    extra_values = []
+    if file_size > ZIP64_LIMIT:
+        extra_values.append(file_size)
+        file_size = 0xFFFFFFFF
+    if compress_size > ZIP64_LIMIT:
+        extra_values.append(compress_size)
+        compress_size = 0xFFFFFFFF
+    if offset > ZIP64_LIMIT:
+        extra_values.append(offset)
+        offset = 0xFFFFFFFF
+
+    extra = b""
+    version = VERSION_DEFAULT
+    if extra_values:
+        extra = struct.pack(f"<HH{len(extra_values)}Q", ZIP64_EXTRA_ID, 8 * len(extra_values), *extra_values)
+        version = VERSION_ZIP64
+    header = CENTRAL_HEADER.pack(
+        b"PK\001\002",
+        version,
+        CREATE_SYSTEM_UNIX,
+        version,
+        flags,
+        DEFLATED,
+        dos_time,
+        dos_date,
+        crc,
+        compress_size,
+        file_size,
+        len(name),
+        len(extra),
+        0,
+        0,
+        0,
+        EXTERNAL_ATTR,
+        offset,
+    )
+    return header + name + extra
+
+
+def _encode_name(name) -> tuple[bytes, int]:
+    try:
+        return name.encode("ascii"), 0
+    except UnicodeEncodeError:
+        return name.encode("utf-8"), FLAG_UTF8
+
+
+def _dos_timestamp(local_time) -> tuple[int, int]:
+    year = max(local_time.tm_year, 1980)
+    dos_time = (local_time.tm_hour << 11) | (local_time.tm_min << 5) | (local_time.tm_sec // 2)
+    dos_date = ((year - 1980) << 9) | (local_time.tm_mon << 5) | local_time.tm_mday
+    return dos_time, dos_date
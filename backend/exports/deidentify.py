@@ -0,0 +1,108 @@
+"""
+Linear-time de-identification.
+
+Annotation offsets index the \\r-stripped normalized text (the frontend strips
+\\r for DOM compatibility), while exports keep the original line endings. Each
+span is therefore shifted by the number of \\r characters before it, found by
+bisecting the stripped positions of all \\r characters, and the output is
+assembled with a single join.
+
+Overlapping or out-of-range spans cannot be expressed as one left-to-right
+pass; they fall back to splicing from the end, which is what the exporter
+has always produced for them.
+"""
+
+from bisect import bisect_right
+from typing import NamedTuple
+
+
+class Span(NamedTuple):
+    start: int
+    end: int
+    tag: str
+
+
+def deidentify(content, annotations) -> str:
+    """Replace annotated spans of `content` with their [TAG] placeholders."""
+    return deidentify_spans(content, annotation_spans(annotations))
+
+
+def annotation_spans(annotations) -> list[Span]:
+    """Spans of annotations over the \\r-stripped text, sorted by start."""
+    return sorted(
+        (Span(ann.start_offset, ann.end_offset, ann.tag or f"[{ann.class_name}]") for ann in annotations),
+        key=lambda span: span.start,
+    )
+
+
+def deidentify_spans(content, spans) -> str:
+    """Like deidentify(), for spans already built by annotation_spans()."""
+    return redact(content, to_original_spans(content, spans))
+
+
+def to_original_spans(content, spans) -> list[Span]:
+    """Translate spans over the \\r-stripped text into offsets of `content`."""
+    # Position of each \r in the stripped text; non-decreasing
+    cr_stripped = [pos - index for index, pos in enumerate(_cr_positions(content))]
+    if not cr_stripped:
+        return list(spans)
+    return [
+        Span(
+            span.start + bisect_right(cr_stripped, span.start),
+            span.end + bisect_right(cr_stripped, span.end),
+            span.tag,
+        )
+        for span in spans
+    ]
+
+
+def find_overlaps(spans, length) -> list[tuple[Span, Span | None]]:
+    """
+    Return the spans that prevent a single pass over sorted `spans`.
+
+    Each entry pairs a span with the preceding span it collides with, or with
+    None when the span itself is inverted or outside [0, length].
+    """
+    problems = []
+    previous = None
+    for span in spans:
+        if not 0 <= span.start <= span.end <= length:
+            problems.append((span, None))
+        elif previous is not None and (span.start <= previous.start or span.start < previous.end):
+            problems.append((span, previous))
+        previous = span
+    return problems
+
+
+def redact(content, spans) -> str:
+    """
+    Replace `spans` (original offsets, sorted by start) with their tags.
+
+    Non-overlapping spans take one join; anything else is spliced from the
+    end exactly like the original per-annotation rebuild.
+    """
+    if find_overlaps(spans, len(content)):
+        return _splice_from_end(content, spans)
+
+    pieces = []
+    position = 0
+    for span in spans:
+        pieces.append(content[position:span.start])
+        pieces.append(span.tag)
+        position = span.end
+    pieces.append(content[position:])
+    return "".join(pieces)
+
+
+def _splice_from_end(content, spans) -> str:
+    # sorted(reverse=True) keeps equal starts in their original order
+    for span in sorted(spans, key=lambda span: span.start, reverse=True):
+        content = content[:span.start] + span.tag + content[span.end:]
+    return content
+
+
+def _cr_positions(content):
+    position = content.find("\r")
+    while position != -1:
+        yield position
+        position = content.find("\r", position + 1)
@@ -0,0 +1,128 @@
+"""
+Export archive download responses.
+
+Archives are served with a strong ETag (the SHA-256 of the file recorded
+at build time) and single byte-range support, so an interrupted download
+resumes with `Range` + `If-Range` instead of starting over. A `Range` whose
+`If-Range` does not match the current archive gets the whole file, which
+keeps resumed downloads from mixing bytes of different archives.
+
+With EXPORT_SENDFILE_MODE set, the response carries only headers and the
+reverse proxy sends the file (and handles ranges) itself, so no worker is
+tied up copying bytes.
+"""
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, parse_etags, quote_etag
+
+from .storage import get_exports_dir
+
+BLOCK_SIZE = 64 * 1024
+
+SENDFILE_ACCEL_REDIRECT = "x-accel-redirect"
+SENDFILE_X_SENDFILE = "x-sendfile"
+
+
+def archive_response(request, path, filename, sha256):
+    """Response for an archive file on disk, honouring conditional and range requests."""
+    etag = quote_etag(sha256) if sha256 else None
+    size = path.stat().st_size
+
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    sendfile = _sendfile_response(path)
+    if sendfile is not None:
+        response = sendfile
+    else:
+        byte_range = _requested_range(request, size, etag)
+        if byte_range is None:
+            response = FileResponse(open(path, "rb"), content_type="application/zip")
+            response["Content-Length"] = size
+        elif byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _read_range(path, start, end), status=206, content_type="application/zip"
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = end - start + 1
+        response["Accept-Ranges"] = "bytes"
+
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    if etag:
+        response["ETag"] = etag
+    return response
+
+
+def _sendfile_response(path):
+    mode = settings.EXPORT_SENDFILE_MODE
+    if mode == SENDFILE_X_SENDFILE:
+        response = HttpResponse(content_type="application/zip")
+        response["X-Sendfile"] = str(path)
+        return response
+    if mode == SENDFILE_ACCEL_REDIRECT:
+        try:
+            relative = path.resolve().relative_to(get_exports_dir().resolve())
+        except ValueError:
+            # Outside the aliased directory: serve it from Django
+            return None
+        response = HttpResponse(content_type="application/zip")
+        response["X-Accel-Redirect"] = settings.EXPORT_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + relative.as_posix()
+        return response
+    return None
+
+
+def _requested_range(request, size, etag):
+    """
+    The (start, end) byte range to send, inclusive; None for the whole file;
+    False when the range cannot be satisfied. Multiple ranges are answered
+    with the whole file, as RFC 9110 allows.
+    """
+    header = request.META.get("HTTP_RANGE", "")
+    if not header:
+        return None
+
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if if_range is not None:
+        # Only a strong ETag match validates; dates and weak tags do not
+        if etag is None or if_range.startswith("W/") or parse_etags(if_range) != [etag]:
+            return None
+
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = (part.strip() for part in spec.partition("-"))
+    if not dash or not (first or last) or not (first + last).isdigit():
+        return None
+    if first:
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and end < start:
+            return None
+    else:
+        suffix = int(last)
+        if suffix == 0:
+            return False
+        start, end = max(size - suffix, 0), size - 1
+
+    if start >= size:
+        return False
+    return start, min(end, size - 1)
+
+
+def _read_range(path, start, end):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(BLOCK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,114 @@
+"""
+Process-pool export engine.
+
+Per-job export work (normalize, de-identify, re-encode, deflate) is CPU-bound
+and independent across jobs, so it can be fanned out to worker processes.
+This module stays free of Django imports: workers are spawned fresh and only
+ever see plain `RenderTask` tuples, never the database.
+
+Results are gathered in submission order, so archives do not depend on the
+worker count. At most `workers * IN_FLIGHT_PER_WORKER` tasks are outstanding,
+which bounds memory in the parent; each worker holds one email at a time.
+"""
+
+import hashlib
+import multiprocessing
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from core.eml_normalizer import normalize_eml, re_encode_eml
+
+from .deidentify import deidentify_spans
+
+IN_FLIGHT_PER_WORKER = 4
+
+
+class RenderTask(NamedTuple):
+    """One job to export. `normalized` is None when it must be recomputed."""
+
+    name: str
+    raw_content: str
+    normalized: str | None
+    has_encoded: bool
+    spans: list
+
+
+class RenderedEntry(NamedTuple):
+    """
+    A deflated archive entry, ready to be appended to a ZIP. `normalized`
+    carries (normalized, has_encoded) when the task had to recompute it, so
+    the caller can cache it.
+    """
+
+    name: str
+    data: bytes
+    crc: int
+    size: int
+    sha256: bytes
+    normalized: tuple[str, bool] | None = None
+
+
+def render_task(task) -> RenderedEntry:
+    """De-identify and deflate one job. Runs in worker processes."""
+    normalized, has_encoded = task.normalized, task.has_encoded
+    recomputed = None
+    if normalized is None:
+        normalized, has_encoded = normalize_eml(task.raw_content)
+        recomputed = (normalized, has_encoded)
+
+    deidentified = deidentify_spans(normalized, task.spans) if task.spans else normalized
+    if has_encoded:
+        deidentified = re_encode_eml(deidentified, task.raw_content)
+
+    entry = deflate_entry(task.name, [deidentified.encode("utf-8")])
+    return entry._replace(normalized=recomputed)
+
+
+def deflate_entry(name, chunks) -> RenderedEntry:
+    """Build an archive entry from an iterable of byte chunks, compressing as it goes."""
+    # Raw deflate stream, as zipfile.ZIP_DEFLATED writes it
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    sha256 = hashlib.sha256()
+    crc, size, data = 0, 0, []
+    for chunk in chunks:
+        data.append(compressor.compress(chunk))
+        crc = zlib.crc32(chunk, crc)
+        size += len(chunk)
+        sha256.update(chunk)
+    data.append(compressor.flush())
+    return RenderedEntry(name, b"".join(data), crc, size, sha256.digest())
+
+
+def render_entries(tasks, workers=1):
+    """
+    Yield a RenderedEntry for each task, in the order of `tasks`. Items that
+    are None or already a RenderedEntry (e.g. from a cache) pass through.
+
+    With workers > 1, tasks run on a pool of spawned processes; otherwise
+    they run inline.
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield task if _is_done(task) else render_task(task)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(task if _is_done(task) else executor.submit(render_task, task))
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                yield _result(pending.popleft())
+        while pending:
+            yield _result(pending.popleft())
+
+
+def _is_done(task):
+    return task is None or isinstance(task, RenderedEntry)
+
+
+def _result(item):
+    return item if _is_done(item) else item.result()
+
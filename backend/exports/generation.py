@@ -0,0 +1,452 @@
+"""
+Export generation.
+
+ARCHIVE exports: `create_export` records a PENDING ExportRecord and hands it
+to the `build_export` management command, which de-identifies each job into
+the export archive and updates `processed_count` as it goes so the UI can
+poll progress.
+
+STREAM exports keep nothing on disk: every download regenerates the ZIP from
+the record's job list and streams each entry as soon as it is de-identified.
+
+Every record pins each job's latest annotation version when it is created
+(`annotation_versions`), and entries are rendered from those versions, so
+re-annotating a job does not change an export that already exists. Both
+modes record a SHA-256 `content_digest` over the de-identified entries: an
+ARCHIVE when it is built, a STREAM on its first complete download. A
+regenerated export whose content no longer matches is refused rather than
+served.
+
+The per-job work runs through `exports.engine`; ARCHIVE builds can fan it
+out to EXPORT_WORKERS processes. Rendered entries are cached in ExportEntry
+per (job, annotation version, normalizer version), so jobs that have not
+changed since a previous export are copied without being rendered again.
+
+Archives hold a redacted .eml per job and/or span manifests of the jobs'
+annotations (see `exports.manifest`), per the record's `formats`.
+"""
+
+import hashlib
+import logging
+import os
+import uuid
+from collections import defaultdict, deque
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from annotations.models import Annotation, AnnotationVersion
+from core.eml_normalizer import NORMALIZER_VERSION
+from datasets.models import EmlBlob, Job
+
+from .archive import ZipWriter
+from .deidentify import annotation_spans
+from .engine import RenderedEntry, RenderTask, render_entries
+from .manifest import manifest_entries
+from .models import ExportEntry, ExportRecord
+from .storage import enforce_retention, file_sha256, get_export_path
+
+# Jobs between progress updates on the ExportRecord
+PROGRESS_INTERVAL = 25
+# Jobs fetched per round trip; annotations are bulk-loaded once per chunk
+CHUNK_SIZE = 500
+# Freshly rendered entries written to the ExportEntry cache per insert
+CACHE_WRITE_BATCH = 100
+
+logger = logging.getLogger("api")
+
+
+def latest_version_ids(job_ids) -> dict:
+    """Map job id → id of its latest AnnotationVersion, in one query."""
+    latest_versions = (
+        AnnotationVersion.objects.filter(job_id__in=job_ids)
+        .annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=[F("job_id")],
+                order_by=F("version_number").desc(),
+            )
+        )
+        .filter(rank=1)
+        .values_list("job_id", "id")
+    )
+    return dict(latest_versions)
+
+
+class ExportContentChanged(Exception):
+    """A regenerated export no longer matches the content it was created with."""
+
+
+def pin_versions(job_ids) -> dict:
+    """Map str(job id) → str(latest annotation version id), for ExportRecord.annotation_versions."""
+    return {str(job_id): str(version_id) for job_id, version_id in latest_version_ids(job_ids).items()}
+
+
+def input_digest(job_ids, formats, versions=None) -> str:
+    """
+    SHA-256 identifying what an export of `job_ids` in `formats` would
+    contain: each job with its annotation version (from `versions`, or the
+    latest), the formats, and the normalizer version.
+    """
+    if versions is None:
+        versions = pin_versions(job_ids)
+    digest = hashlib.sha256(f"normalizer:{NORMALIZER_VERSION}".encode())
+    digest.update(f"\nformats:{','.join(sorted(formats))}".encode())
+    for job_id in sorted(str(job_id) for job_id in job_ids):
+        digest.update(f"\n{job_id}:{versions.get(job_id, '')}".encode())
+    return digest.hexdigest()
+
+
+def delta_job_ids(dataset_id) -> list:
+    """
+    Ids of the dataset's DELIVERED jobs that no finished (DONE) export holds
+    at their current latest annotation version: jobs never exported, and
+    jobs re-annotated since the last export that contained them.
+
+    Each job is compared with the version pinned by the newest DONE export
+    listing it. Records created before pinning do not say which version they
+    held; a job counts as changed since such a record when its latest
+    version was created after the record.
+    """
+    delivered = list(
+        Job.objects.filter(dataset_id=dataset_id, status=Job.Status.DELIVERED).values_list("id", flat=True)
+    )
+    latest = latest_version_ids(delivered)
+
+    # str(job id) → newest DONE record listing the job
+    exported = {}
+    records = ExportRecord.objects.filter(dataset_id=dataset_id, status=ExportRecord.Status.DONE)
+    for record in records.only("job_ids", "annotation_versions", "exported_at").order_by("-exported_at"):
+        for job_id in record.job_ids:
+            exported.setdefault(job_id, record)
+
+    unpinned = [
+        latest[job_id]
+        for job_id in delivered
+        if job_id in latest and str(job_id) in exported and exported[str(job_id)].annotation_versions is None
+    ]
+    created_at = dict(AnnotationVersion.objects.filter(id__in=unpinned).values_list("id", "created_at"))
+
+    def changed(job_id):
+        record = exported.get(str(job_id))
+        if record is None:
+            return True
+        latest_id = latest.get(job_id)
+        if record.annotation_versions is None:
+            return latest_id is not None and created_at[latest_id] > record.exported_at
+        return record.annotation_versions.get(str(job_id)) != (str(latest_id) if latest_id else None)
+
+    return [job_id for job_id in delivered if changed(job_id)]
+
+
+def latest_annotations(job_ids, pinned=None) -> tuple[dict, dict]:
+    """
+    Return (job id → AnnotationVersion id, job id → annotations of that
+    version ordered by start_offset) for the given jobs, in two queries (one
+    with `pinned`, a str(job id) → str(version id) map to use instead of
+    each job's latest version). Jobs without any version are absent from both.
+    """
+    if pinned is None:
+        versions = latest_version_ids(job_ids)
+    else:
+        versions = {
+            job_id: uuid.UUID(pinned[str(job_id)]) for job_id in job_ids if str(job_id) in pinned
+        }
+    annotations = (
+        Annotation.objects.filter(annotation_version_id__in=versions.values())
+        .annotate(job_id=F("annotation_version__job_id"))
+        .only("class_name", "tag", "start_offset", "end_offset", "annotation_version_id")
+        .order_by("start_offset")
+    )
+    by_job = defaultdict(list)
+    for ann in annotations:
+        by_job[ann.job_id].append(ann)
+    return versions, by_job
+
+
+def iter_job_chunks(job_ids, chunk_size=CHUNK_SIZE, pinned=None):
+    """
+    Yield lists of (job, version id, annotations) for the given jobs, ordered
+    by job id so archives are reproducible, with each job's latest or
+    `pinned` version. Payloads are not loaded.
+
+    Jobs are streamed with .iterator() and annotations fetched per chunk, so
+    the query count grows with len(job_ids) / chunk_size, not with the
+    number of jobs.
+    """
+    jobs = (
+        Job.objects.filter(id__in=job_ids)
+        .only("id", "file_name", "blob_id")
+        .order_by("id")
+        .iterator(chunk_size=chunk_size)
+    )
+    while chunk := list(islice(jobs, chunk_size)):
+        versions, annotations = latest_annotations([job.id for job in chunk], pinned)
+        yield [(job, versions.get(job.id), annotations.get(job.id, [])) for job in chunk]
+
+
+def cached_entries(chunk) -> dict:
+    """Map job id → cached RenderedEntry for jobs whose latest version was already rendered."""
+    versions = {job.id: version_id for job, version_id, _ in chunk if version_id is not None}
+    if not versions:
+        return {}
+    rows = ExportEntry.objects.filter(
+        job_id__in=versions.keys(),
+        annotation_version_id__in=versions.values(),
+        normalizer_version=NORMALIZER_VERSION,
+    )
+    return {
+        row.job_id: RenderedEntry(
+            row.name, bytes(row.data), row.crc, row.size, bytes.fromhex(row.sha256)
+        )
+        for row in rows
+        if versions[row.job_id] == row.annotation_version_id
+    }
+
+
+def store_entries(rendered) -> None:
+    """Cache freshly rendered (job, version id, entry) triples, replacing older entries."""
+    if not rendered:
+        return
+    with transaction.atomic():
+        ExportEntry.objects.filter(job_id__in=[job.id for job, _, _ in rendered]).delete()
+        ExportEntry.objects.bulk_create(
+            [
+                ExportEntry(
+                    job_id=job.id,
+                    annotation_version_id=version_id,
+                    normalizer_version=NORMALIZER_VERSION,
+                    name=entry.name,
+                    data=entry.data,
+                    crc=entry.crc,
+                    size=entry.size,
+                    sha256=entry.sha256.hex(),
+                )
+                for job, version_id, entry in rendered
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def job_task(job, annotations) -> RenderTask | None:
+    """
+    Build the worker task for a job given the annotations of its latest
+    version, or None if it has no content. A stale normalization cache is
+    left for the worker to recompute.
+    """
+    if not job.eml_content:
+        return None
+
+    if job.blob.normalization_is_current:
+        normalized, has_encoded = job.blob.get_normalized()
+    else:
+        normalized, has_encoded = None, False
+
+    # The raw .eml is only needed to normalize or to re-encode
+    raw_content = job.eml_content if normalized is None or has_encoded else ""
+    short_id = str(job.id)[:8]
+    return RenderTask(
+        f"REDACTED_{short_id}_{job.file_name}",
+        raw_content,
+        normalized,
+        has_encoded,
+        annotation_spans(annotations),
+    )
+
+
+def iter_rendered(job_ids, workers=1, use_cache=True, pinned=None):
+    """
+    Yield a RenderedEntry (or None for jobs without content) per job, in job
+    id order, rendered from each job's latest or `pinned` annotation version.
+
+    Jobs whose latest annotation version was rendered before are copied from
+    the ExportEntry cache; only the others have their payloads loaded and
+    go to the workers. New entries and any normalization the workers had to
+    recompute are cached as they come back.
+    """
+    in_flight = deque()
+
+    def tasks():
+        for chunk in iter_job_chunks(job_ids, pinned=pinned):
+            cached = cached_entries(chunk) if use_cache else {}
+            _load_blobs([job for job, _, _ in chunk if job.id not in cached])
+            for job, version_id, annotations in chunk:
+                entry = cached.get(job.id)
+                in_flight.append((job, version_id, entry is None))
+                yield entry or job_task(job, annotations)
+
+    rendered = []
+    for entry in render_entries(tasks(), workers=workers):
+        job, version_id, fresh = in_flight.popleft()
+        if entry is not None and fresh:
+            if entry.normalized is not None:
+                job.blob.cache_normalized(*entry.normalized)
+            if use_cache and version_id is not None:
+                rendered.append((job, version_id, entry._replace(normalized=None)))
+                if len(rendered) >= CACHE_WRITE_BATCH:
+                    store_entries(rendered)
+                    rendered = []
+        yield entry
+    store_entries(rendered)
+
+
+def _load_blobs(jobs) -> None:
+    """Attach payloads to jobs that need rendering, in one query."""
+    blobs = EmlBlob.objects.in_bulk([job.blob_id for job in jobs if job.blob_id])
+    for job in jobs:
+        if job.blob_id:
+            job.blob = blobs[job.blob_id]
+
+
+def iter_archive_entries(record, workers=1):
+    """
+    Yield the entries of a record's archive: with EML in its formats, one
+    item per job (None for jobs that produce no entry), then its manifests.
+    """
+    # Records created before versions were pinned follow the latest versions
+    pinned = record.annotation_versions
+    if ExportRecord.Format.EML in record.formats:
+        yield from iter_rendered(record.job_ids, workers=workers, pinned=pinned)
+    yield from manifest_entries(record.job_ids, record.formats, pinned)
+
+
+def is_reproducible(record) -> bool:
+    """
+    Whether regenerating `record` can still produce the content it was
+    created with: its pinned annotation versions all exist and its inputs,
+    including the normalizer version, are unchanged.
+    """
+    pinned = record.annotation_versions
+    if pinned is None:
+        return True
+    if AnnotationVersion.objects.filter(id__in=list(pinned.values())).count() != len(set(pinned.values())):
+        return False
+    return not record.input_digest or input_digest(record.job_ids, record.formats, pinned) == record.input_digest
+
+
+def build_export(record, workers=None) -> None:
+    """
+    Write the export archive for a PENDING record, rendering jobs on
+    `workers` processes (default: EXPORT_WORKERS setting).
+
+    The record moves to RUNNING while jobs are processed and ends DONE with
+    its file path and size, or FAILED with the error and no archive left on
+    disk.
+    """
+    record.status = ExportRecord.Status.RUNNING
+    record.processed_count = 0
+    record.total_count = len(record.job_ids)
+    record.save(update_fields=["status", "processed_count", "total_count"])
+
+    workers = workers or settings.EXPORT_WORKERS
+    zip_path = get_export_path(record)
+    try:
+        os.makedirs(os.path.dirname(zip_path), exist_ok=True)
+        entries = iter_archive_entries(record, workers=workers)
+        digest = hashlib.sha256()
+
+        with ZipWriter(zip_path) as archive:
+            for processed, entry in enumerate(entries, start=1):
+                if entry is not None:
+                    archive.write(entry)
+                    _update_digest(digest, entry)
+                if processed % PROGRESS_INTERVAL == 0:
+                    _save_progress(record, min(processed, record.total_count))
+
+        record.status = ExportRecord.Status.DONE
+        record.processed_count = record.total_count
+        record.file_path = zip_path
+        record.file_size = os.path.getsize(zip_path)
+        record.content_digest = digest.hexdigest()
+        record.file_sha256 = file_sha256(zip_path)
+        record.save(
+            update_fields=[
+                "status",
+                "processed_count",
+                "file_path",
+                "file_size",
+                "content_digest",
+                "file_sha256",
+            ]
+        )
+
+    except Exception as e:
+        if os.path.exists(zip_path):
+            os.remove(zip_path)
+        record.status = ExportRecord.Status.FAILED
+        record.error_message = str(e)
+        record.save(update_fields=["status", "error_message"])
+        return
+
+    # Make room for the new archive
+    enforce_retention(keep=[zip_path])
+
+
+def stream_export(record):
+    """
+    Yield the export archive for a record as bytes, one entry at a time;
+    memory stays bounded by the largest single entry. Rendering runs inline:
+    download requests do not start worker pools.
+
+    The first complete stream of a STREAM record stores its content digest
+    and size. A stream whose content differs from the recorded digest raises
+    ExportContentChanged before the archive's central directory is sent, so
+    the client never receives a complete archive with different content.
+    """
+    sink = _ZipSink()
+    digest = hashlib.sha256()
+    size = 0
+    with ZipWriter(sink) as archive:
+        for entry in iter_archive_entries(record):
+            if entry is None:
+                continue
+            archive.write(entry)
+            _update_digest(digest, entry)
+            data = sink.drain()
+            size += len(data)
+            yield data
+
+        content_digest = digest.hexdigest()
+        if record.content_digest and record.content_digest != content_digest:
+            logger.error("Export %s regenerated with different content; download aborted", record.id)
+            raise ExportContentChanged(f"Export {record.id} no longer matches its recorded content.")
+    # Central directory, written when the archive is closed
+    data = sink.drain()
+    yield data
+
+    if not record.content_digest:
+        record.content_digest = content_digest
+        record.file_size = size + len(data)
+        record.save(update_fields=["content_digest", "file_size"])
+
+
+class _ZipSink:
+    """Unseekable write target that hands buffered ZIP bytes back to the caller."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _update_digest(digest, entry) -> None:
+    # Per-entry hashes are computed by the workers alongside the deflate
+    digest.update(entry.name.encode("utf-8") + b"\0" + entry.sha256)
+
+
+def _save_progress(record, processed) -> None:
+    record.processed_count = processed
+    record.save(update_fields=["processed_count"])
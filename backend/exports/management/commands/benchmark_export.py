@@ -0,0 +1,161 @@
+import hashlib
+import os
+import quopri
+import random
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.eml_normalizer import normalize_eml
+from exports.archive import ZipWriter
+from exports.deidentify import Span
+from exports.engine import RenderTask, render_entries
+
+FIRST_NAMES = ["Renée", "John", "Aiko", "Zoë", "Carlos", "Fatima", "Oleksandr", "Mary"]
+LAST_NAMES = ["Dupont", "Smith", "Tanaka", "Müller", "García", "Haddad", "Kovalenko", "O'Neil"]
+FILLER = (
+    "Thanks for your message. As discussed in the meeting, please find the "
+    "updated figures below and let me know if anything needs to change. "
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the export engine over a synthetic corpus at increasing worker counts (no database access)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--emails", type=int, default=10000, help="Synthetic emails to export (default: 10000)")
+        parser.add_argument(
+            "--workers",
+            type=str,
+            default=None,
+            help="Comma-separated worker counts (default: 1, 2, 4, ... up to the CPU count)",
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Leave normalization to the workers, as with a stale normalization cache",
+        )
+        parser.add_argument("--seed", type=int, default=15)
+
+    def handle(self, *args, **options):
+        worker_counts = self._worker_counts(options["workers"])
+
+        start = time.perf_counter()
+        tasks = _synthetic_tasks(options["emails"], options["seed"], options["cold"])
+        raw_bytes = sum(len(task.raw_content or task.normalized) for task in tasks)
+        self.stdout.write(
+            f"Built {len(tasks)} emails ({raw_bytes / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s; "
+            f"{os.cpu_count()} CPUs available."
+        )
+
+        baseline = None
+        digests = set()
+        for workers in worker_counts:
+            elapsed, archive_size, digest = _run(tasks, workers)
+            baseline = baseline or elapsed
+            digests.add(digest)
+            self.stdout.write(
+                f"workers={workers:<3} {elapsed:7.2f}s  {len(tasks) / elapsed:8.0f} emails/s  "
+                f"speedup {baseline / elapsed:4.2f}x  archive {archive_size / 1e6:.1f} MB"
+            )
+
+        if len(digests) != 1:
+            raise CommandError("Archive contents differ between worker counts.")
+        self.stdout.write(self.style.SUCCESS("Archive contents identical across worker counts."))
+
+    def _worker_counts(self, value):
+        if value:
+            try:
+                counts = [int(v) for v in value.split(",")]
+            except ValueError:
+                raise CommandError(f"Invalid worker counts: '{value}'.")
+            if any(count < 1 for count in counts):
+                raise CommandError("Worker counts must be at least 1.")
+            return counts
+        counts, count = [], 1
+        while count < (os.cpu_count() or 1):
+            counts.append(count)
+            count *= 2
+        return counts + [os.cpu_count() or 1]
+
+
+class _CountingSink:
+    """Unseekable sink that only counts the archive bytes written to it."""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def _run(tasks, workers):
+    sink = _CountingSink()
+    digest = hashlib.sha256()
+    start = time.perf_counter()
+    with ZipWriter(sink) as archive:
+        for entry in render_entries(tasks, workers=workers):
+            archive.write(entry)
+            digest.update(entry.name.encode("utf-8") + b"\0" + entry.sha256)
+    return time.perf_counter() - start, sink.size, digest.hexdigest()
+
+
+def _synthetic_tasks(count, seed, cold):
+    rnd = random.Random(seed)
+    tasks = []
+    for i in range(count):
+        raw, people = _synthetic_email(rnd, i)
+        normalized, has_encoded = normalize_eml(raw)
+        stripped = normalized.replace("\r", "")
+        spans = []
+        for tag, value in people:
+            position = stripped.find(value)
+            while position != -1:
+                spans.append(Span(position, position + len(value), tag))
+                position = stripped.find(value, position + len(value))
+        spans.sort(key=lambda span: span.start)
+        tasks.append(
+            RenderTask(
+                name=f"REDACTED_{i:08d}_message_{i}.eml",
+                raw_content=raw if cold or has_encoded else "",
+                normalized=None if cold else normalized,
+                has_encoded=False if cold else has_encoded,
+                spans=spans,
+            )
+        )
+    return tasks
+
+
+def _synthetic_email(rnd, index):
+    name = f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}"
+    address = f"user{index}@example.com"
+    phone = f"555-{rnd.randint(0, 9999):04d}"
+    body = "\n".join(
+        f"Dear {name}, " + FILLER * rnd.randint(1, 6) + f"Call {phone} or write to {address}."
+        for _ in range(rnd.randint(2, 12))
+    )
+
+    msg = MIMEMultipart("alternative")
+    msg["From"] = address
+    msg["To"] = "support@example.org"
+    msg["Subject"] = f"Request {index}"
+    for subtype in ("plain", "html"):
+        text = body if subtype == "plain" else f"<html><body><p>{body}</p></body></html>"
+        part = MIMEText(text, subtype, "utf-8")
+        if rnd.random() < 0.5:
+            # MIMEText picks base64 for utf-8; switch some parts to QP
+            del part["Content-Transfer-Encoding"]
+            part.set_payload(quopri.encodestring(text.encode("utf-8")).decode("ascii"))
+            part["Content-Transfer-Encoding"] = "quoted-printable"
+        msg.attach(part)
+    raw = msg.as_string()
+    if rnd.random() < 0.5:
+        raw = raw.replace("\n", "\r\n")
+    return raw, [("[person]", name), ("[phone]", phone), ("[email]", address)]
+
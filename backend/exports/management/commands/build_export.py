@@ -0,0 +1,42 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from exports.generation import build_export
+from exports.models import ExportRecord
+
+
+class Command(BaseCommand):
+    help = "Build the archive for a pending export (run in the background by the export endpoint)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("export_id", type=str, help="UUID of the export to build")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Processes rendering jobs (default: EXPORT_WORKERS setting)",
+        )
+
+    def handle(self, *args, **options):
+        export_id = options["export_id"]
+
+        try:
+            record = ExportRecord.objects.get(pk=export_id)
+        except (ExportRecord.DoesNotExist, ValidationError):
+            raise CommandError(f"Export with ID '{export_id}' not found.")
+
+        if record.status != ExportRecord.Status.PENDING:
+            raise CommandError(f"Export '{export_id}' is {record.status}, not PENDING.")
+
+        build_export(record, workers=options["workers"])
+
+        record.refresh_from_db()
+        if record.status == ExportRecord.Status.DONE:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Exported {record.total_count} jobs to {record.file_path} "
+                    f"({record.file_size} bytes)."
+                )
+            )
+        else:
+            self.stdout.write(self.style.ERROR(f"Export failed: {record.error_message}"))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from exports import storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply export retention and reconcile export files on disk with export records "
+        "(remove orphaned files, detach records whose files are gone)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            default=False,
+            help="Report what would change without touching files or records",
+        )
+
+    def handle(self, *args, **options):
+        counts = storage.sweep(dry_run=options["dry_run"])
+        prefix = "Would remove" if options["dry_run"] else "Removed"
+
+        self.stdout.write(f"  Records with missing files: {counts['missing_files']}")
+        self.stdout.write(f"  Orphaned files:             {counts['orphan_files']}")
+        self.stdout.write(f"  Archives past retention:    {counts['evicted_archives']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix} {counts['orphan_files'] + counts['evicted_archives']} export file(s)."
+            )
+        )
@@ -0,0 +1,112 @@
+"""
+Span manifests for exports.
+
+A manifest lists every annotation of each exported job's latest annotation
+version, one row per span, so consumers can load a dataset's labels without
+parsing the redacted emails. Offsets index the job's normalized email
+content with carriage returns removed, as in the annotation tool.
+
+The `text` column is the span's original_text, not de-identified: a
+manifest carries the PII that the archive's redacted emails leave out.
+
+Rows come from bulk queries (two per CHUNK_SIZE jobs) and are written as
+JSON Lines (`manifest.jsonl`) or Parquet (`manifest.parquet`). Parquet
+requires the optional `pyarrow` package (the `parquet` extra).
+"""
+
+import io
+import json
+
+from django.core.exceptions import ImproperlyConfigured
+
+from annotations.models import Annotation
+
+from .engine import deflate_entry
+from .models import ExportRecord
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+CHUNK_SIZE = 500
+
+COLUMNS = ("job_id", "file_name", "annotation_id", "class_name", "tag", "start_offset", "end_offset", "text")
+
+ENTRY_NAMES = {
+    ExportRecord.Format.JSONL: "manifest.jsonl",
+    ExportRecord.Format.PARQUET: "manifest.parquet",
+}
+
+
+def parquet_available() -> bool:
+    return pyarrow is not None
+
+
+def manifest_rows(job_ids, pinned=None):
+    """
+    Yield one tuple of COLUMNS per span, ordered by job id and offset, from
+    each job's latest annotation version or the version `pinned` for it.
+    """
+    from .generation import latest_version_ids
+
+    job_ids = sorted(str(job_id) for job_id in job_ids)
+    for i in range(0, len(job_ids), CHUNK_SIZE):
+        chunk = job_ids[i : i + CHUNK_SIZE]
+        if pinned is None:
+            versions = latest_version_ids(chunk)
+        else:
+            versions = {job_id: pinned[job_id] for job_id in chunk if job_id in pinned}
+        rows = (
+            Annotation.objects.filter(annotation_version_id__in=versions.values())
+            .order_by("annotation_version__job_id", "start_offset", "end_offset")
+            .values_list(
+                "annotation_version__job_id",
+                "annotation_version__job__file_name",
+                "id",
+                "class_name",
+                "tag",
+                "start_offset",
+                "end_offset",
+                "original_text",
+            )
+        )
+        for job_id, file_name, annotation_id, *rest in rows.iterator(chunk_size=2000):
+            yield (str(job_id), file_name, str(annotation_id), *rest)
+
+
+def manifest_entries(job_ids, formats, pinned=None) -> list:
+    """Archive entries for the manifest formats requested in `formats`."""
+    entries = []
+    if ExportRecord.Format.JSONL in formats:
+        entries.append(jsonl_entry(job_ids, pinned))
+    if ExportRecord.Format.PARQUET in formats:
+        entries.append(parquet_entry(job_ids, pinned))
+    return entries
+
+
+def jsonl_entry(job_ids, pinned=None):
+    lines = (
+        json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False).encode("utf-8") + b"\n"
+        for row in manifest_rows(job_ids, pinned)
+    )
+    return deflate_entry(ENTRY_NAMES[ExportRecord.Format.JSONL], lines)
+
+
+def parquet_entry(job_ids, pinned=None):
+    if pyarrow is None:
+        raise ImproperlyConfigured("Parquet manifests require the 'pyarrow' package to be installed.")
+    columns = {name: [] for name in COLUMNS}
+    for row in manifest_rows(job_ids, pinned):
+        for name, value in zip(COLUMNS, row):
+            columns[name].append(value)
+    schema = pyarrow.schema(
+        [
+            (name, pyarrow.int64() if name.endswith("_offset") else pyarrow.string())
+            for name in COLUMNS
+        ]
+    )
+    buffer = io.BytesIO()
+    pyarrow.parquet.write_table(pyarrow.table(columns, schema=schema), buffer)
+    return deflate_entry(ENTRY_NAMES[ExportRecord.Format.PARQUET], [buffer.getvalue()])
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.11 on 2026-10-17 12:37
+
+from django.db import migrations, models
+
+
+def mark_existing_done(apps, schema_editor):
+    """Exports created before background builds were all built synchronously."""
+    ExportRecord = apps.get_model("exports", "ExportRecord")
+    records = list(ExportRecord.objects.only("id", "job_ids"))
+    for record in records:
+        record.status = "DONE"
+        record.processed_count = record.total_count = len(record.job_ids)
+    ExportRecord.objects.bulk_update(
+        records, ["status", "processed_count", "total_count"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exports", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportrecord",
+            name="error_message",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="exportrecord",
+            name="processed_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="exportrecord",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("RUNNING", "Running"),
+                    ("DONE", "Done"),
+                    ("FAILED", "Failed"),
+                ],
+                default="PENDING",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="exportrecord",
+            name="total_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(mark_existing_done, migrations.RunPython.noop),
+    ]
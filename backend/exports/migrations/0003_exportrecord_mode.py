@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-17 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exports", "0002_exportrecord_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportrecord",
+            name="content_digest",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="exportrecord",
+            name="mode",
+            field=models.CharField(
+                choices=[("ARCHIVE", "Archive"), ("STREAM", "Stream")],
+                default="ARCHIVE",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.11 on 2026-10-17 12:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("annotations", "0001_initial"),
+        ("datasets", "0013_emlblob_normalized_cache"),
+        ("exports", "0003_exportrecord_mode"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportrecord",
+            name="base_export",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="deltas",
+                to="exports.exportrecord",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ExportEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("normalizer_version", models.PositiveIntegerField()),
+                ("name", models.CharField(max_length=300)),
+                ("data", models.BinaryField()),
+                ("crc", models.BigIntegerField()),
+                ("size", models.BigIntegerField()),
+                ("sha256", models.CharField(max_length=64)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "annotation_version",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="export_entries",
+                        to="annotations.annotationversion",
+                    ),
+                ),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="export_entries",
+                        to="datasets.job",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("job", "annotation_version", "normalizer_version"),
+                        name="unique_export_entry",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-17 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exports", "0004_exportentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportrecord",
+            name="input_digest",
+            field=models.CharField(blank=True, db_index=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="exportrecord",
+            name="last_accessed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-17 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exports", "0005_exportrecord_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportrecord",
+            name="file_sha256",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
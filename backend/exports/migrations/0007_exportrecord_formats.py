@@ -0,0 +1,19 @@
+# Generated by Django 5.2.11 on 2026-10-17 13:41
+
+import exports.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exports", "0006_exportrecord_file_sha256"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportrecord",
+            name="formats",
+            field=models.JSONField(default=exports.models.default_formats),
+        ),
+    ]
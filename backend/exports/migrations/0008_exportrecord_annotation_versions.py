@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-17 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exports", "0007_exportrecord_formats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportrecord",
+            name="annotation_versions",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -3,7 +3,30 @@ from django.conf import settings
 from django.db import models
 
 
+def default_formats():
+    return [ExportRecord.Format.EML]
+
+
 class ExportRecord(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    class Mode(models.TextChoices):
+        # Built in the background and stored under MEDIA_ROOT
+        ARCHIVE = "ARCHIVE", "Archive"
+        # Regenerated and streamed on every download, nothing kept on disk
+        STREAM = "STREAM", "Stream"
+
+    class Format(models.TextChoices):
+        # Redacted .eml file per job
+        EML = "EML", "Redacted EML"
+        # Span manifest of every job's latest annotations
+        JSONL = "JSONL", "JSONL manifest"
+        PARQUET = "PARQUET", "Parquet manifest"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     dataset = models.ForeignKey("datasets.Dataset", on_delete=models.CASCADE, related_name="exports")
     job_ids = models.JSONField(default=list)
@@ -13,6 +36,64 @@ class ExportRecord(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="exports"
     )
     exported_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    processed_count = models.IntegerField(default=0)
+    total_count = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True, default="")
+    mode = models.CharField(max_length=20, choices=Mode.choices, default=Mode.ARCHIVE)
+    # Contents of the archive, a list of Format values
+    formats = models.JSONField(default=default_formats)
+    # SHA-256 over each entry's name and content SHA-256, in archive order
+    content_digest = models.CharField(max_length=64, blank=True, default="")
+    # SHA-256 of the archive file's bytes, served as its strong ETag
+    file_sha256 = models.CharField(max_length=64, blank=True, default="")
+    # SHA-256 of the inputs (job ids, their latest annotation version ids and
+    # the normalizer version); ARCHIVE exports with equal inputs share a file
+    input_digest = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    # Last download, for LRU eviction of archive files
+    last_accessed_at = models.DateTimeField(null=True, blank=True)
+    # str(job id) → str(annotation version id), pinned when the record is
+    # created; entries are rendered from these versions. Null on records
+    # created before pinning, which follow the latest versions.
+    annotation_versions = models.JSONField(null=True, blank=True)
+    # Set on delta exports: the dataset's newest DONE export when it was created
+    base_export = models.ForeignKey(
+        "self", on_delete=models.SET_NULL, null=True, blank=True, related_name="deltas"
+    )
 
     def __str__(self):
         return f"Export {self.id} - {self.dataset.name}"
+
+
+class ExportEntry(models.Model):
+    """
+    Cached de-identified archive entry for a job, deflated and ready to be
+    copied into any archive.
+
+    Keyed by (job, annotation version, normalizer version): a job that has
+    not been re-annotated since its last export is not rendered again. Only
+    the newest entry per job is kept.
+    """
+
+    job = models.ForeignKey("datasets.Job", on_delete=models.CASCADE, related_name="export_entries")
+    annotation_version = models.ForeignKey(
+        "annotations.AnnotationVersion", on_delete=models.CASCADE, related_name="export_entries"
+    )
+    normalizer_version = models.PositiveIntegerField()
+    name = models.CharField(max_length=300)
+    data = models.BinaryField()
+    crc = models.BigIntegerField()
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["job", "annotation_version", "normalizer_version"],
+                name="unique_export_entry",
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,114 @@
+"""
+Cached export previews.
+
+A preview depends only on the email content, the job's latest annotation
+version and the normalizer version, so it is cached under that triple. A
+new annotation version (or normalizer) changes the key: stale previews are
+never served and simply age out.
+
+Entries live in a bounded per-process LRU (EXPORT_PREVIEW_CACHE_SIZE) and,
+when EXPORT_PREVIEW_CACHE_URL is configured, in a cache shared by all
+workers. Class colors and labels are cached with the annotations, so a
+renamed class shows up once its previews are evicted.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from annotations.models import Annotation
+from annotations.serializers import AnnotationSerializer
+from core.eml_normalizer import NORMALIZER_VERSION
+
+from .deidentify import deidentify
+
+
+class LRUCache:
+    """Thread-safe mapping that drops the least recently used entries beyond `maxsize`."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_local_cache = LRUCache(settings.EXPORT_PREVIEW_CACHE_SIZE)
+
+
+def preview_key(job, latest_version_id) -> str:
+    content = job.content_hash or f"blob-{job.blob_id}"
+    return f"export-preview:{NORMALIZER_VERSION}:{content}:{latest_version_id or 'none'}"
+
+
+def get_preview(job, latest_version_id):
+    """
+    Return {original, deidentified, annotations} for a job whose latest
+    annotation version is `latest_version_id` (None without versions), or
+    None when the job has no email content.
+    """
+    key = preview_key(job, latest_version_id)
+    preview = _local_cache.get(key)
+    if preview is not None:
+        return preview
+
+    shared = _shared_cache()
+    if shared is not None:
+        preview = shared.get(key)
+    if preview is None:
+        preview = build_preview(job, latest_version_id)
+        if preview is None:
+            return None
+        if shared is not None:
+            shared.set(key, preview)
+    _local_cache.set(key, preview)
+    return preview
+
+
+def build_preview(job, latest_version_id):
+    if not job.eml_content:
+        return None
+    normalized, _ = job.get_normalized_content()
+    if latest_version_id is None:
+        return {"original": normalized, "deidentified": normalized, "annotations": []}
+
+    annotations = list(
+        Annotation.objects.filter(annotation_version_id=latest_version_id)
+        .select_related("annotation_class")
+        .order_by("start_offset")
+    )
+    return {
+        "original": normalized,
+        "deidentified": deidentify(normalized, annotations),
+        "annotations": [dict(data) for data in AnnotationSerializer(annotations, many=True).data],
+    }
+
+
+def _shared_cache():
+    if settings.EXPORT_PREVIEW_CACHE_ALIAS not in settings.CACHES:
+        return None
+    return caches[settings.EXPORT_PREVIEW_CACHE_ALIAS]
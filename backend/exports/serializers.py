@@ -2,6 +2,9 @@ from rest_framework import serializers
 
 from datasets.serializers import MiniUserSerializer
 
+from .manifest import parquet_available
+from .models import ExportRecord
+
 
 class DatasetWithDeliveredSerializer(serializers.Serializer):
     id = serializers.UUIDField()
@@ -25,11 +28,43 @@ class ExportRecordSerializer(serializers.Serializer):
     file_size = serializers.IntegerField()
     exported_by = MiniUserSerializer()
     exported_at = serializers.DateTimeField()
+    status = serializers.CharField()
+    processed_count = serializers.IntegerField()
+    total_count = serializers.IntegerField()
+    error_message = serializers.CharField()
+    mode = serializers.CharField()
+    formats = serializers.ListField(child=serializers.CharField())
+    content_digest = serializers.CharField()
+    base_export_id = serializers.UUIDField(allow_null=True)
     download_url = serializers.CharField()
 
 
-class CreateExportSerializer(serializers.Serializer):
+class ExportOptionsSerializer(serializers.Serializer):
+    # Defaults to STREAM up to EXPORT_STREAM_MAX_JOBS jobs, ARCHIVE above
+    mode = serializers.ChoiceField(choices=ExportRecord.Mode.choices, required=False)
+    formats = serializers.ListField(
+        child=serializers.ChoiceField(choices=ExportRecord.Format.choices),
+        min_length=1,
+        required=False,
+        help_text=(
+            "Archive contents. JSONL and PARQUET manifests include each span's raw original_text, "
+            "i.e. the PII that the de-identified EML files redact."
+        ),
+    )
+
+    def validate_formats(self, value):
+        if ExportRecord.Format.PARQUET in value and not parquet_available():
+            raise serializers.ValidationError("Parquet manifests are not available on this server.")
+        # Stored in a canonical order, without duplicates
+        return [fmt for fmt in ExportRecord.Format.values if fmt in value]
+
+
+class CreateExportSerializer(ExportOptionsSerializer):
     job_ids = serializers.ListField(
         child=serializers.UUIDField(),
         min_length=1,
     )
+
+
+class CreateDeltaExportSerializer(ExportOptionsSerializer):
+    pass
@@ -0,0 +1,195 @@
+"""
+Export archive storage lifecycle.
+
+ARCHIVE exports are written to MEDIA_ROOT/exports/<export id>/export.zip.
+Records whose inputs match an existing archive share its file, so a file is
+only removed once no record references it.
+
+Retention evicts archives older than EXPORT_RETENTION_DAYS and, least
+recently downloaded first, any beyond EXPORT_STORAGE_MAX_BYTES. Evicted
+exports keep their record and are regenerated from its job list when
+downloaded. The `sweep_exports` command applies retention and reconciles the
+directory with the ExportRecord table.
+"""
+
+import hashlib
+import os
+import shutil
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Max
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ExportRecord
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_exports_dir() -> Path:
+    return Path(settings.MEDIA_ROOT) / "exports"
+
+
+def get_export_path(record) -> str:
+    """Location of the export archive for a record."""
+    return str(get_exports_dir() / str(record.id) / "export.zip")
+
+
+def resolve_path(file_path) -> Path:
+    """Absolute path of a stored `file_path` (older records may be MEDIA_ROOT-relative)."""
+    path = Path(file_path)
+    return path if path.is_absolute() else Path(settings.MEDIA_ROOT) / path
+
+
+def file_sha256(file_path) -> str:
+    """SHA-256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_reusable_archive(input_digest):
+    """Newest finished archive built from the same inputs whose file still exists, or None."""
+    if not input_digest:
+        return None
+    candidates = (
+        ExportRecord.objects.filter(
+            input_digest=input_digest,
+            mode=ExportRecord.Mode.ARCHIVE,
+            status=ExportRecord.Status.DONE,
+        )
+        .exclude(file_path="")
+        .order_by("-exported_at")
+    )
+    for record in candidates:
+        if resolve_path(record.file_path).is_file():
+            return record
+    return None
+
+
+def touch(record) -> None:
+    """Mark an archive as used now, for LRU eviction."""
+    record.last_accessed_at = timezone.now()
+    ExportRecord.objects.filter(pk=record.pk).update(last_accessed_at=record.last_accessed_at)
+
+
+def evict(file_path) -> None:
+    """Remove an archive file and detach it from every record that shares it."""
+    ExportRecord.objects.filter(file_path=file_path).update(file_path="")
+    _remove_file(resolve_path(file_path))
+
+
+def delete_unreferenced_files(file_paths) -> int:
+    """
+    Remove the given archive files that no record references any more.
+    Paths are compared resolved, so a file stored MEDIA_ROOT-relative by one
+    record and absolute by another counts as referenced.
+    """
+    paths = {resolve_path(file_path) for file_path in file_paths if file_path}
+    if not paths:
+        return 0
+    stored = ExportRecord.objects.exclude(file_path="").values_list("file_path", flat=True)
+    referenced = {resolve_path(file_path) for file_path in stored.iterator()}
+    return sum(_remove_file(path) for path in paths - referenced)
+
+
+def enforce_retention(max_age_days=None, max_bytes=None, dry_run=False, keep=()) -> list[str]:
+    """
+    Evict archives past the age limit, then least recently used ones until
+    the total size fits. File paths in `keep` are never evicted. Returns the
+    evicted file paths.
+    """
+    max_age_days = settings.EXPORT_RETENTION_DAYS if max_age_days is None else max_age_days
+    max_bytes = settings.EXPORT_STORAGE_MAX_BYTES if max_bytes is None else max_bytes
+
+    # One row per file, least recently used first
+    archives = list(
+        ExportRecord.objects.exclude(file_path="")
+        .values("file_path")
+        .annotate(
+            last_used=Max(Coalesce("last_accessed_at", "exported_at")),
+            size=Max("file_size"),
+        )
+        .order_by("last_used")
+    )
+    keep = set(keep)
+    candidates = [archive for archive in archives if archive["file_path"] not in keep]
+
+    evicted = []
+    if max_age_days:
+        cutoff = timezone.now() - timedelta(days=max_age_days)
+        evicted = [archive for archive in candidates if archive["last_used"] < cutoff]
+    evicted_paths = {archive["file_path"] for archive in evicted}
+
+    if max_bytes:
+        total = sum(archive["size"] for archive in archives if archive["file_path"] not in evicted_paths)
+        for archive in candidates:
+            if total <= max_bytes:
+                break
+            if archive["file_path"] not in evicted_paths:
+                evicted.append(archive)
+                evicted_paths.add(archive["file_path"])
+                total -= archive["size"]
+
+    if not dry_run:
+        for archive in evicted:
+            evict(archive["file_path"])
+    return [archive["file_path"] for archive in evicted]
+
+
+def sweep(dry_run=False) -> dict:
+    """
+    Reconcile MEDIA_ROOT/exports with the ExportRecord table and apply
+    retention. Returns counts of what was (or would be) changed.
+    """
+    referenced = {}
+    for record_id, file_path in ExportRecord.objects.exclude(file_path="").values_list("id", "file_path"):
+        referenced.setdefault(resolve_path(file_path), []).append(record_id)
+
+    # Records pointing at files that are gone become regenerable
+    missing = [path for path in referenced if not path.is_file()]
+    if missing and not dry_run:
+        ExportRecord.objects.filter(
+            id__in=[record_id for path in missing for record_id in referenced[path]]
+        ).update(file_path="")
+
+    # Archives still being written belong to their in-flight record
+    in_progress = {
+        Path(get_export_path(record))
+        for record in ExportRecord.objects.filter(
+            status__in=[ExportRecord.Status.PENDING, ExportRecord.Status.RUNNING]
+        ).only("id")
+    }
+    orphans = []
+    exports_dir = get_exports_dir()
+    if exports_dir.is_dir():
+        for root, _, files in os.walk(exports_dir):
+            for name in files:
+                path = Path(root) / name
+                if path not in referenced and path not in in_progress:
+                    orphans.append(path)
+    if not dry_run:
+        for path in orphans:
+            _remove_file(path)
+
+    evicted = enforce_retention(dry_run=dry_run)
+    return {
+        "missing_files": len(missing),
+        "orphan_files": len(orphans),
+        "evicted_archives": len(evicted),
+    }
+
+
+def _remove_file(path) -> int:
+    if not path.is_file():
+        return 0
+    path.unlink()
+    # Remove the per-export directory once it is empty
+    parent = path.parent
+    if parent != get_exports_dir() and parent.is_dir() and not any(parent.iterdir()):
+        shutil.rmtree(parent)
+    return 1
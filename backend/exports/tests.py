@@ -1,3 +1,832 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import random
+import tempfile
+import time
+import zipfile
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from annotations.models import Annotation, AnnotationVersion
+
+from core.eml_normalizer import normalize_eml, re_encode_eml
+from datasets.models import Dataset, EmlBlob, Job
+
+from . import archive, generation, manifest, storage
+from .delivery import archive_response
+from .deidentify import Span, annotation_spans, deidentify, find_overlaps, redact, to_original_spans
+from .engine import RenderTask, deflate_entry, render_entries
+from .generation import ExportContentChanged
+from .manifest import COLUMNS, manifest_rows
+from .models import ExportEntry, ExportRecord
+from .previews import _local_cache
+
+
+def _reference_deidentify(raw_content, annotations):
+    """The original per-annotation rebuild, kept verbatim as the oracle."""
+    # Build list of \r positions for offset adjustment
+    cr_positions = [i for i, c in enumerate(raw_content) if c == "\r"]
+
+    def to_original_offset(stripped_offset):
+        extra = 0
+        for cr_pos in cr_positions:
+            if cr_pos <= stripped_offset + extra:
+                extra += 1
+            else:
+                break
+        return stripped_offset + extra
+
+    sorted_anns = sorted(annotations, key=lambda a: a.start_offset, reverse=True)
+    content = raw_content
+    for ann in sorted_anns:
+        tag = ann.tag or f"[{ann.class_name}]"
+        start = to_original_offset(ann.start_offset)
+        end = to_original_offset(ann.end_offset)
+        content = content[:start] + tag + content[end:]
+    return content
+
+
+def _annotation(start, end, tag="", class_name="email"):
+    return SimpleNamespace(start_offset=start, end_offset=end, tag=tag, class_name=class_name)
+
+
+class _Cases:
+    """Seeded generator of CRLF/LF content with annotations over its stripped text."""
+
+    ALPHABET = ["a", "b", "é", " ", "\n", "\r\n", "\r", "€"]
+
+    def __init__(self, seed):
+        self.rnd = random.Random(seed)
+
+    def content(self):
+        return "".join(self.rnd.choice(self.ALPHABET) for _ in range(self.rnd.randint(0, 80)))
+
+    def disjoint(self, length, count):
+        cuts = sorted(self.rnd.randint(0, length) for _ in range(2 * count))
+        spans = [(cuts[i], cuts[i + 1]) for i in range(0, len(cuts), 2)]
+        # Equal starts collide; keep the first of each
+        spans = [span for i, span in enumerate(spans) if i == 0 or span[0] != spans[i - 1][0]]
+        self.rnd.shuffle(spans)
+        return [self.annotation(start, end) for start, end in spans]
+
+    def arbitrary(self, length, count):
+        return [
+            self.annotation(self.rnd.randint(-3, length + 3), self.rnd.randint(-3, length + 3))
+            for _ in range(count)
+        ]
+
+    def annotation(self, start, end):
+        tag = self.rnd.choice(["", "[email_1]", "[person_2]"])
+        return _annotation(start, end, tag, self.rnd.choice(["email", "phone"]))
+
+
+class DeidentifyPropertyTests(SimpleTestCase):
+    """deidentify must reproduce the original per-annotation rebuild exactly."""
+
+    def test_disjoint_spans_match_reference(self):
+        cases = _Cases(seed=13)
+        for i in range(2000):
+            content = cases.content()
+            length = len(content.replace("\r", ""))
+            annotations = cases.disjoint(length, cases.rnd.randint(0, 8))
+            with self.subTest(case=i):
+                self.assertEqual(
+                    deidentify(content, annotations), _reference_deidentify(content, annotations)
+                )
+
+    def test_arbitrary_spans_match_reference(self):
+        # Overlapping, inverted and out-of-range spans take the fallback
+        cases = _Cases(seed=31)
+        for i in range(2000):
+            content = cases.content()
+            length = len(content.replace("\r", ""))
+            annotations = cases.arbitrary(length, cases.rnd.randint(0, 6))
+            with self.subTest(case=i):
+                self.assertEqual(
+                    deidentify(content, annotations), _reference_deidentify(content, annotations)
+                )
+
+    def test_offsets_skip_carriage_returns(self):
+        content = "a\r\nb\r\nc"
+        spans = to_original_spans(content, [Span(0, 1, "A"), Span(2, 3, "B"), Span(4, 5, "C")])
+        # An offset just before a \r lands after it, as it always has
+        self.assertEqual([(s.start, s.end) for s in spans], [(0, 2), (3, 5), (6, 7)])
+        self.assertEqual(redact(content, spans), "A\nB\nC")
+
+    def test_find_overlaps(self):
+        first, inside, later = Span(0, 5, "A"), Span(3, 4, "B"), Span(5, 6, "C")
+        self.assertEqual(find_overlaps([first, later], 10), [])
+        self.assertEqual(find_overlaps([first, inside], 10), [(inside, first)])
+        self.assertEqual(find_overlaps([Span(4, 2, "X")], 10), [(Span(4, 2, "X"), None)])
+        self.assertEqual(find_overlaps([Span(8, 12, "X")], 10), [(Span(8, 12, "X"), None)])
+
+    def test_heavily_annotated_crlf_email_is_linear(self):
+        line = "Call Jane Doe at 555-0100 or jane@example.com today.\r\n"
+        content = line * 20000
+        stride = len(line) - 1
+        annotations = [
+            _annotation(i * stride + 5, i * stride + 13, "[name]") for i in range(20000)
+        ] + [_annotation(i * stride + 17, i * stride + 25, "[phone]") for i in range(20000)]
+
+        start = time.perf_counter()
+        result = deidentify(content, annotations)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(result, "Call [name] at [phone] or jane@example.com today.\r\n" * 20000)
+        self.assertLess(elapsed, 2)
+
+
+class _UnseekableBuffer(io.RawIOBase):
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
+class ExportEngineTests(SimpleTestCase):
+    EMAIL = (
+        "From: jane@example.com\r\n"
+        "Content-Type: text/plain; charset=utf-8\r\n"
+        "Content-Transfer-Encoding: quoted-printable\r\n"
+        "\r\n"
+        "Hi Ren=C3=A9e, call Jane at 555-0100.\r\n"
+    )
+
+    def tasks(self, count):
+        normalized, has_encoded = normalize_eml(self.EMAIL)
+        stripped = normalized.replace("\r", "")
+        start = stripped.index("555-0100")
+        spans = annotation_spans([_annotation(start, start + 8, "[phone]")])
+        tasks = []
+        for i in range(count):
+            # Alternate warm and cold normalization caches
+            if i % 2:
+                tasks.append(RenderTask(f"{i}.eml", self.EMAIL, None, False, spans))
+            else:
+                tasks.append(RenderTask(f"{i}.eml", self.EMAIL, normalized, has_encoded, spans))
+        return tasks
+
+    def archive(self, sink, entries):
+        with archive.ZipWriter(sink) as writer:
+            for entry in entries:
+                writer.write(entry)
+
+    def test_entries_form_valid_archives(self):
+        entries = list(render_entries(self.tasks(4)))
+        normalized, _ = normalize_eml(self.EMAIL)
+        start = normalized.replace("\r", "").index("555-0100")
+        annotations = [_annotation(start, start + 8, "[phone]")]
+        expected = re_encode_eml(deidentify(normalized, annotations), self.EMAIL).encode()
+        self.assertIn(b"call Jane at [phone].", expected)
+
+        seekable = io.BytesIO()
+        self.archive(seekable, entries)
+        unseekable = _UnseekableBuffer()
+        self.archive(unseekable, entries)
+
+        for data in (seekable.getvalue(), unseekable.buffer.getvalue()):
+            with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                self.assertIsNone(zf.testzip())
+                self.assertEqual(zf.namelist(), ["0.eml", "1.eml", "2.eml", "3.eml"])
+                self.assertEqual({zf.read(name) for name in zf.namelist()}, {expected})
+
+    def test_zip64_archives(self):
+        entries = [deflate_entry(f"{i}.eml", [random.Random(i).randbytes(300)]) for i in range(6)]
+        entries.append(deflate_entry("Zoë.eml", [b"x" * 1000]))
+        # Small limits put every Zip64 path under test: large entries,
+        # offsets past the limit, and the Zip64 end of central directory
+        with mock.patch.object(archive, "ZIP64_LIMIT", 500), mock.patch.object(archive, "ZIP_FILECOUNT_LIMIT", 4):
+            sink = _UnseekableBuffer()
+            self.archive(sink, entries)
+        data = sink.buffer.getvalue()
+        self.assertIn(b"PK\006\006", data)
+
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.namelist(), [entry.name for entry in entries])
+            for info, entry in zip(zf.infolist(), entries):
+                self.assertEqual(info.file_size, entry.size)
+                self.assertEqual(info.compress_size, len(entry.data))
+                self.assertEqual(hashlib.sha256(zf.read(info)).digest(), entry.sha256)
+            self.assertGreater(zf.infolist()[-1].header_offset, 500)
+
+    def test_recomputed_normalization_is_returned(self):
+        warm, cold = render_entries(self.tasks(2))
+        self.assertIsNone(warm.normalized)
+        self.assertEqual(cold.normalized, normalize_eml(self.EMAIL))
+
+    def test_worker_pool_matches_inline_order_and_output(self):
+        tasks = self.tasks(12)
+        tasks[5] = None
+        inline = list(render_entries(tasks, workers=1))
+        pooled = list(render_entries(tasks, workers=2))
+        self.assertIsNone(pooled[5])
+        self.assertEqual(pooled, inline)
+
+
+class ArchiveResponseTests(SimpleTestCase):
+    def setUp(self):
+        self.data = bytes(range(256)) * 1000
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media_root = tmp.name
+        self.path = Path(tmp.name) / "exports" / "abc" / "export.zip"
+        self.path.parent.mkdir(parents=True)
+        self.path.write_bytes(self.data)
+        self.sha256 = hashlib.sha256(self.data).hexdigest()
+        self.etag = f'"{self.sha256}"'
+
+    def get(self, **headers):
+        request = RequestFactory().get("/download/", headers=headers)
+        response = archive_response(request, self.path, "export.zip", self.sha256)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_full_download_has_validators(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.data)
+        self.assertEqual(response["ETag"], self.etag)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_byte_ranges(self):
+        size = len(self.data)
+        for header, start, end in [
+            ("bytes=100-199", 100, 199),
+            ("bytes=1000-", 1000, size - 1),
+            ("bytes=-500", size - 500, size - 1),
+            ("bytes=0-99999999", 0, size - 1),
+        ]:
+            with self.subTest(header=header):
+                response, body = self.get(Range=header, If_Range=self.etag)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(body, self.data[start : end + 1])
+                self.assertEqual(response["Content-Range"], f"bytes {start}-{end}/{size}")
+                self.assertEqual(int(response["Content-Length"]), end - start + 1)
+
+    def test_unsatisfiable_range(self):
+        response, _ = self.get(Range=f"bytes={len(self.data)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.data)}")
+
+    def test_stale_if_range_or_unsupported_range_sends_whole_file(self):
+        for headers in [
+            {"Range": "bytes=100-199", "If-Range": '"other"'},
+            {"Range": "bytes=100-199", "If-Range": f"W/{self.etag}"},
+            {"Range": "bytes=0-1,5-6"},
+            {"Range": "items=0-1"},
+            {"Range": "bytes=--5"},
+        ]:
+            with self.subTest(headers=headers):
+                response, body = self.get(**headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(body, self.data)
+
+    def test_if_none_match(self):
+        response, _ = self.get(If_None_Match=self.etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_sendfile_modes(self):
+        with override_settings(EXPORT_SENDFILE_MODE="x-sendfile"):
+            response, body = self.get(Range="bytes=0-9")
+        self.assertEqual(response["X-Sendfile"], str(self.path))
+        self.assertEqual(body, b"")
+
+        with override_settings(
+            EXPORT_SENDFILE_MODE="x-accel-redirect",
+            EXPORT_ACCEL_REDIRECT_PREFIX="/internal/",
+            MEDIA_ROOT=self.media_root,
+        ):
+            response, _ = self.get()
+        self.assertEqual(response["X-Accel-Redirect"], "/internal/abc/export.zip")
+        self.assertEqual(response["ETag"], self.etag)
+
+
+class StorageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        self.media_root = Path(media_root.name)
+        self.admin = User.objects.create_user(email="admin@example.com", name="Admin", password="pw")
+        self.dataset = Dataset.objects.create(name="retention", uploaded_by=self.admin, status=Dataset.Status.READY)
+
+    def create_archive(self, days_unused=0, size=100, dataset=None, relative=False, **fields):
+        record = ExportRecord.objects.create(
+            dataset=dataset or self.dataset,
+            status=ExportRecord.Status.DONE,
+            file_size=size,
+            last_accessed_at=timezone.now() - timedelta(days=days_unused),
+            **fields,
+        )
+        path = Path(storage.get_export_path(record))
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"\0" * size)
+        record.file_path = str(path.relative_to(self.media_root) if relative else path)
+        record.save(update_fields=["file_path"])
+        return record.file_path
+
+    def share(self, file_path, dataset=None, **fields):
+        """Another record pointing at an existing archive file."""
+        return ExportRecord.objects.create(
+            dataset=dataset or self.dataset, status=ExportRecord.Status.DONE, file_path=file_path, **fields
+        )
+
+    def test_evicts_expired_then_least_recently_used(self):
+        expired = self.create_archive(days_unused=40)
+        oldest, kept, older, newest = (self.create_archive(days_unused=days) for days in (20, 15, 10, 1))
+
+        evicted = storage.enforce_retention(max_age_days=30, max_bytes=300, keep=[kept])
+        self.assertEqual(evicted, [expired, oldest])
+
+        evicted = storage.enforce_retention(max_age_days=0, max_bytes=200, keep=[kept])
+        self.assertEqual(evicted, [older])
+        self.assertFalse(Path(older).exists())
+        self.assertEqual(
+            set(ExportRecord.objects.exclude(file_path="").values_list("file_path", flat=True)), {kept, newest}
+        )
+
+    def test_finds_reusable_archive_by_input_digest(self):
+        digest = "a" * 64
+        self.create_archive(days_unused=2, input_digest=digest)
+        newest = self.create_archive(input_digest=digest)
+        self.create_archive(input_digest="b" * 64)
+        ExportRecord.objects.create(
+            dataset=self.dataset, status=ExportRecord.Status.RUNNING, input_digest=digest, file_path=newest
+        )
+
+        self.assertEqual(storage.find_reusable_archive(digest).file_path, newest)
+        self.assertIsNone(storage.find_reusable_archive("c" * 64))
+        self.assertIsNone(storage.find_reusable_archive(""))
+
+        # A record whose file is gone is skipped for an older one
+        Path(newest).unlink()
+        self.assertNotEqual(storage.find_reusable_archive(digest).file_path, newest)
+
+    def test_sweep(self):
+        kept = self.create_archive()
+        missing = self.create_archive()
+        self.share(missing)
+        Path(missing).unlink()
+        orphan = storage.get_exports_dir() / "abandoned" / "export.zip"
+        orphan.parent.mkdir(parents=True)
+        orphan.write_bytes(b"zip")
+        building = ExportRecord.objects.create(dataset=self.dataset, status=ExportRecord.Status.RUNNING)
+        partial = Path(storage.get_export_path(building))
+        partial.parent.mkdir(parents=True)
+        partial.write_bytes(b"partial")
+
+        counts = {"missing_files": 1, "orphan_files": 1, "evicted_archives": 0}
+        self.assertEqual(storage.sweep(dry_run=True), counts)
+        self.assertTrue(orphan.exists())
+        self.assertEqual(ExportRecord.objects.filter(file_path=missing).count(), 2)
+
+        self.assertEqual(storage.sweep(), counts)
+        self.assertFalse(orphan.parent.exists())
+        self.assertFalse(ExportRecord.objects.filter(file_path=missing).exists())
+        self.assertTrue(Path(kept).exists())
+        self.assertTrue(partial.exists())
+        self.assertEqual(storage.sweep(), {"missing_files": 0, "orphan_files": 0, "evicted_archives": 0})
+
+    def test_shared_file_is_removed_with_its_last_record(self):
+        file_path = self.create_archive()
+        first = ExportRecord.objects.get(file_path=file_path)
+        second = self.share(file_path)
+
+        first.delete()
+        self.assertEqual(storage.delete_unreferenced_files([file_path]), 0)
+        self.assertTrue(Path(file_path).exists())
+
+        second.delete()
+        self.assertEqual(storage.delete_unreferenced_files([file_path, "", file_path]), 1)
+        self.assertFalse(Path(file_path).parent.exists())
+
+    def test_force_delete_dataset_removes_its_unshared_archives(self):
+        absolute = self.create_archive()
+        relative = self.create_archive(relative=True)
+        shared = self.create_archive(relative=True)
+        other = Dataset.objects.create(name="other", uploaded_by=self.admin, status=Dataset.Status.READY)
+        # The other dataset's record stores the shared file's absolute path
+        self.share(str(self.media_root / shared), dataset=other)
+
+        out = io.StringIO()
+        call_command("force_delete_dataset", str(self.dataset.id), "--yes", stdout=out)
+        self.assertIn("Removed 2 export file(s)", out.getvalue())
+        self.assertFalse(Path(absolute).exists())
+        self.assertFalse((self.media_root / relative).exists())
+        self.assertTrue((self.media_root / shared).exists())
+        self.assertEqual(ExportRecord.objects.get().dataset, other)
+
+        with self.assertRaisesMessage(CommandError, "not found"):
+            call_command("force_delete_dataset", "not-a-uuid", "--yes")
+
+
+class ExportApiTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@example.com", name="Admin", password="pw", role=User.Role.ADMIN
+        )
+        dataset = Dataset.objects.create(name="manifest", uploaded_by=cls.admin, status=Dataset.Status.READY)
+        cls.jobs = []
+        for i in range(3):
+            content = f"From: a@example.com\r\nSubject: {i}\r\n\r\nCall Bob at 555-010{i}.\r\n"
+            content_hash = f"{i:064d}"
+            job = Job.objects.create(
+                dataset=dataset,
+                file_name=f"email_{i}.eml",
+                blob=EmlBlob.objects.store(content_hash, content),
+                content_hash=content_hash,
+                status=Job.Status.DELIVERED,
+            )
+            text = job.get_normalized_content()[0].replace("\r", "")
+            for version_number in (1, 2):
+                version = AnnotationVersion.objects.create(job=job, version_number=version_number, source="QA")
+                needle = "Bob" if version_number == 1 else f"555-010{i}"
+                start = text.index(needle)
+                Annotation.objects.create(
+                    annotation_version=version,
+                    class_name="name" if version_number == 1 else "phone",
+                    tag="",
+                    start_offset=start,
+                    end_offset=start + len(needle),
+                    original_text=needle,
+                )
+            cls.jobs.append(job)
+
+    def setUp(self):
+        _local_cache.clear()
+
+    def test_manifest_lists_latest_spans_in_constant_queries(self):
+        job_ids = [job.id for job in self.jobs]
+        with CaptureQueriesContext(connection) as ctx:
+            rows = list(manifest_rows(job_ids))
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual([row[0] for row in rows], sorted(str(job_id) for job_id in job_ids))
+        self.assertEqual({row[3] for row in rows}, {"phone"})
+
+    def test_manifest_only_export(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            "/api/exports/",
+            {"job_ids": [str(job.id) for job in self.jobs], "mode": "STREAM", "formats": ["JSONL"]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["formats"], ["JSONL"])
+
+        download = self.client.get(response.data["download_url"])
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(download.streaming_content)))
+        self.assertEqual(archive.namelist(), ["manifest.jsonl"])
+        rows = [json.loads(line) for line in archive.read("manifest.jsonl").splitlines()]
+        self.assertEqual(
+            sorted((row["file_name"], row["text"]) for row in rows),
+            [(f"email_{i}.eml", f"555-010{i}") for i in range(3)],
+        )
+
+    def manifest_archive(self, formats):
+        record = self.create_stream_export(formats)
+        _, data = self.download(record)
+        return zipfile.ZipFile(io.BytesIO(data))
+
+    def expected_rows(self):
+        rows = []
+        for job in sorted(self.jobs, key=lambda job: str(job.id)):
+            annotation = Annotation.objects.get(annotation_version__job=job, annotation_version__version_number=2)
+            rows.append(
+                {
+                    "job_id": str(job.id),
+                    "file_name": job.file_name,
+                    "annotation_id": str(annotation.id),
+                    "class_name": "phone",
+                    "tag": "",
+                    "start_offset": annotation.start_offset,
+                    "end_offset": annotation.end_offset,
+                    "text": annotation.original_text,
+                }
+            )
+        return rows
+
+    def test_jsonl_manifest(self):
+        archive = self.manifest_archive(["JSONL"])
+        lines = archive.read("manifest.jsonl").splitlines()
+        self.assertEqual([list(json.loads(line)) for line in lines], [list(COLUMNS)] * 3)
+        self.assertEqual([json.loads(line) for line in lines], self.expected_rows())
+
+    @skipUnless(manifest.parquet_available(), "Parquet manifests need pyarrow")
+    def test_parquet_manifest(self):
+        import pyarrow.parquet
+
+        archive = self.manifest_archive(["EML", "JSONL", "PARQUET"])
+        self.assertEqual(archive.namelist()[3:], ["manifest.jsonl", "manifest.parquet"])
+        table = pyarrow.parquet.read_table(io.BytesIO(archive.read("manifest.parquet")))
+        self.assertEqual(table.column_names, list(COLUMNS))
+        self.assertEqual(str(table.schema.field("start_offset").type), "int64")
+        self.assertEqual(table.to_pylist(), self.expected_rows())
+
+    def test_parquet_without_pyarrow(self):
+        self.client.force_authenticate(self.admin)
+        with mock.patch.object(manifest, "pyarrow", None):
+            response = self.client.post(
+                "/api/exports/",
+                {"job_ids": [str(job.id) for job in self.jobs], "formats": ["PARQUET"]},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("formats", response.data)
+            with self.assertRaises(ImproperlyConfigured):
+                manifest.parquet_entry([job.id for job in self.jobs])
+
+    def create_stream_export(self, formats=("EML", "JSONL")):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            "/api/exports/",
+            {"job_ids": [str(job.id) for job in self.jobs], "mode": "STREAM", "formats": list(formats)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return ExportRecord.objects.get(id=response.data["id"])
+
+    def download(self, record):
+        response = self.client.get(f"/api/exports/{record.id}/download/")
+        if response.status_code != 200:
+            return response, None
+        return response, b"".join(response.streaming_content)
+
+    def test_stream_export_is_pinned_to_versions_at_creation(self):
+        record = self.create_stream_export()
+        self.assertEqual(len(record.annotation_versions), 3)
+
+        _, first = self.download(record)
+        record.refresh_from_db()
+        self.assertEqual(len(record.content_digest), 64)
+        self.assertEqual(record.file_size, len(first))
+
+        # A new version after creation does not change the export
+        version = AnnotationVersion.objects.create(job=self.jobs[0], version_number=3, source="QA")
+        Annotation.objects.create(
+            annotation_version=version, class_name="name", start_offset=0, end_offset=4, original_text="From"
+        )
+        _, second = self.download(record)
+        self.assertEqual(second, first)
+        archive = zipfile.ZipFile(io.BytesIO(second))
+        rows = [json.loads(line) for line in archive.read("manifest.jsonl").splitlines()]
+        self.assertEqual({row["class_name"] for row in rows}, {"phone"})
+
+    def test_changed_content_is_refused(self):
+        record = self.create_stream_export()
+        self.download(record)
+        ExportRecord.objects.filter(id=record.id).update(content_digest="0" * 64)
+        response = self.client.get(f"/api/exports/{record.id}/download/")
+        with self.assertRaises(ExportContentChanged):
+            b"".join(response.streaming_content)
+
+        AnnotationVersion.objects.filter(id=record.annotation_versions[str(self.jobs[0].id)]).delete()
+        response, _ = self.download(record)
+        self.assertEqual(response.status_code, 409)
+
+    def test_preview_is_cached_until_a_new_version(self):
+        self.client.force_authenticate(self.admin)
+        url = f"/api/exports/preview/{self.jobs[0].id}/"
+        first = self.client.get(url)
+        self.assertEqual([a["original_text"] for a in first.data["annotations"]], ["555-0100"])
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(url)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(second.data, first.data)
+
+        AnnotationVersion.objects.create(job=self.jobs[0], version_number=3, source="QA")
+        third = self.client.get(url)
+        self.assertEqual(third.data["annotations"], [])
+        self.assertEqual(third.data["deidentified"], third.data["original"])
+
+
+class DeltaExportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@example.com", name="Admin", password="pw", role=User.Role.ADMIN
+        )
+        cls.dataset = Dataset.objects.create(name="delta", uploaded_by=cls.admin, status=Dataset.Status.READY)
+        cls.jobs = []
+        for i in range(4):
+            content = f"From: a@example.com\r\nSubject: {i}\r\n\r\nCall Bob at 555-010{i}.\r\n"
+            content_hash = f"{i:064d}"
+            job = Job.objects.create(
+                dataset=cls.dataset,
+                file_name=f"email_{i}.eml",
+                blob=EmlBlob.objects.store(content_hash, content),
+                content_hash=content_hash,
+                # The last job is still in QA and never part of an export
+                status=Job.Status.DELIVERED if i < 3 else Job.Status.QA_IN_PROGRESS,
+            )
+            cls.annotate(job, 1)
+            cls.jobs.append(job)
+        cls.delivered = cls.jobs[:3]
+
+    @staticmethod
+    def annotate(job, version_number):
+        version = AnnotationVersion.objects.create(job=job, version_number=version_number, source="QA")
+        Annotation.objects.create(
+            annotation_version=version, class_name="name", start_offset=0, end_offset=4, original_text="From"
+        )
+        return version
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def export(self, jobs):
+        response = self.client.post(
+            "/api/exports/", {"job_ids": [str(job.id) for job in jobs], "mode": "STREAM"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        return ExportRecord.objects.get(id=response.data["id"])
+
+    def delta(self):
+        return self.client.post(f"/api/exports/datasets/{self.dataset.id}/delta/", {"mode": "STREAM"}, format="json")
+
+    def delta_jobs(self, expected_base=None):
+        response = self.delta()
+        self.assertEqual(response.status_code, 201)
+        record = ExportRecord.objects.get(id=response.data["id"])
+        self.assertEqual(record.base_export, expected_base)
+        return set(record.job_ids)
+
+    def ids(self, jobs):
+        return {str(job.id) for job in jobs}
+
+    def test_first_delta_exports_every_delivered_job(self):
+        self.assertEqual(self.delta_jobs(), self.ids(self.delivered))
+
+    def test_nothing_changed_since_full_export(self):
+        self.export(self.delivered)
+        response = self.delta()
+        self.assertEqual(response.status_code, 400)
+
+    def test_reannotated_job_after_full_export(self):
+        full = self.export(self.delivered)
+        self.annotate(self.jobs[0], 2)
+        self.assertEqual(self.delta_jobs(expected_base=full), self.ids(self.jobs[:1]))
+
+    def test_delta_after_subset_export(self):
+        subset = self.export(self.jobs[:1])
+        self.assertEqual(self.delta_jobs(expected_base=subset), self.ids(self.jobs[1:3]))
+
+    def test_unfinished_and_failed_exports_are_ignored(self):
+        for record_status in (ExportRecord.Status.PENDING, ExportRecord.Status.RUNNING, ExportRecord.Status.FAILED):
+            ExportRecord.objects.create(
+                dataset=self.dataset, job_ids=sorted(self.ids(self.delivered)), status=record_status
+            )
+        self.assertEqual(self.delta_jobs(), self.ids(self.delivered))
+
+    def test_export_without_pinned_versions(self):
+        full = self.export(self.delivered)
+        ExportRecord.objects.filter(id=full.id).update(annotation_versions=None)
+        self.assertEqual(self.delta().status_code, 400)
+
+        self.annotate(self.jobs[1], 2)
+        self.assertEqual(self.delta_jobs(expected_base=full), self.ids(self.jobs[1:2]))
+
+    def test_delta_renders_only_changed_jobs(self):
+        def download(record):
+            with mock.patch.object(generation, "job_task", wraps=generation.job_task) as job_task:
+                response = self.client.get(f"/api/exports/{record.id}/download/")
+                data = b"".join(response.streaming_content)
+            return zipfile.ZipFile(io.BytesIO(data)), job_task.call_count
+
+        archive, rendered = download(self.export(self.delivered))
+        self.assertEqual(rendered, 3)
+        self.assertEqual(ExportEntry.objects.count(), 3)
+        first = {name: archive.read(name) for name in archive.namelist()}
+
+        self.annotate(self.jobs[0], 2)
+        delta = ExportRecord.objects.get(id=self.delta().data["id"])
+        archive, rendered = download(delta)
+        self.assertEqual(rendered, 1)
+        self.assertEqual(len(archive.namelist()), 1)
+
+        # Unchanged jobs of a later full export come from the cache
+        archive, rendered = download(self.export(self.delivered))
+        self.assertEqual(rendered, 0)
+        self.assertEqual({name: archive.read(name) for name in archive.namelist()}, first)
+
+
+@override_settings(BACKGROUND_TASKS_INLINE=True, EXPORT_WORKERS=1)
+class ExportBuildTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@example.com", name="Admin", password="pw", role=User.Role.ADMIN
+        )
+        dataset = Dataset.objects.create(name="build", uploaded_by=cls.admin, status=Dataset.Status.READY)
+        cls.jobs = []
+        for i in range(5):
+            content = f"From: a@example.com\r\nSubject: {i}\r\n\r\nCall Bob at 555-010{i}.\r\n"
+            content_hash = f"{i:064d}"
+            cls.jobs.append(
+                Job.objects.create(
+                    dataset=dataset,
+                    file_name=f"email_{i}.eml",
+                    blob=EmlBlob.objects.store(content_hash, content),
+                    content_hash=content_hash,
+                    status=Job.Status.DELIVERED,
+                )
+            )
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        self.client.force_authenticate(self.admin)
+
+    def create_archive_export(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/exports/", {"job_ids": [str(job.id) for job in self.jobs], "mode": "ARCHIVE"}, format="json"
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], ExportRecord.Status.PENDING)
+        return ExportRecord.objects.get(id=response.data["id"])
+
+    def test_build_reports_progress_and_finishes(self):
+        progress = []
+
+        def save_progress(record, processed):
+            stored = ExportRecord.objects.get(id=record.id)
+            progress.append((stored.status, processed, stored.total_count))
+            save(record, processed)
+
+        save = generation._save_progress
+        with mock.patch.object(generation, "PROGRESS_INTERVAL", 2), mock.patch.object(
+            generation, "_save_progress", save_progress
+        ):
+            record = self.create_archive_export()
+
+        self.assertEqual(progress, [("RUNNING", 2, 5), ("RUNNING", 4, 5)])
+        self.assertEqual(record.status, ExportRecord.Status.DONE)
+        self.assertEqual((record.processed_count, record.total_count), (5, 5))
+        self.assertEqual(record.error_message, "")
+        path = Path(record.file_path)
+        self.assertEqual(record.file_size, path.stat().st_size)
+        self.assertEqual(record.file_sha256, hashlib.sha256(path.read_bytes()).hexdigest())
+        with zipfile.ZipFile(path) as archive:
+            self.assertEqual(len(archive.namelist()), 5)
+            self.assertIsNone(archive.testzip())
+
+    def test_failed_job_fails_the_build_and_removes_the_archive(self):
+        calls = []
+
+        def job_task(job, annotations):
+            calls.append(job.id)
+            if len(calls) == 3:
+                raise ValueError("corrupt payload")
+            return task(job, annotations)
+
+        task = generation.job_task
+        with mock.patch.object(generation, "PROGRESS_INTERVAL", 1), mock.patch.object(
+            generation, "job_task", job_task
+        ):
+            record = self.create_archive_export()
+
+        self.assertEqual(record.status, ExportRecord.Status.FAILED)
+        self.assertEqual(record.error_message, "corrupt payload")
+        self.assertEqual(record.processed_count, 2)
+        self.assertEqual(record.file_path, "")
+        self.assertFalse(Path(storage.get_export_path(record)).exists())
+
+        response = self.client.get(f"/api/exports/{record.id}/download/")
+        self.assertEqual(response.status_code, 409)
+
+    def test_command_only_builds_pending_exports(self):
+        record = self.create_archive_export()
+        with self.assertRaisesMessage(CommandError, "is DONE, not PENDING"):
+            call_command("build_export", str(record.id))
+        with self.assertRaisesMessage(CommandError, "not found"):
+            call_command("build_export", "not-a-uuid")
+
+        pending = ExportRecord.objects.create(
+            dataset=record.dataset, job_ids=record.job_ids, total_count=len(record.job_ids)
+        )
+        out = io.StringIO()
+        call_command("build_export", str(pending.id), "--workers", "1", stdout=out)
+        self.assertIn("Exported 5 jobs", out.getvalue())
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, ExportRecord.Status.DONE)
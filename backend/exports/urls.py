@@ -11,6 +11,10 @@ urlpatterns = [
         "datasets/<uuid:dataset_id>/jobs/",
         ExportViewSet.as_view({"get": "list_delivered_jobs"}),
     ),
+    path(
+        "datasets/<uuid:dataset_id>/delta/",
+        ExportViewSet.as_view({"post": "create_delta_export"}),
+    ),
     path(
         "preview/<uuid:job_id>/",
         ExportViewSet.as_view({"get": "preview"}),
@@ -19,6 +23,10 @@ urlpatterns = [
         "",
         ExportViewSet.as_view({"get": "list_exports", "post": "create_export"}),
     ),
+    path(
+        "<uuid:export_id>/",
+        ExportViewSet.as_view({"get": "retrieve_export"}),
+    ),
     path(
         "<uuid:export_id>/download/",
         ExportViewSet.as_view({"get": "download"}),
@@ -1,11 +1,7 @@
-import os
-import uuid
-import zipfile
-
 from django.conf import settings
 from django.db.models import Count, Q, Subquery, OuterRef, IntegerField
 from django.db.models.functions import Coalesce
-from django.http import FileResponse
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
@@ -13,13 +9,17 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
 from annotations.models import Annotation, AnnotationVersion
-from annotations.serializers import AnnotationSerializer
-from core.eml_normalizer import normalize_eml, re_encode_eml
+from core.background import run_command_in_background
 from core.permissions import IsAdmin
 from datasets.models import Dataset, Job
 
+from . import storage
+from .delivery import archive_response
+from .generation import delta_job_ids, input_digest, is_reproducible, pin_versions, stream_export
 from .models import ExportRecord
+from .previews import get_preview
 from .serializers import (
+    CreateDeltaExportSerializer,
     CreateExportSerializer,
     DatasetWithDeliveredSerializer,
     DeliveredJobSerializer,
@@ -36,35 +36,6 @@ class ExportPagination(PageNumberPagination):
 class ExportViewSet(ViewSet):
     permission_classes = [IsAuthenticated, IsAdmin]
 
-    def _deidentify(self, raw_content, annotations):
-        """Replace annotated spans with [TAG] placeholders, processing from end to start.
-
-        Annotation offsets are relative to \\r-stripped content (as created by the
-        frontend which strips \\r for DOM compatibility). This method adjusts offsets
-        to account for \\r characters in the original content so the exported file
-        preserves the original line endings.
-        """
-        # Build list of \r positions for offset adjustment
-        cr_positions = [i for i, c in enumerate(raw_content) if c == "\r"]
-
-        def to_original_offset(stripped_offset):
-            extra = 0
-            for cr_pos in cr_positions:
-                if cr_pos <= stripped_offset + extra:
-                    extra += 1
-                else:
-                    break
-            return stripped_offset + extra
-
-        sorted_anns = sorted(annotations, key=lambda a: a.start_offset, reverse=True)
-        content = raw_content
-        for ann in sorted_anns:
-            tag = ann.tag or f"[{ann.class_name}]"
-            start = to_original_offset(ann.start_offset)
-            end = to_original_offset(ann.end_offset)
-            content = content[:start] + tag + content[end:]
-        return content
-
     def list_datasets(self, request):
         datasets = (
             Dataset.objects.annotate(
@@ -137,52 +108,32 @@ class ExportViewSet(ViewSet):
         return Response(DeliveredJobSerializer(result, many=True).data)
 
     def preview(self, request, job_id):
+        latest_version_subquery = (
+            AnnotationVersion.objects.filter(job=OuterRef("pk"))
+            .order_by("-version_number")
+            .values("id")[:1]
+        )
         try:
-            job = Job.objects.get(id=job_id, status=Job.Status.DELIVERED)
+            job = (
+                Job.objects.annotate(latest_version_id=Subquery(latest_version_subquery))
+                .only("id", "file_name", "content_hash", "blob_id")
+                .get(id=job_id, status=Job.Status.DELIVERED)
+            )
         except Job.DoesNotExist:
             return Response(
                 {"detail": "Delivered job not found."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        if not job.eml_content:
+        # Served from cache unless the content or latest version changed
+        preview = get_preview(job, job.latest_version_id)
+        if preview is None:
             return Response(
                 {"detail": "Email content not available."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        normalized, _ = normalize_eml(job.eml_content)
-
-        latest_version = (
-            job.annotation_versions.order_by("-version_number").first()
-        )
-        if not latest_version:
-            return Response(
-                {
-                    "job_id": str(job.id),
-                    "file_name": job.file_name,
-                    "original": normalized,
-                    "deidentified": normalized,
-                    "annotations": [],
-                }
-            )
-
-        annotations = list(
-            latest_version.annotations.select_related("annotation_class").order_by(
-                "start_offset"
-            )
-        )
-        deidentified = self._deidentify(normalized, annotations)
-
-        return Response(
-            {
-                "job_id": str(job.id),
-                "file_name": job.file_name,
-                "original": normalized,
-                "deidentified": deidentified,
-                "annotations": AnnotationSerializer(annotations, many=True).data,
-            }
-        )
+        return Response({"job_id": str(job.id), "file_name": job.file_name, **preview})
 
     def list_exports(self, request):
         queryset = (
@@ -197,99 +148,159 @@ class ExportViewSet(ViewSet):
         paginator = ExportPagination()
         page = paginator.paginate_queryset(queryset, request)
 
-        data = [
-            {
-                "id": record.id,
-                "dataset_name": record.dataset.name,
-                "job_count": len(record.job_ids),
-                "file_size": record.file_size,
-                "exported_by": record.exported_by,
-                "exported_at": record.exported_at,
-                "download_url": f"/api/exports/{record.id}/download/",
-            }
-            for record in page
-        ]
-        serialized = ExportRecordSerializer(data, many=True).data
+        serialized = ExportRecordSerializer(
+            [self._record_data(record) for record in page], many=True
+        ).data
         return paginator.get_paginated_response(serialized)
 
+    def retrieve_export(self, request, export_id):
+        try:
+            record = ExportRecord.objects.select_related("dataset", "exported_by").get(
+                id=export_id
+            )
+        except ExportRecord.DoesNotExist:
+            return Response(
+                {"detail": "Export not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(ExportRecordSerializer(self._record_data(record)).data)
+
+    def _record_data(self, record):
+        return {
+            "id": record.id,
+            "dataset_name": record.dataset.name,
+            "job_count": len(record.job_ids),
+            "file_size": record.file_size,
+            "exported_by": record.exported_by,
+            "exported_at": record.exported_at,
+            "status": record.status,
+            "processed_count": record.processed_count,
+            "total_count": record.total_count,
+            "error_message": record.error_message,
+            "mode": record.mode,
+            "formats": record.formats,
+            "content_digest": record.content_digest,
+            "base_export_id": record.base_export_id,
+            "download_url": f"/api/exports/{record.id}/download/",
+        }
+
     def create_export(self, request):
         serializer = CreateExportSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         job_ids = serializer.validated_data["job_ids"]
 
-        jobs = Job.objects.filter(id__in=job_ids).select_related("dataset")
-        if jobs.count() != len(job_ids):
+        # One round trip covers all validation below
+        rows = list(Job.objects.filter(id__in=job_ids).values_list("status", "dataset_id"))
+        if len(rows) != len(job_ids):
             return Response(
                 {"detail": "One or more jobs not found."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        non_delivered = jobs.exclude(status=Job.Status.DELIVERED)
-        if non_delivered.exists():
+        if any(job_status != Job.Status.DELIVERED for job_status, _ in rows):
             return Response(
                 {"detail": "All jobs must have DELIVERED status."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         # All jobs should be from the same dataset
-        dataset_ids = set(jobs.values_list("dataset_id", flat=True))
+        dataset_ids = {dataset_id for _, dataset_id in rows}
         if len(dataset_ids) != 1:
             return Response(
                 {"detail": "All jobs must belong to the same dataset."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        dataset = jobs.first().dataset
-        export_id = uuid.uuid4()
-        export_dir = os.path.join(settings.MEDIA_ROOT, "exports", str(export_id))
-        os.makedirs(export_dir, exist_ok=True)
+        return self._start_export(
+            request,
+            dataset_id=dataset_ids.pop(),
+            job_ids=job_ids,
+            mode=serializer.validated_data.get("mode"),
+            formats=serializer.validated_data.get("formats"),
+        )
+
+    def create_delta_export(self, request, dataset_id):
+        """Export the delivered jobs that no finished export holds at their latest annotation version."""
+        serializer = CreateDeltaExportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        if not Dataset.objects.filter(id=dataset_id).exists():
+            return Response(
+                {"detail": "Dataset not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
 
-        zip_path = os.path.join(export_dir, "export.zip")
+        # Selection is per job, against what finished exports actually contain
+        base_export = (
+            ExportRecord.objects.filter(dataset_id=dataset_id, status=ExportRecord.Status.DONE)
+            .order_by("-exported_at")
+            .first()
+        )
+        job_ids = delta_job_ids(dataset_id)
+        if not job_ids:
+            return Response(
+                {"detail": "No jobs delivered or re-annotated since the last export."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-            for job in jobs:
-                if not job.eml_content:
-                    continue
+        return self._start_export(
+            request,
+            dataset_id=dataset_id,
+            job_ids=job_ids,
+            mode=serializer.validated_data.get("mode"),
+            formats=serializer.validated_data.get("formats"),
+            base_export=base_export,
+        )
 
-                normalized, has_encoded = normalize_eml(job.eml_content)
+    def _start_export(self, request, dataset_id, job_ids, mode=None, formats=None, base_export=None):
+        formats = formats or [ExportRecord.Format.EML]
+        if mode is None:
+            streamable = len(job_ids) <= settings.EXPORT_STREAM_MAX_JOBS
+            mode = ExportRecord.Mode.STREAM if streamable else ExportRecord.Mode.ARCHIVE
 
-                latest_version = (
-                    job.annotation_versions.order_by("-version_number").first()
-                )
-                if latest_version:
-                    annotations = list(
-                        latest_version.annotations.select_related(
-                            "annotation_class"
-                        ).order_by("start_offset")
-                    )
-                    deidentified = self._deidentify(normalized, annotations)
-                else:
-                    deidentified = normalized
-
-                if has_encoded:
-                    deidentified = re_encode_eml(deidentified, job.eml_content)
-
-                short_id = str(job.id)[:8]
-                out_name = f"REDACTED_{short_id}_{job.file_name}"
-                zf.writestr(out_name, deidentified)
-
-        file_size = os.path.getsize(zip_path)
-
-        record = ExportRecord.objects.create(
-            id=export_id,
-            dataset=dataset,
+        # Later annotation versions must not change what this export contains
+        versions = pin_versions(job_ids)
+        record = ExportRecord(
+            dataset_id=dataset_id,
             job_ids=[str(jid) for jid in job_ids],
-            file_size=file_size,
-            file_path=zip_path,
+            mode=mode,
+            formats=formats,
+            total_count=len(job_ids),
+            annotation_versions=versions,
+            input_digest=input_digest(job_ids, formats, versions),
+            base_export=base_export,
             exported_by=request.user,
         )
+        reusable = None
+        if mode == ExportRecord.Mode.ARCHIVE:
+            reusable = storage.find_reusable_archive(record.input_digest)
+
+        if mode == ExportRecord.Mode.STREAM or reusable is not None:
+            # Generated on download, or identical to an archive on disk
+            record.status = ExportRecord.Status.DONE
+            record.processed_count = len(job_ids)
+            if reusable is not None:
+                record.file_path = reusable.file_path
+                record.file_size = reusable.file_size
+                record.content_digest = reusable.content_digest
+                record.file_sha256 = reusable.file_sha256
+            record.save()
+            response_status = status.HTTP_201_CREATED
+        else:
+            record.save()
+            run_command_in_background("build_export", str(record.id))
+            response_status = status.HTTP_202_ACCEPTED
 
         return Response(
             {
                 "id": str(record.id),
+                "status": record.status,
+                "mode": record.mode,
+                "formats": record.formats,
+                "job_count": len(job_ids),
                 "download_url": f"/api/exports/{record.id}/download/",
             },
-            status=status.HTTP_201_CREATED,
+            status=response_status,
         )
 
     def download(self, request, export_id):
@@ -301,16 +312,32 @@ class ExportViewSet(ViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        if not os.path.exists(record.file_path):
+        if record.status != ExportRecord.Status.DONE:
             return Response(
-                {"detail": "Export file not found on server."},
-                status=status.HTTP_404_NOT_FOUND,
+                {"detail": f"Export is {record.status.lower()}, not ready for download."},
+                status=status.HTTP_409_CONFLICT,
             )
 
-        response = FileResponse(
-            open(record.file_path, "rb"),
-            as_attachment=True,
-            filename=f"export_{str(record.id)[:8]}.zip",
-        )
-        response["Content-Length"] = os.path.getsize(record.file_path)
-        return response
+        filename = f"export_{str(record.id)[:8]}.zip"
+        path = storage.resolve_path(record.file_path) if record.file_path else None
+        if path is None or not path.is_file():
+            # STREAM exports, and archives evicted by retention, are
+            # regenerated from the recorded jobs and annotation versions
+            if not is_reproducible(record):
+                return Response(
+                    {
+                        "detail": "Export content can no longer be reproduced "
+                        "(annotations removed or normalizer changed); create a new export."
+                    },
+                    status=status.HTTP_409_CONFLICT,
+                )
+            response = StreamingHttpResponse(stream_export(record), content_type="application/zip")
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+            return response
+
+        if not record.file_sha256:
+            # Archives built before ETags were recorded
+            record.file_sha256 = storage.file_sha256(path)
+            ExportRecord.objects.filter(file_path=record.file_path).update(file_sha256=record.file_sha256)
+        storage.touch(record)
+        return archive_response(request, path, filename, record.file_sha256)
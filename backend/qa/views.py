@@ -1,18 +1,20 @@
 import json
 
 from django.db import transaction
-from django.db.models import Count, Max
+from django.db.models import Max
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
 from annotations.models import Annotation, AnnotationVersion
-from core.eml_normalizer import normalize_eml
 from core.models import PlatformSetting
+from core.pagination import KeysetPagination
 from core.permissions import IsQA
-from datasets.models import Job
+from core.search import search_filter
+from datasets.models import Job, UserStatusCount
+from datasets.raw_content import raw_content_response
+from datasets.status_counts import user_status_counts
 from .models import QADraftReview, QAReviewVersion
 from .serializers import (
     AcceptAnnotationSerializer,
@@ -23,17 +25,15 @@ from .serializers import (
 )
 
 
-class QAJobsPagination(PageNumberPagination):
-    page_size = 20
-    page_size_query_param = "page_size"
-    max_page_size = 100
+class QAJobsPagination(KeysetPagination):
+    ordering = ("-updated_at", "-id")
     status_counts = None
 
-    def get_paginated_response(self, data):
-        response = super().get_paginated_response(data)
+    def get_paginated_data(self, data):
+        payload = super().get_paginated_data(data)
         if self.status_counts is not None:
-            response.data["status_counts"] = self.status_counts
-        return response
+            payload["status_counts"] = self.status_counts
+        return payload
 
 
 class QAViewSet(ViewSet):
@@ -100,18 +100,7 @@ class QAViewSet(ViewSet):
         job, err = self._get_job(job_id, request.user)
         if err:
             return err
-        if not job.eml_content:
-            return Response(
-                {"detail": "Email content not available."},
-                status=status.HTTP_404_NOT_FOUND,
-            )
-        raw_content = job.eml_content
-        normalized_content, has_encoded_parts = normalize_eml(raw_content)
-        return Response({
-            "raw_content": raw_content,
-            "normalized_content": normalized_content,
-            "has_encoded_parts": has_encoded_parts,
-        })
+        return raw_content_response(request, job)
 
     def start_qa_review(self, request, job_id):
         with transaction.atomic():
@@ -328,16 +317,10 @@ class QAViewSet(ViewSet):
         base_queryset = (
             Job.objects.filter(assigned_qa=request.user)
             .select_related("dataset", "assigned_annotator")
-            .order_by("-updated_at")
         )
 
-        # Compute status counts from unfiltered base queryset
-        status_counts_qs = (
-            Job.objects.filter(assigned_qa=request.user)
-            .values("status")
-            .annotate(count=Count("id"))
-        )
-        status_counts = {row["status"]: row["count"] for row in status_counts_qs}
+        # Status counts over all of the user's jobs, from the counters
+        status_counts = user_status_counts(request.user, UserStatusCount.Role.QA)
 
         # Filters
         queryset = base_queryset
@@ -350,7 +333,7 @@ class QAViewSet(ViewSet):
                 queryset = queryset.filter(status__in=statuses)
         search = request.query_params.get("search")
         if search:
-            queryset = queryset.filter(file_name__icontains=search)
+            queryset = search_filter(queryset, search, ["file_name"])
 
         blind_review = self._get_blind_review_setting()
         paginator = QAJobsPagination()
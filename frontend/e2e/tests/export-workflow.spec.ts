@@ -421,10 +421,18 @@ test.describe("8. Export & De-identification (Admin)", () => {
     await sharedPage.getByTestId("export-selected-button").click();
     await waitForSuccessToast(sharedPage);
 
-    openedUrl = await sharedPage.evaluate(() =>
-      (window as unknown as { _lastOpenUrl: string })._lastOpenUrl || ""
-    );
-    expect(openedUrl).toMatch(/\/api\/exports\/.*\/download\//);
+    // The archive is built in the background; the download opens once it is ready
+    await expect
+      .poll(
+        async () => {
+          openedUrl = await sharedPage.evaluate(() =>
+            (window as unknown as { _lastOpenUrl: string })._lastOpenUrl || ""
+          );
+          return openedUrl;
+        },
+        { timeout: 15000 },
+      )
+      .toMatch(/\/api\/exports\/.*\/download\//);
 
     // Restore window.open
     await sharedPage.evaluate(() => {
@@ -443,6 +451,7 @@ test.describe("8. Export & De-identification (Admin)", () => {
 
     // Track window.open calls
     await sharedPage.evaluate(() => {
+      (window as unknown as { _lastOpenUrl: string })._lastOpenUrl = "";
       (window as unknown as { _originalOpen: typeof window.open })._originalOpen = window.open;
       window.open = (url?: string | URL, ...args: unknown[]) => {
         (window as unknown as { _lastOpenUrl: string })._lastOpenUrl = String(url || "");
@@ -453,10 +462,15 @@ test.describe("8. Export & De-identification (Admin)", () => {
     await exportAllBtn.click();
     await waitForSuccessToast(sharedPage);
 
-    const openedUrl = await sharedPage.evaluate(() =>
-      (window as unknown as { _lastOpenUrl: string })._lastOpenUrl || ""
-    );
-    expect(openedUrl).toMatch(/\/api\/exports\/.*\/download\//);
+    await expect
+      .poll(
+        () =>
+          sharedPage.evaluate(() =>
+            (window as unknown as { _lastOpenUrl: string })._lastOpenUrl || ""
+          ),
+        { timeout: 15000 },
+      )
+      .toMatch(/\/api\/exports\/.*\/download\//);
 
     // Restore window.open
     await sharedPage.evaluate(() => {
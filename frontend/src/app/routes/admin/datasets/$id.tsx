@@ -2,6 +2,7 @@ import { useCallback, useEffect, useState } from "react";
 import { createFileRoute, Link } from "@tanstack/react-router";
 import { ArrowLeft } from "lucide-react";
 import { DataTablePagination } from "@/components/data-table-pagination";
+import { useCursorPagination } from "@/hooks/use-cursor-pagination";
 import { TableSkeleton } from "@/components/table-skeleton";
 import { Button } from "@/components/ui/button";
 import {
@@ -43,8 +44,14 @@ export const Route = createFileRoute("/admin/datasets/$id")({
 
 function DatasetDetailPage() {
   const { id } = Route.useParams();
-  const [page, setPage] = useState(1);
   const [pageSize, setPageSize] = useState(20);
+  const {
+    page,
+    cursor,
+    pageSize: fetchSize,
+    goToPage,
+    reset: resetPage,
+  } = useCursorPagination(pageSize);
   const [search, setSearch] = useState("");
   const [localSearch, setLocalSearch] = useState("");
   const [statusFilter, setStatusFilter] = useState("");
@@ -57,8 +64,8 @@ function DatasetDetailPage() {
   const { data: dataset, isLoading: datasetLoading } = useDataset(id);
   const { data: jobsData, isLoading: jobsLoading } = useJobsByDataset({
     datasetId: id,
-    page,
-    pageSize,
+    cursor,
+    pageSize: fetchSize,
     search,
     status: statusFilter || undefined,
   });
@@ -71,15 +78,15 @@ function DatasetDetailPage() {
   useEffect(() => {
     const timer = setTimeout(() => {
       setSearch(localSearch);
-      setPage(1);
+      resetPage();
     }, 300);
     return () => clearTimeout(timer);
-  }, [localSearch]);
+  }, [localSearch, resetPage]);
 
   const handleStatusClick = useCallback((status: string) => {
     setStatusFilter(status);
-    setPage(1);
-  }, []);
+    resetPage();
+  }, [resetPage]);
 
   const handleJobClick = useCallback((jobId: string) => {
     setDialogJobId(jobId);
@@ -178,7 +185,7 @@ function DatasetDetailPage() {
             size="sm"
             onClick={() => {
               setStatusFilter("");
-              setPage(1);
+              resetPage();
             }}
           >
             Clear Filter
@@ -206,10 +213,10 @@ function DatasetDetailPage() {
               page={page}
               pageSize={pageSize}
               totalCount={jobsData?.count ?? 0}
-              onPageChange={setPage}
+              onPageChange={(target) => goToPage(target, jobsData)}
               onPageSizeChange={(size) => {
                 setPageSize(size);
-                setPage(1);
+                resetPage();
               }}
             />
           </div>
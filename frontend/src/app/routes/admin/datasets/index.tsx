@@ -2,6 +2,7 @@ import { useCallback, useEffect, useState } from "react";
 import { createFileRoute, useNavigate } from "@tanstack/react-router";
 import { Plus, Trash2 } from "lucide-react";
 import { DataTablePagination } from "@/components/data-table-pagination";
+import { useCursorPagination } from "@/hooks/use-cursor-pagination";
 import { TableSkeleton } from "@/components/table-skeleton";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
@@ -26,23 +27,33 @@ export const Route = createFileRoute("/admin/datasets/")({
 
 function DatasetsPage() {
   const navigate = useNavigate();
-  const [page, setPage] = useState(1);
   const [pageSize, setPageSize] = useState(20);
+  const {
+    page,
+    cursor,
+    pageSize: fetchSize,
+    goToPage,
+    reset: resetPage,
+  } = useCursorPagination(pageSize);
   const [search, setSearch] = useState("");
   const [localSearch, setLocalSearch] = useState("");
   const [selectedIds, setSelectedIds] = useState<Set<string>>(new Set());
   const [uploadOpen, setUploadOpen] = useState(false);
   const [deleteTarget, setDeleteTarget] = useState<DatasetSummary | null>(null);
 
-  const { data, isLoading } = useDatasets({ page, pageSize, search });
+  const { data, isLoading } = useDatasets({
+    cursor,
+    pageSize: fetchSize,
+    search,
+  });
 
   useEffect(() => {
     const timer = setTimeout(() => {
       setSearch(localSearch);
-      setPage(1);
+      resetPage();
     }, 300);
     return () => clearTimeout(timer);
-  }, [localSearch]);
+  }, [localSearch, resetPage]);
 
   const datasets = data?.results ?? [];
 
@@ -192,10 +203,10 @@ function DatasetsPage() {
               page={page}
               pageSize={pageSize}
               totalCount={data?.count ?? 0}
-              onPageChange={setPage}
+              onPageChange={(target) => goToPage(target, data)}
               onPageSizeChange={(size) => {
                 setPageSize(size);
-                setPage(1);
+                resetPage();
               }}
             />
           </div>
@@ -1,4 +1,5 @@
-import { useState, useCallback } from "react";
+import { useState, useCallback, useEffect } from "react";
+import { toast } from "sonner";
 import { createFileRoute } from "@tanstack/react-router";
 import {
   Select,
@@ -19,10 +20,17 @@ import { useDeliveredJobs } from "@/features/export/api/get-delivered-jobs";
 import { useExportPreview } from "@/features/export/api/get-export-preview";
 import { useExportHistory } from "@/features/export/api/get-export-history";
 import { useCreateExport } from "@/features/export/api/create-export";
+import { useCreateDeltaExport } from "@/features/export/api/create-delta-export";
+import { useExportStatus } from "@/features/export/api/get-export-status";
 import { DeliveredJobsTable } from "@/features/export/components/delivered-jobs-table";
-import { ExportControls } from "@/features/export/components/export-controls";
+import {
+  EXPORT_OUTPUTS,
+  ExportControls,
+  type ExportOutput,
+} from "@/features/export/components/export-controls";
 import { ExportPreview } from "@/features/export/components/export-preview";
 import { ExportHistoryTable } from "@/features/export/components/export-history-table";
+import { ExportStatus } from "@/types/enums";
 
 export const Route = createFileRoute("/admin/export")({
   component: ExportPage,
@@ -34,12 +42,32 @@ function ExportPage() {
   );
   const [selectedJobIds, setSelectedJobIds] = useState<Set<string>>(new Set());
   const [previewJobId, setPreviewJobId] = useState<string | null>(null);
+  const [output, setOutput] = useState<ExportOutput>("eml");
+  const formats = EXPORT_OUTPUTS[output].formats;
 
   const { data: datasets } = useExportDatasets();
   const { data: jobs } = useDeliveredJobs(selectedDatasetId);
   const { data: preview } = useExportPreview(previewJobId);
   const { data: exportHistory } = useExportHistory({ page: 1 });
   const createExport = useCreateExport();
+  const createDeltaExport = useCreateDeltaExport();
+  const [activeExportId, setActiveExportId] = useState<string | null>(null);
+  const { data: activeExport } = useExportStatus(
+    activeExportId ?? "",
+    activeExportId !== null,
+  );
+
+  // Exports are built in the background; download once the archive is ready
+  useEffect(() => {
+    if (!activeExport) return;
+    if (activeExport.status === ExportStatus.DONE) {
+      setActiveExportId(null);
+      window.open(activeExport.downloadUrl, "_blank");
+    } else if (activeExport.status === ExportStatus.FAILED) {
+      setActiveExportId(null);
+      toast.error(activeExport.errorMessage || "Export failed.");
+    }
+  }, [activeExport]);
 
   const handleDatasetChange = useCallback((value: string) => {
     setSelectedDatasetId(value);
@@ -54,29 +82,40 @@ function ExportPage() {
     }
   }, [selectedJobIds]);
 
+  // Streamed exports are ready at once; archives are polled until built
+  const handleExportCreated = useCallback(
+    (data: { id: string; status: ExportStatus; downloadUrl: string }) => {
+      if (data.status === ExportStatus.DONE) {
+        window.open(data.downloadUrl, "_blank");
+      } else {
+        setActiveExportId(data.id);
+      }
+    },
+    [],
+  );
+
   const handleExportSelected = useCallback(() => {
     createExport.mutate(
-      { jobIds: Array.from(selectedJobIds) },
-      {
-        onSuccess: (data) => {
-          // Trigger download
-          window.open(data.downloadUrl, "_blank");
-        },
-      },
+      { jobIds: Array.from(selectedJobIds), formats },
+      { onSuccess: handleExportCreated },
     );
-  }, [selectedJobIds, createExport]);
+  }, [selectedJobIds, formats, createExport, handleExportCreated]);
 
   const handleExportAll = useCallback(() => {
     if (!jobs) return;
     createExport.mutate(
-      { jobIds: jobs.map((j) => j.id) },
-      {
-        onSuccess: (data) => {
-          window.open(data.downloadUrl, "_blank");
-        },
-      },
+      { jobIds: jobs.map((j) => j.id), formats },
+      { onSuccess: handleExportCreated },
+    );
+  }, [jobs, formats, createExport, handleExportCreated]);
+
+  const handleExportDelta = useCallback(() => {
+    if (!selectedDatasetId) return;
+    createDeltaExport.mutate(
+      { datasetId: selectedDatasetId, formats },
+      { onSuccess: handleExportCreated },
     );
-  }, [jobs, createExport]);
+  }, [selectedDatasetId, formats, createDeltaExport, handleExportCreated]);
 
   return (
     <div className="space-y-6" data-testid="export-page">
@@ -129,10 +168,25 @@ function ExportPage() {
             <ExportControls
               selectedCount={selectedJobIds.size}
               totalCount={jobs.length}
-              isExporting={createExport.isPending}
+              isExporting={
+                createExport.isPending ||
+                createDeltaExport.isPending ||
+                activeExportId !== null
+              }
+              exportProgress={
+                activeExport
+                  ? {
+                      processed: activeExport.processedCount,
+                      total: activeExport.totalCount,
+                    }
+                  : null
+              }
+              output={output}
+              onOutputChange={setOutput}
               onPreview={handlePreview}
               onExportSelected={handleExportSelected}
               onExportAll={handleExportAll}
+              onExportDelta={handleExportDelta}
             />
           </CardHeader>
           <CardContent>
@@ -11,6 +11,7 @@ import {
 } from "@/components/ui/select";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
 import { DataTablePagination } from "@/components/data-table-pagination";
+import { useCursorPagination } from "@/hooks/use-cursor-pagination";
 import { TableSkeleton } from "@/components/table-skeleton";
 import { useUnassignedJobs } from "@/features/job-assignment/api/get-unassigned-jobs";
 import { useAssignedJobs } from "@/features/job-assignment/api/get-assigned-jobs";
@@ -35,7 +36,13 @@ function JobAssignmentPage() {
   const [subTab, setSubTab] = useState<"unassigned" | "assigned" | "in-progress">("unassigned");
 
   // Unassigned state
-  const [page, setPage] = useState(1);
+  const {
+    page,
+    cursor,
+    pageSize: fetchSize,
+    goToPage,
+    reset: resetPage,
+  } = useCursorPagination(20);
   const [search, setSearch] = useState("");
   const [localSearch, setLocalSearch] = useState("");
   const [datasetId, setDatasetId] = useState("all");
@@ -44,7 +51,13 @@ function JobAssignmentPage() {
   const [preview, setPreview] = useState<AssignmentPreview[]>([]);
 
   // Assigned state
-  const [assignedPage, setAssignedPage] = useState(1);
+  const {
+    page: assignedPage,
+    cursor: assignedCursor,
+    pageSize: assignedFetchSize,
+    goToPage: goToAssignedPage,
+    reset: resetAssignedPage,
+  } = useCursorPagination(20);
   const [assignedSearch, setAssignedSearch] = useState("");
   const [assignedLocalSearch, setAssignedLocalSearch] = useState("");
   const [assignedDatasetId, setAssignedDatasetId] = useState("all");
@@ -52,7 +65,13 @@ function JobAssignmentPage() {
   const [reassignOpen, setReassignOpen] = useState(false);
 
   // In Progress state
-  const [inProgressPage, setInProgressPage] = useState(1);
+  const {
+    page: inProgressPage,
+    cursor: inProgressCursor,
+    pageSize: inProgressFetchSize,
+    goToPage: goToInProgressPage,
+    reset: resetInProgressPage,
+  } = useCursorPagination(20);
   const [inProgressSearch, setInProgressSearch] = useState("");
   const [inProgressLocalSearch, setInProgressLocalSearch] = useState("");
   const [inProgressDatasetId, setInProgressDatasetId] = useState("all");
@@ -61,21 +80,24 @@ function JobAssignmentPage() {
 
   const { data: jobsData, isLoading: jobsLoading } = useUnassignedJobs({
     type: activeTab,
-    page,
+    cursor,
+    pageSize: fetchSize,
     search,
     datasetId: datasetId === "all" ? undefined : datasetId,
   });
 
   const { data: assignedData, isLoading: assignedLoading } = useAssignedJobs({
     type: activeTab,
-    page: assignedPage,
+    cursor: assignedCursor,
+    pageSize: assignedFetchSize,
     search: assignedSearch,
     datasetId: assignedDatasetId === "all" ? undefined : assignedDatasetId,
   });
 
   const { data: inProgressData, isLoading: inProgressLoading } = useInProgressJobs({
     type: activeTab,
-    page: inProgressPage,
+    cursor: inProgressCursor,
+    pageSize: inProgressFetchSize,
     search: inProgressSearch,
     datasetId: inProgressDatasetId === "all" ? undefined : inProgressDatasetId,
   });
@@ -85,41 +107,41 @@ function JobAssignmentPage() {
   useEffect(() => {
     const timer = setTimeout(() => {
       setSearch(localSearch);
-      setPage(1);
+      resetPage();
     }, 300);
     return () => clearTimeout(timer);
-  }, [localSearch]);
+  }, [localSearch, resetPage]);
 
   useEffect(() => {
     const timer = setTimeout(() => {
       setAssignedSearch(assignedLocalSearch);
-      setAssignedPage(1);
+      resetAssignedPage();
     }, 300);
     return () => clearTimeout(timer);
-  }, [assignedLocalSearch]);
+  }, [assignedLocalSearch, resetAssignedPage]);
 
   useEffect(() => {
     const timer = setTimeout(() => {
       setInProgressSearch(inProgressLocalSearch);
-      setInProgressPage(1);
+      resetInProgressPage();
     }, 300);
     return () => clearTimeout(timer);
-  }, [inProgressLocalSearch]);
+  }, [inProgressLocalSearch, resetInProgressPage]);
 
   function handleTabChange(tab: string) {
     setActiveTab(tab as "ANNOTATION" | "QA");
     setSubTab("unassigned");
-    setPage(1);
+    resetPage();
     setSearch("");
     setLocalSearch("");
     setDatasetId("all");
     setSelectedJobIds(new Set());
-    setAssignedPage(1);
+    resetAssignedPage();
     setAssignedSearch("");
     setAssignedLocalSearch("");
     setAssignedDatasetId("all");
     setAssignedSelectedIds(new Set());
-    setInProgressPage(1);
+    resetInProgressPage();
     setInProgressSearch("");
     setInProgressLocalSearch("");
     setInProgressDatasetId("all");
@@ -190,7 +212,7 @@ function JobAssignmentPage() {
                     onChange={(e) => setLocalSearch(e.target.value)}
                     className="max-w-sm"
                   />
-                  <Select value={datasetId} onValueChange={(v) => { setDatasetId(v); setPage(1); }}>
+                  <Select value={datasetId} onValueChange={(v) => { setDatasetId(v); resetPage(); }}>
                     <SelectTrigger className="w-[200px]">
                       <SelectValue placeholder="All Datasets" />
                     </SelectTrigger>
@@ -223,7 +245,7 @@ function JobAssignmentPage() {
                           page={page}
                           pageSize={20}
                           totalCount={jobsData?.count ?? 0}
-                          onPageChange={setPage}
+                          onPageChange={(target) => goToPage(target, jobsData)}
                         />
                       </>
                     )}
@@ -250,7 +272,7 @@ function JobAssignmentPage() {
                     onChange={(e) => setAssignedLocalSearch(e.target.value)}
                     className="max-w-sm"
                   />
-                  <Select value={assignedDatasetId} onValueChange={(v) => { setAssignedDatasetId(v); setAssignedPage(1); }}>
+                  <Select value={assignedDatasetId} onValueChange={(v) => { setAssignedDatasetId(v); resetAssignedPage(); }}>
                     <SelectTrigger className="w-[200px]">
                       <SelectValue placeholder="All Datasets" />
                     </SelectTrigger>
@@ -289,7 +311,7 @@ function JobAssignmentPage() {
                       page={assignedPage}
                       pageSize={20}
                       totalCount={assignedData?.count ?? 0}
-                      onPageChange={setAssignedPage}
+                      onPageChange={(target) => goToAssignedPage(target, assignedData)}
                     />
                   </>
                 )}
@@ -305,7 +327,7 @@ function JobAssignmentPage() {
                     onChange={(e) => setInProgressLocalSearch(e.target.value)}
                     className="max-w-sm"
                   />
-                  <Select value={inProgressDatasetId} onValueChange={(v) => { setInProgressDatasetId(v); setInProgressPage(1); }}>
+                  <Select value={inProgressDatasetId} onValueChange={(v) => { setInProgressDatasetId(v); resetInProgressPage(); }}>
                     <SelectTrigger className="w-[200px]">
                       <SelectValue placeholder="All Datasets" />
                     </SelectTrigger>
@@ -344,7 +366,7 @@ function JobAssignmentPage() {
                       page={inProgressPage}
                       pageSize={20}
                       totalCount={inProgressData?.count ?? 0}
-                      onPageChange={setInProgressPage}
+                      onPageChange={(target) => goToInProgressPage(target, inProgressData)}
                     />
                   </>
                 )}
@@ -2,6 +2,7 @@ import { useCallback, useState } from "react";
 import { createFileRoute } from "@tanstack/react-router";
 import { Plus } from "lucide-react";
 import { DataTablePagination } from "@/components/data-table-pagination";
+import { useCursorPagination } from "@/hooks/use-cursor-pagination";
 import { TableSkeleton } from "@/components/table-skeleton";
 import { Button } from "@/components/ui/button";
 import { useUsers } from "@/features/users/api/get-users";
@@ -17,8 +18,14 @@ export const Route = createFileRoute("/admin/users")({
 });
 
 function UsersPage() {
-  const [page, setPage] = useState(1);
   const [pageSize, setPageSize] = useState(20);
+  const {
+    page,
+    cursor,
+    pageSize: fetchSize,
+    goToPage,
+    reset: resetPage,
+  } = useCursorPagination(pageSize);
   const [search, setSearch] = useState("");
   const [role, setRole] = useState("all");
   const [status, setStatus] = useState("all");
@@ -29,8 +36,8 @@ function UsersPage() {
   const activateUser = useActivateUser();
 
   const { data, isLoading } = useUsers({
-    page,
-    pageSize,
+    cursor,
+    pageSize: fetchSize,
     search,
     role: role === "all" ? "" : role,
     status: status === "all" ? "" : status,
@@ -38,18 +45,18 @@ function UsersPage() {
 
   const handleSearchChange = useCallback((value: string) => {
     setSearch(value);
-    setPage(1);
-  }, []);
+    resetPage();
+  }, [resetPage]);
 
   const handleRoleChange = useCallback((value: string) => {
     setRole(value);
-    setPage(1);
-  }, []);
+    resetPage();
+  }, [resetPage]);
 
   const handleStatusChange = useCallback((value: string) => {
     setStatus(value);
-    setPage(1);
-  }, []);
+    resetPage();
+  }, [resetPage]);
 
   function handleCreate() {
     setEditingUser(null);
@@ -104,10 +111,10 @@ function UsersPage() {
               page={page}
               pageSize={pageSize}
               totalCount={data?.count ?? 0}
-              onPageChange={setPage}
+              onPageChange={(target) => goToPage(target, data)}
               onPageSizeChange={(size) => {
                 setPageSize(size);
-                setPage(1);
+                resetPage();
               }}
             />
           </div>
@@ -2,6 +2,7 @@ import { useState } from "react";
 import { createFileRoute } from "@tanstack/react-router";
 import { Search } from "lucide-react";
 import { DataTablePagination } from "@/components/data-table-pagination";
+import { useCursorPagination } from "@/hooks/use-cursor-pagination";
 import { TableSkeleton } from "@/components/table-skeleton";
 import { useMyAnnotationJobs } from "@/features/annotations/api/get-my-annotation-jobs";
 import { JobsSummaryBar } from "@/features/annotations/components/jobs-summary-bar";
@@ -26,15 +27,21 @@ const statusTabs = [
 ] as const;
 
 function AnnotatorDashboardPage() {
-  const [page, setPage] = useState(1);
   const [pageSize, setPageSize] = useState(20);
+  const {
+    page,
+    cursor,
+    pageSize: fetchSize,
+    goToPage,
+    reset: resetPage,
+  } = useCursorPagination(pageSize);
   const [search, setSearch] = useState("");
   const [searchInput, setSearchInput] = useState("");
   const [statusFilter, setStatusFilter] = useState("");
 
   const { data, isLoading } = useMyAnnotationJobs({
-    page,
-    pageSize,
+    cursor,
+    pageSize: fetchSize,
     status: statusFilter || undefined,
     search: search || undefined,
   });
@@ -42,7 +49,7 @@ function AnnotatorDashboardPage() {
   function handleSearch(e: React.FormEvent) {
     e.preventDefault();
     setSearch(searchInput);
-    setPage(1);
+    resetPage();
   }
 
   return (
@@ -58,7 +65,7 @@ function AnnotatorDashboardPage() {
           value={statusFilter}
           onValueChange={(v) => {
             setStatusFilter(v);
-            setPage(1);
+            resetPage();
           }}
         >
           <TabsList>
@@ -101,10 +108,10 @@ function AnnotatorDashboardPage() {
               page={page}
               pageSize={pageSize}
               totalCount={data.count}
-              onPageChange={setPage}
+              onPageChange={(target) => goToPage(target, data)}
               onPageSizeChange={(size) => {
                 setPageSize(size);
-                setPage(1);
+                resetPage();
               }}
             />
           </div>
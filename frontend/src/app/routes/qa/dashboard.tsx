@@ -2,6 +2,7 @@ import { useState } from "react";
 import { createFileRoute } from "@tanstack/react-router";
 import { Search } from "lucide-react";
 import { DataTablePagination } from "@/components/data-table-pagination";
+import { useCursorPagination } from "@/hooks/use-cursor-pagination";
 import { TableSkeleton } from "@/components/table-skeleton";
 import { useMyQAJobs } from "@/features/qa-review/api/get-my-qa-jobs";
 import { QAJobsSummaryBar } from "@/features/qa-review/components/qa-jobs-summary-bar";
@@ -24,15 +25,21 @@ const statusTabs = [
 ] as const;
 
 function QADashboardPage() {
-  const [page, setPage] = useState(1);
   const [pageSize, setPageSize] = useState(20);
+  const {
+    page,
+    cursor,
+    pageSize: fetchSize,
+    goToPage,
+    reset: resetPage,
+  } = useCursorPagination(pageSize);
   const [search, setSearch] = useState("");
   const [searchInput, setSearchInput] = useState("");
   const [statusFilter, setStatusFilter] = useState("");
 
   const { data, isLoading } = useMyQAJobs({
-    page,
-    pageSize,
+    cursor,
+    pageSize: fetchSize,
     status: statusFilter || undefined,
     search: search || undefined,
   });
@@ -40,7 +47,7 @@ function QADashboardPage() {
   function handleSearch(e: React.FormEvent) {
     e.preventDefault();
     setSearch(searchInput);
-    setPage(1);
+    resetPage();
   }
 
   return (
@@ -56,7 +63,7 @@ function QADashboardPage() {
           value={statusFilter}
           onValueChange={(v) => {
             setStatusFilter(v);
-            setPage(1);
+            resetPage();
           }}
         >
           <TabsList>
@@ -103,10 +110,10 @@ function QADashboardPage() {
               page={page}
               pageSize={pageSize}
               totalCount={data.count}
-              onPageChange={setPage}
+              onPageChange={(target) => goToPage(target, data)}
               onPageSizeChange={(size) => {
                 setPageSize(size);
-                setPage(1);
+                resetPage();
               }}
             />
           </div>
@@ -1,16 +1,16 @@
 import { keepPreviousData, useQuery } from "@tanstack/react-query";
 import { apiClient } from "@/lib/api-client";
+import { type CursorPage, mapCursorPage } from "@/hooks/use-cursor-pagination";
 import { mapMyAnnotationJob, type MyAnnotationJob } from "./annotation-mapper";
 
 export interface MyAnnotationJobsParams {
-  page?: number;
+  cursor?: string;
   pageSize?: number;
   status?: string;
   search?: string;
 }
 
-interface MyAnnotationJobsResponse {
-  count: number;
+interface MyAnnotationJobsResponse extends CursorPage {
   statusCounts: Record<string, number>;
   results: MyAnnotationJob[];
 }
@@ -20,14 +20,14 @@ async function getMyAnnotationJobs(
 ): Promise<MyAnnotationJobsResponse> {
   const response = await apiClient.get("/annotations/my-jobs/", {
     params: {
-      page: params.page ?? 1,
+      cursor: params.cursor || undefined,
       page_size: params.pageSize ?? 20,
       status: params.status || undefined,
       search: params.search || undefined,
     },
   });
   return {
-    count: response.data.count,
+    ...mapCursorPage(response.data),
     statusCounts: (response.data.status_counts ?? {}) as Record<string, number>,
     results: (response.data.results as Record<string, unknown>[]).map(
       mapMyAnnotationJob,
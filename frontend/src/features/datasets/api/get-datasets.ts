@@ -1,29 +1,29 @@
 import { keepPreviousData, useQuery } from "@tanstack/react-query";
 import { apiClient } from "@/lib/api-client";
+import { type CursorPage, mapCursorPage } from "@/hooks/use-cursor-pagination";
 import type { DatasetSummary } from "./dataset-mapper";
 import { mapDatasetSummary } from "./dataset-mapper";
 
 export interface DatasetsParams {
-  page?: number;
+  cursor?: string;
   pageSize?: number;
   search?: string;
 }
 
-interface DatasetsResponse {
-  count: number;
+interface DatasetsResponse extends CursorPage {
   results: DatasetSummary[];
 }
 
 async function getDatasets(params: DatasetsParams): Promise<DatasetsResponse> {
   const response = await apiClient.get("/datasets/", {
     params: {
-      page: params.page ?? 1,
+      cursor: params.cursor || undefined,
       page_size: params.pageSize ?? 20,
       search: params.search || undefined,
     },
   });
   return {
-    count: response.data.count,
+    ...mapCursorPage(response.data),
     results: response.data.results.map(mapDatasetSummary),
   };
 }
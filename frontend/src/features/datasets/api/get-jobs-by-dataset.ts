@@ -1,18 +1,18 @@
 import { keepPreviousData, useQuery } from "@tanstack/react-query";
 import { apiClient } from "@/lib/api-client";
+import { type CursorPage, mapCursorPage } from "@/hooks/use-cursor-pagination";
 import type { Job } from "@/types/models";
 import { mapJob } from "./job-mapper";
 
 export interface JobsByDatasetParams {
   datasetId: string;
-  page?: number;
+  cursor?: string;
   pageSize?: number;
   search?: string;
   status?: string;
 }
 
-interface JobsByDatasetResponse {
-  count: number;
+interface JobsByDatasetResponse extends CursorPage {
   results: Job[];
 }
 
@@ -21,14 +21,14 @@ async function getJobsByDataset(
 ): Promise<JobsByDatasetResponse> {
   const response = await apiClient.get(`/datasets/${params.datasetId}/jobs/`, {
     params: {
-      page: params.page ?? 1,
+      cursor: params.cursor || undefined,
       page_size: params.pageSize ?? 20,
       search: params.search || undefined,
       status: params.status || undefined,
     },
   });
   return {
-    count: response.data.count,
+    ...mapCursorPage(response.data),
     results: response.data.results.map(mapJob),
   };
 }
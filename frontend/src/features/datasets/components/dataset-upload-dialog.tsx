@@ -207,6 +207,9 @@ function DatasetUploadDialogContent({
             <Loader2 className="h-4 w-4 animate-spin" />
             <AlertDescription>
               Extracting email files... This may take a moment.
+              {statusData && statusData.fileCount > 0 && (
+                <> ({statusData.fileCount} extracted so far)</>
+              )}
             </AlertDescription>
           </Alert>
         )}
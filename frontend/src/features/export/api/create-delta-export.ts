@@ -0,0 +1,51 @@
+import { useMutation, useQueryClient } from "@tanstack/react-query";
+import axios from "axios";
+import { toast } from "sonner";
+import { apiClient } from "@/lib/api-client";
+import type { ExportFormat, ExportMode, ExportStatus } from "@/types/enums";
+
+interface CreateDeltaExportParams {
+  datasetId: string;
+  formats?: readonly ExportFormat[];
+}
+
+interface CreateDeltaExportResponse {
+  id: string;
+  status: ExportStatus;
+  mode: ExportMode;
+  jobCount: number;
+  downloadUrl: string;
+}
+
+async function createDeltaExport(
+  params: CreateDeltaExportParams,
+): Promise<CreateDeltaExportResponse> {
+  const response = await apiClient.post(
+    `/exports/datasets/${params.datasetId}/delta/`,
+    { formats: params.formats },
+  );
+  return {
+    id: response.data.id,
+    status: response.data.status,
+    mode: response.data.mode,
+    jobCount: response.data.job_count,
+    downloadUrl: response.data.download_url,
+  };
+}
+
+export function useCreateDeltaExport() {
+  const queryClient = useQueryClient();
+  return useMutation({
+    mutationFn: createDeltaExport,
+    onSuccess: (data) => {
+      queryClient.invalidateQueries({ queryKey: ["exports", "history"] });
+      toast.success(`Exporting ${data.jobCount} changed job(s)`);
+    },
+    onError: (error) => {
+      // e.g. nothing changed since the last export
+      if (axios.isAxiosError(error) && error.response?.status === 400) {
+        toast.error(error.response.data?.detail ?? "Nothing to export.");
+      }
+    },
+  });
+}
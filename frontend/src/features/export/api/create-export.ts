@@ -1,13 +1,17 @@
 import { useMutation, useQueryClient } from "@tanstack/react-query";
 import { toast } from "sonner";
 import { apiClient } from "@/lib/api-client";
+import type { ExportFormat, ExportMode, ExportStatus } from "@/types/enums";
 
 interface CreateExportParams {
   jobIds: string[];
+  formats?: readonly ExportFormat[];
 }
 
 interface CreateExportResponse {
   id: string;
+  status: ExportStatus;
+  mode: ExportMode;
   downloadUrl: string;
 }
 
@@ -16,9 +20,12 @@ async function createExport(
 ): Promise<CreateExportResponse> {
   const response = await apiClient.post("/exports/", {
     job_ids: params.jobIds,
+    formats: params.formats,
   });
   return {
     id: response.data.id,
+    status: response.data.status,
+    mode: response.data.mode,
     downloadUrl: response.data.download_url,
   };
 }
@@ -29,7 +36,7 @@ export function useCreateExport() {
     mutationFn: createExport,
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ["exports", "history"] });
-      toast.success("Export created");
+      toast.success("Export started");
     },
   });
 }
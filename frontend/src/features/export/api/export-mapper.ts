@@ -1,3 +1,4 @@
+import type { ExportFormat, ExportMode, ExportStatus } from "@/types/enums";
 import type { WorkspaceAnnotation } from "@/types/models";
 
 export interface ExportDataset {
@@ -22,6 +23,14 @@ export interface ExportRecord {
   fileSize: number;
   exportedBy: { id: string; name: string } | null;
   exportedAt: string;
+  status: ExportStatus;
+  processedCount: number;
+  totalCount: number;
+  errorMessage: string;
+  mode: ExportMode;
+  formats: ExportFormat[];
+  contentDigest: string;
+  baseExportId: string | null;
   downloadUrl: string;
 }
 
@@ -86,6 +95,14 @@ export function mapExportRecord(
     fileSize: data.file_size as number,
     exportedBy,
     exportedAt: data.exported_at as string,
+    status: data.status as ExportStatus,
+    processedCount: data.processed_count as number,
+    totalCount: data.total_count as number,
+    errorMessage: (data.error_message as string) ?? "",
+    mode: data.mode as ExportMode,
+    formats: (data.formats as ExportFormat[]) ?? [],
+    contentDigest: (data.content_digest as string) ?? "",
+    baseExportId: (data.base_export_id as string | null) ?? null,
     downloadUrl: data.download_url as string,
   };
 }
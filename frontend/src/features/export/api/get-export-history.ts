@@ -1,5 +1,6 @@
 import { keepPreviousData, useQuery } from "@tanstack/react-query";
 import { apiClient } from "@/lib/api-client";
+import { ExportStatus } from "@/types/enums";
 import { mapExportRecord, type ExportRecord } from "./export-mapper";
 
 interface ExportHistoryParams {
@@ -34,5 +35,14 @@ export function useExportHistory(params: ExportHistoryParams) {
     queryKey: ["exports", "history", params],
     queryFn: () => getExportHistory(params),
     placeholderData: keepPreviousData,
+    // Keep polling while any listed export is still being built
+    refetchInterval: (query) =>
+      query.state.data?.results.some(
+        (r) =>
+          r.status === ExportStatus.PENDING ||
+          r.status === ExportStatus.RUNNING,
+      )
+        ? 2000
+        : false,
   });
 }
@@ -0,0 +1,17 @@
+import { useQuery } from "@tanstack/react-query";
+import { apiClient } from "@/lib/api-client";
+import { mapExportRecord, type ExportRecord } from "./export-mapper";
+
+async function getExportStatus(id: string): Promise<ExportRecord> {
+  const response = await apiClient.get(`/exports/${id}/`);
+  return mapExportRecord(response.data);
+}
+
+export function useExportStatus(id: string, enabled: boolean) {
+  return useQuery({
+    queryKey: ["exports", id, "status"],
+    queryFn: () => getExportStatus(id),
+    enabled,
+    refetchInterval: enabled ? 2000 : false,
+  });
+}
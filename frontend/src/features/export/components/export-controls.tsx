@@ -1,25 +1,79 @@
-import { Eye, Download, Loader2 } from "lucide-react";
+import { Eye, Download, Loader2, History } from "lucide-react";
 import { Button } from "@/components/ui/button";
+import {
+  Select,
+  SelectContent,
+  SelectItem,
+  SelectTrigger,
+  SelectValue,
+} from "@/components/ui/select";
+import { ExportFormat } from "@/types/enums";
+
+// What an export archive contains: redacted emails and/or a span manifest
+export const EXPORT_OUTPUTS = {
+  eml: { label: "Emails", formats: [ExportFormat.EML] },
+  "eml-jsonl": {
+    label: "Emails + JSONL manifest",
+    formats: [ExportFormat.EML, ExportFormat.JSONL],
+  },
+  "eml-parquet": {
+    label: "Emails + Parquet manifest",
+    formats: [ExportFormat.EML, ExportFormat.PARQUET],
+  },
+  jsonl: { label: "JSONL manifest only", formats: [ExportFormat.JSONL] },
+} as const;
+export type ExportOutput = keyof typeof EXPORT_OUTPUTS;
 
 interface ExportControlsProps {
   selectedCount: number;
   totalCount: number;
   isExporting: boolean;
+  exportProgress?: { processed: number; total: number } | null;
+  output: ExportOutput;
+  onOutputChange: (output: ExportOutput) => void;
   onPreview: () => void;
   onExportSelected: () => void;
   onExportAll: () => void;
+  onExportDelta: () => void;
 }
 
 export function ExportControls({
   selectedCount,
   totalCount,
   isExporting,
+  exportProgress,
+  output,
+  onOutputChange,
   onPreview,
   onExportSelected,
   onExportAll,
+  onExportDelta,
 }: ExportControlsProps) {
   return (
     <div className="flex items-center gap-3">
+      {exportProgress && (
+        <span
+          className="text-sm text-muted-foreground tabular-nums"
+          data-testid="export-progress"
+        >
+          Exporting {exportProgress.processed}/{exportProgress.total}
+        </span>
+      )}
+      <Select
+        value={output}
+        onValueChange={(value) => onOutputChange(value as ExportOutput)}
+      >
+        <SelectTrigger className="w-[210px]" data-testid="export-output-select">
+          <SelectValue />
+        </SelectTrigger>
+        <SelectContent>
+          {Object.entries(EXPORT_OUTPUTS).map(([value, { label }]) => (
+            <SelectItem key={value} value={value}>
+              {label}
+            </SelectItem>
+          ))}
+        </SelectContent>
+      </Select>
       <Button
         variant="outline"
         size="sm"
@@ -53,6 +107,17 @@ export function ExportControls({
         <Download className="h-4 w-4 mr-1.5" />
         Export All ({totalCount})
       </Button>
+      <Button
+        variant="outline"
+        size="sm"
+        disabled={totalCount === 0 || isExporting}
+        onClick={onExportDelta}
+        title="Jobs delivered or re-annotated since the last export"
+        data-testid="export-delta-button"
+      >
+        <History className="h-4 w-4 mr-1.5" />
+        Export Changes
+      </Button>
     </div>
   );
 }
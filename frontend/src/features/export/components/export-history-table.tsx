@@ -9,8 +9,22 @@ import {
   TableRow,
 } from "@/components/ui/table";
 import { formatFileSize } from "@/lib/utils";
+import { ExportMode, ExportStatus } from "@/types/enums";
 import type { ExportRecord } from "../api/export-mapper";
 
+function statusLabel(record: ExportRecord): string {
+  switch (record.status) {
+    case ExportStatus.PENDING:
+      return "Queued";
+    case ExportStatus.RUNNING:
+      return `${record.processedCount}/${record.totalCount}`;
+    case ExportStatus.FAILED:
+      return "Failed";
+    default:
+      return "Ready";
+  }
+}
+
 interface ExportHistoryTableProps {
   exports: ExportRecord[];
 }
@@ -26,6 +40,7 @@ export function ExportHistoryTable({ exports }: ExportHistoryTableProps) {
             <TableHead className="text-right">Jobs</TableHead>
             <TableHead className="text-right">Size</TableHead>
             <TableHead>Exported By</TableHead>
+            <TableHead>Status</TableHead>
             <TableHead className="w-[80px]">Download</TableHead>
           </TableRow>
         </TableHeader>
@@ -33,7 +48,7 @@ export function ExportHistoryTable({ exports }: ExportHistoryTableProps) {
           {exports.length === 0 ? (
             <TableRow>
               <TableCell
-                colSpan={6}
+                colSpan={7}
                 className="text-center text-muted-foreground h-24"
                 data-testid="export-history-empty"
               >
@@ -53,15 +68,30 @@ export function ExportHistoryTable({ exports }: ExportHistoryTableProps) {
                   {record.jobCount}
                 </TableCell>
                 <TableCell className="text-right tabular-nums">
-                  {formatFileSize(record.fileSize)}
+                  {record.mode === ExportMode.STREAM
+                    ? "Streamed"
+                    : formatFileSize(record.fileSize)}
                 </TableCell>
                 <TableCell>{record.exportedBy?.name ?? "—"}</TableCell>
+                <TableCell
+                  className="text-muted-foreground tabular-nums"
+                  title={record.errorMessage || undefined}
+                  data-testid="export-status"
+                >
+                  {statusLabel(record)}
+                </TableCell>
                 <TableCell>
-                  <Button variant="ghost" size="icon" asChild>
-                    <a href={record.downloadUrl} download data-testid="export-download-button">
+                  {record.status === ExportStatus.DONE ? (
+                    <Button variant="ghost" size="icon" asChild>
+                      <a href={record.downloadUrl} download data-testid="export-download-button">
+                        <Download className="h-4 w-4" />
+                      </a>
+                    </Button>
+                  ) : (
+                    <Button variant="ghost" size="icon" disabled>
                       <Download className="h-4 w-4" />
-                    </a>
-                  </Button>
+                    </Button>
+                  )}
                 </TableCell>
               </TableRow>
             ))
@@ -1,18 +1,18 @@
 import { keepPreviousData, useQuery } from "@tanstack/react-query";
 import { apiClient } from "@/lib/api-client";
+import { type CursorPage, mapCursorPage } from "@/hooks/use-cursor-pagination";
 import type { JobWithDatasetName } from "@/features/datasets/api/job-mapper";
 import { mapJobWithDatasetName } from "@/features/datasets/api/job-mapper";
 
 export interface UnassignedJobsParams {
   type: "ANNOTATION" | "QA";
-  page?: number;
+  cursor?: string;
   pageSize?: number;
   search?: string;
   datasetId?: string;
 }
 
-interface UnassignedJobsResponse {
-  count: number;
+interface UnassignedJobsResponse extends CursorPage {
   results: JobWithDatasetName[];
 }
 
@@ -22,14 +22,14 @@ async function getUnassignedJobs(
   const response = await apiClient.get("/jobs/unassigned/", {
     params: {
       type: params.type,
-      page: params.page ?? 1,
+      cursor: params.cursor || undefined,
       page_size: params.pageSize ?? 20,
       search: params.search || undefined,
       dataset_id: params.datasetId || undefined,
     },
   });
   return {
-    count: response.data.count,
+    ...mapCursorPage(response.data),
     results: response.data.results.map(mapJobWithDatasetName),
   };
 }
@@ -1,16 +1,16 @@
 import { keepPreviousData, useQuery } from "@tanstack/react-query";
 import { apiClient } from "@/lib/api-client";
+import { type CursorPage, mapCursorPage } from "@/hooks/use-cursor-pagination";
 import { mapMyQAJob, type MyQAJob } from "./qa-review-mapper";
 
 export interface MyQAJobsParams {
-  page?: number;
+  cursor?: string;
   pageSize?: number;
   status?: string;
   search?: string;
 }
 
-interface MyQAJobsResponse {
-  count: number;
+interface MyQAJobsResponse extends CursorPage {
   statusCounts: Record<string, number>;
   results: MyQAJob[];
 }
@@ -18,14 +18,14 @@ interface MyQAJobsResponse {
 async function getMyQAJobs(params: MyQAJobsParams): Promise<MyQAJobsResponse> {
   const response = await apiClient.get("/qa/my-jobs/", {
     params: {
-      page: params.page ?? 1,
+      cursor: params.cursor || undefined,
       page_size: params.pageSize ?? 20,
       status: params.status || undefined,
       search: params.search || undefined,
     },
   });
   return {
-    count: response.data.count,
+    ...mapCursorPage(response.data),
     statusCounts: (response.data.status_counts ?? {}) as Record<string, number>,
     results: (response.data.results as Record<string, unknown>[]).map(
       mapMyQAJob,
@@ -1,25 +1,25 @@
 import { keepPreviousData, useQuery } from "@tanstack/react-query";
 import { apiClient } from "@/lib/api-client";
+import { type CursorPage, mapCursorPage } from "@/hooks/use-cursor-pagination";
 import type { User } from "@/types/models";
 import { mapUser } from "@/features/auth/api/user-mapper";
 
 export interface UsersParams {
-  page?: number;
+  cursor?: string;
   pageSize?: number;
   search?: string;
   role?: string;
   status?: string;
 }
 
-interface UsersResponse {
-  count: number;
+interface UsersResponse extends CursorPage {
   results: User[];
 }
 
 async function getUsers(params: UsersParams): Promise<UsersResponse> {
   const response = await apiClient.get("/users/", {
     params: {
-      page: params.page ?? 1,
+      cursor: params.cursor || undefined,
       page_size: params.pageSize ?? 20,
       search: params.search || undefined,
       role: params.role || undefined,
@@ -27,7 +27,7 @@ async function getUsers(params: UsersParams): Promise<UsersResponse> {
     },
   });
   return {
-    count: response.data.count,
+    ...mapCursorPage(response.data),
     results: response.data.results.map(mapUser),
   };
 }
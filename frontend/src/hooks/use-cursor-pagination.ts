@@ -0,0 +1,67 @@
+import { useCallback, useState } from "react";
+
+// Paging fields of a keyset-paginated list response
+export interface CursorPage {
+  count: number;
+  nextCursor: string | null;
+  previousCursor: string | null;
+  lastCursor: string | null;
+}
+
+export function mapCursorPage(data: Record<string, unknown>): CursorPage {
+  return {
+    count: data.count as number,
+    nextCursor: (data.next_cursor as string | null) ?? null,
+    previousCursor: (data.previous_cursor as string | null) ?? null,
+    lastCursor: (data.last_cursor as string | null) ?? null,
+  };
+}
+
+interface PagerState {
+  page: number;
+  cursor?: string;
+  // Size of the last page, so stepping back from it stays page-aligned
+  lastPageSize?: number;
+}
+
+/**
+ * Page-number navigation (first / previous / next / last) over cursor
+ * pagination. Lists are fetched with `cursor` and `pageSize` from this hook.
+ */
+export function useCursorPagination(pageSize: number) {
+  const [state, setState] = useState<PagerState>({ page: 1 });
+
+  const reset = useCallback(() => setState({ page: 1 }), []);
+
+  const goToPage = useCallback(
+    (target: number, current: CursorPage | undefined) => {
+      setState((prev) => {
+        if (target <= 1 || !current) return { page: 1 };
+        if (target === prev.page + 1 && current.nextCursor) {
+          return { page: target, cursor: current.nextCursor };
+        }
+        if (target === prev.page - 1 && current.previousCursor) {
+          return { page: target, cursor: current.previousCursor };
+        }
+        if (current.lastCursor) {
+          const remainder = current.count % pageSize;
+          return {
+            page: Math.max(1, Math.ceil(current.count / pageSize)),
+            cursor: current.lastCursor,
+            lastPageSize: remainder || pageSize,
+          };
+        }
+        return prev;
+      });
+    },
+    [pageSize],
+  );
+
+  return {
+    page: state.page,
+    cursor: state.cursor,
+    pageSize: state.lastPageSize ?? pageSize,
+    goToPage,
+    reset,
+  };
+}
@@ -32,6 +32,27 @@ export const DatasetStatus = {
 } as const;
 export type DatasetStatus = (typeof DatasetStatus)[keyof typeof DatasetStatus];
 
+export const ExportStatus = {
+  PENDING: "PENDING",
+  RUNNING: "RUNNING",
+  DONE: "DONE",
+  FAILED: "FAILED",
+} as const;
+export type ExportStatus = (typeof ExportStatus)[keyof typeof ExportStatus];
+
+export const ExportMode = {
+  ARCHIVE: "ARCHIVE",
+  STREAM: "STREAM",
+} as const;
+export type ExportMode = (typeof ExportMode)[keyof typeof ExportMode];
+
+export const ExportFormat = {
+  EML: "EML",
+  JSONL: "JSONL",
+  PARQUET: "PARQUET",
+} as const;
+export type ExportFormat = (typeof ExportFormat)[keyof typeof ExportFormat];
+
 export const AnnotationSource = {
   ANNOTATOR: "ANNOTATOR",
   QA: "QA",